@@ -1,3 +1,10 @@
-from app.main import app
-
 __all__ = ["app"]
+
+
+def __getattr__(name):
+    # 延迟导入：只用到 app.models、app.utils 等子模块的进程（迁移脚本、密码哈希子进程）
+    # 不必加载整个 FastAPI 应用和全部路由
+    if name == "app":
+        from app.main import app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
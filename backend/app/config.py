@@ -10,22 +10,86 @@ DEV_SECRET_KEY = "dev-secret-key-do-not-use-in-production-please-set-env-var"
 
 
 class Settings(BaseSettings):
-    # Database
+    # Database - DB_BACKEND 为 "mysql" 或 "sqlite"（单节点文件数据库）
+    DB_BACKEND: str = "mysql"
     DB_HOST: str = "localhost"
     DB_PORT: int = 3306
     DB_NAME: str = "uma_sailing"
     DB_USER: str = "root"
     DB_PASSWORD: str = "password"
 
+    # 连接池
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 3600
+    # LIFO 复用最近归还的连接，低负载时让多余连接自然空闲并被回收
+    DB_POOL_USE_LIFO: bool = False
+
+    # 只读副本 - 逗号分隔的 SQLAlchemy URL，留空则所有查询走主库
+    DB_REPLICA_URLS: str = ""
+    DB_REPLICA_HEALTH_CHECK_INTERVAL: float = 10.0
+    # 用户写入后，其读请求在此时间窗口内固定走主库，避免读到复制延迟前的数据；
+    # 窗口以签名 cookie 交给客户端，多 worker 进程部署时同样生效
+    DB_STICKY_PRIMARY_SECONDS: float = 5.0
+
+    # 启动时核对 schema_version，版本落后时拒绝启动
+    SCHEMA_CHECK_ON_STARTUP: bool = True
+
+    # 单节点 SQLite 模式（DB_BACKEND=sqlite），建议只运行一个 worker 进程
+    SQLITE_PATH: str = "uma_sailing.db"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    SQLITE_MMAP_SIZE: int = 268435456
+
     # JWT - 生产环境必须通过环境变量配置
     SECRET_KEY: str = DEV_SECRET_KEY
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # 活动签到码（二维码）有效期
+    CHECKIN_TOKEN_EXPIRE_HOURS: int = 48
+    # 日历订阅链接（.ics）中签名令牌的有效期，以及订阅源包含多少天前开始的活动
+    CALENDAR_FEED_TOKEN_EXPIRE_DAYS: int = 365
+    CALENDAR_FEED_PAST_DAYS: int = 90
+
+    # 身份缓存 - 按 token 中的 user_id 缓存用户信息，容量或 TTL 设为 0 即关闭
+    IDENTITY_CACHE_MAX_SIZE: int = 10000
+    IDENTITY_CACHE_TTL_SECONDS: float = 60.0
+
+    # 进程内船只状态表 - 船只列表和详情读取不查询数据库；状态表只立即反映本进程的写入，
+    # 其他进程的写入要等快照过期重新加载后才可见。未设置时仅在单节点 SQLite 模式下开启
+    FLEET_BOARD_ENABLED: Optional[bool] = None
+    # 快照过期时间，超过后下次读取时从数据库重新加载；设为 0 则不过期（仅适用于单进程部署）
+    FLEET_BOARD_TTL_SECONDS: float = 5.0
+    # 船只预约：时段粒度、单次最长时长（可用时段表按此值限定扫描范围，调小前须确认没有更长的有效预约）
+    # 和最多提前多少天预约
+    RESERVATION_SLOT_MINUTES: int = 30
+    RESERVATION_MAX_HOURS: int = 12
+    RESERVATION_MAX_DAYS_AHEAD: int = 60
+    # 租船时船只版本号比较失败（并发修改）后的最多重试次数
+    BOAT_RENT_MAX_RETRIES: int = 3
+
+    # 进程内后台定时任务；多 worker 部署时由 job_leases 表的租约保证每个任务同一时刻只有一个进程执行
+    SCHEDULER_ENABLED: bool = True
+    # 租出超过此时长仍未归还的租借视为逾期：flag 标记为 overdue，return 自动归还并释放船只
+    RENTAL_OVERDUE_HOURS: int = 12
+    RENTAL_OVERDUE_ACTION: str = "flag"
+    OVERDUE_SWEEP_INTERVAL_SECONDS: int = 300
+    OVERDUE_SWEEP_BATCH_SIZE: int = 200
+
+    # 密码哈希进程池 - 工作进程数为 0 时在线程池中执行；排队超过上限返回 503
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_DEPTH: int = 64
 
     # Server
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     DEBUG: bool = True
+    # 同步端点和依赖在 anyio 线程池中执行，此值即每个 worker 的并发处理上限
+    THREADPOOL_SIZE: int = 40
+    # 超过此耗时的请求会输出一行结构化的慢请求日志
+    SLOW_REQUEST_THRESHOLD_MS: float = 500.0
 
     # CORS - 使用环境变量控制
     CORS_ORIGINS: str = "*"
@@ -45,8 +109,10 @@ class Settings(BaseSettings):
         # 如果使用默认密钥，发出警告
         if self.SECRET_KEY == DEV_SECRET_KEY:
             logger.warning("使用默认 SECRET_KEY，生产环境请设置 SECRET_KEY 环境变量")
+        if self.FLEET_BOARD_ENABLED is None:
+            self.FLEET_BOARD_ENABLED = self.DB_BACKEND == "sqlite"
         # 如果使用默认数据库密码，发出警告
-        if self.DB_PASSWORD == "password":
+        if self.DB_BACKEND == "mysql" and self.DB_PASSWORD == "password":
             logger.warning("使用默认数据库密码，请设置 DB_PASSWORD 环境变量")
 
 
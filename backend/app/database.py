@@ -1,8 +1,338 @@
+import itertools
+import logging
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from datetime import timedelta
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 from app.config import settings
+from app.utils.request_metrics import current_metrics
+from app.utils.security import create_signed_token, decode_signed_token
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMetrics:
+    """连接池等待时间和超时计数"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+
+    def record_checkout(self, wait: float):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "total_wait_ms": round(self.total_wait * 1000, 3),
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """记录获取连接等待时间和超时次数的 QueuePool"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record_timeout()
+            raise
+        pool_metrics.record_checkout(time.perf_counter() - start)
+        return conn
+
+
+def get_pool_status(bind=None) -> dict:
+    """返回连接池当前状态：已借出、空闲、溢出连接数以及等待统计"""
+    pool = (bind or engine).pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+        })
+    status.update(pool_metrics.snapshot())
+    return status
+
+
+class ReplicaSet:
+    """只读副本集合：轮询选择副本，跳过健康检查判定为不可用的副本
+
+    健康检查由 start() 启动的后台线程每 check_interval 秒执行一次，choose 只读取缓存的结果，
+    副本变慢或宕机时不会在请求线程上等待连接超时。未启动后台线程时所有副本视为可用。
+    synchronous 表示副本与主库读取同一份数据、没有复制延迟（单节点 SQLite 的读引擎）。
+    """
+
+    def __init__(self, engines, check_interval: float, synchronous: bool = False):
+        self.engines = list(engines)
+        self.check_interval = check_interval
+        self.synchronous = synchronous
+        self._healthy = {id(e): True for e in self.engines}
+        self._cursor = itertools.count()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check_health(self):
+        for replica in self.engines:
+            try:
+                with replica.connect() as conn:
+                    conn.exec_driver_sql("SELECT 1")
+                healthy = True
+            except exc.DBAPIError as e:
+                logger.warning(f"只读副本不可用 {replica.url!r}: {e}")
+                healthy = False
+            self._healthy[id(replica)] = healthy
+
+    def _check_loop(self):
+        while not self._stop.is_set():
+            self.check_health()
+            self._stop.wait(self.check_interval)
+
+    def start(self):
+        """启动后台健康检查线程，首次检查立即执行"""
+        if not self.engines or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._check_loop, name="replica-health", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def choose(self):
+        """轮询返回一个健康的副本；没有可用副本时返回 None"""
+        healthy = [e for e in self.engines if self._healthy[id(e)]]
+        if not healthy:
+            return None
+        return healthy[next(self._cursor) % len(healthy)]
+
+
+PRIMARY_STICKY_COOKIE = "db_primary_sticky"
+PRIMARY_STICKY_PURPOSE = "primary_sticky"
+
+
+class PrimaryStickiness:
+    """记录最近写入过的用户，其后续读请求在时间窗口内走主库
+
+    进程内的记录只对本进程有效。多进程部署时写入后还签发一个带截止时间的签名令牌，
+    由中间件写入 cookie 交给客户端；之后落在任一进程的请求由 get_db 取出，按用户校验后同样走主库。
+    """
+
+    MAX_ENTRIES = 10000
+
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self._until = {}
+        self._lock = threading.Lock()
+
+    def mark(self, key):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._until) >= self.MAX_ENTRIES:
+                self._until = {k: v for k, v in self._until.items() if v > now}
+            self._until[key] = now + self.window_seconds
+
+    def issue_token(self, key) -> str:
+        return create_signed_token(
+            PRIMARY_STICKY_PURPOSE, {"user_id": key}, timedelta(seconds=self.window_seconds)
+        )
+
+    def is_sticky(self, key, token: Optional[str] = None) -> bool:
+        with self._lock:
+            until = self._until.get(key)
+        if until is not None and until > time.monotonic():
+            return True
+        if not token:
+            return False
+        payload = decode_signed_token(token, PRIMARY_STICKY_PURPOSE)
+        return payload is not None and payload.get("user_id") == key
+
+
+def _prefers_replica(clause) -> bool:
+    get_options = getattr(clause, "get_execution_options", None)
+    return bool(get_options and get_options().get("prefer_replica"))
+
+
+class RoutingSession(Session):
+    """读写分离会话
+
+    info["read_only"] 为真的会话把普通查询路由到只读副本（每个会话固定一个副本）；
+    其他会话中带 execution_options(prefer_replica=True) 的查询同样走副本。
+    flush、DML 和 with_for_update() 查询始终走主库。提交过写入的用户在粘滞窗口内
+    的读请求也走主库。
+
+    副本无复制延迟时，会话提交后（直到下一次写入前）的读取也走副本：写端点提交后
+    refresh 响应对象不会再开启一个写事务。SQLite 模式下这样的写事务会占着进程内写锁
+    直到会话关闭，而响应校验还要等待线程池，洪峰时与等锁的端点互相等待。
+    """
+
+    def __init__(self, *args, replicas: ReplicaSet = None, stickiness: PrimaryStickiness = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self.stickiness = stickiness
+
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        primary = super().get_bind(mapper, clause=clause, **kw)
+        if self._flushing or getattr(clause, "is_dml", False):
+            self.info["wrote"] = True
+            self.info.pop("committed", None)
+            return primary
+        if self.replicas is None:
+            return primary
+        committed = self.info.get("committed") and self.replicas.synchronous
+        if not (self.info.get("read_only") or committed or _prefers_replica(clause)):
+            return primary
+        if getattr(clause, "_for_update_arg", None) is not None:
+            return primary
+        user_id = self.info.get("user_id")
+        if user_id is not None and self.stickiness is not None and self.stickiness.is_sticky(
+                user_id, self.info.get("sticky_token")):
+            return primary
+        if "replica" not in self.info:
+            self.info["replica"] = self.replicas.choose()
+        return self.info["replica"] or primary
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _mark_primary_sticky(session):
+    session.info["committed"] = True
+    if session.info.pop("wrote", False) and session.stickiness is not None:
+        user_id = session.info.get("user_id")
+        if user_id is not None:
+            session.stickiness.mark(user_id)
+            # 令牌放到请求状态上，由中间件写入响应 cookie
+            state = session.info.get("request_state")
+            if state is not None:
+                state.primary_sticky_token = session.stickiness.issue_token(user_id)
+
+
+# 统计每个请求执行的 SQL 语句数和数据库耗时（对所有引擎生效）
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_start"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info.pop("query_start", None)
+    metrics = current_metrics()
+    if start is not None and metrics is not None:
+        metrics.record_query(time.perf_counter() - start)
+
+
+def _create_server_engine(url: str):
+    return create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_use_lifo=settings.DB_POOL_USE_LIFO,
+        pool_pre_ping=True,
+    )
+
+
+_sqlite_writer_lock = threading.Lock()
+
+
+def create_sqlite_engine(url: str):
+    """创建单节点生产用的文件 SQLite 引擎
+
+    连接时设置 WAL 等 pragma，并接管事务的 BEGIN 语句：通过
+    execution_options(sqlite_begin="IMMEDIATE") 得到的写引擎在事务开始时
+    先在进程内排队获取写锁再执行 BEGIN IMMEDIATE，避免多个写事务在读后升级写锁时
+    直接失败（database is locked）；普通引擎使用延迟事务，不阻塞读取。
+    """
+    busy_timeout = settings.SQLITE_BUSY_TIMEOUT_MS / 1000
+    sqlite_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": busy_timeout},
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+
+    @event.listens_for(sqlite_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        # 关闭 pysqlite 自动发出的 BEGIN，由 begin 事件统一发出
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    @event.listens_for(sqlite_engine, "begin")
+    def _on_begin(conn):
+        if conn.get_execution_options().get("sqlite_begin") == "IMMEDIATE":
+            start = time.perf_counter()
+            acquired = _sqlite_writer_lock.acquire(timeout=busy_timeout)
+            metrics = current_metrics()
+            if metrics is not None:
+                metrics.record_lock_wait(time.perf_counter() - start)
+            if not acquired:
+                raise exc.OperationalError("BEGIN IMMEDIATE", None, Exception("database is locked"))
+            conn.info["sqlite_writer"] = True
+            try:
+                conn.exec_driver_sql("BEGIN IMMEDIATE")
+            except Exception:
+                _release_sqlite_writer(conn)
+                raise
+        else:
+            conn.exec_driver_sql("BEGIN")
+
+    event.listen(sqlite_engine, "commit", _release_sqlite_writer)
+    event.listen(sqlite_engine, "rollback", _release_sqlite_writer)
+    return sqlite_engine
+
+
+def _release_sqlite_writer(conn):
+    if conn.info.pop("sqlite_writer", False):
+        _sqlite_writer_lock.release()
+
+
+replica_engines = []
+replicas_synchronous = False
+stickiness_window = settings.DB_STICKY_PRIMARY_SECONDS
 
 # 检查是否为测试模式
 if os.getenv("TESTING") == "true":
@@ -12,24 +342,51 @@ if os.getenv("TESTING") == "true":
         SQLALCHEMY_DATABASE_URL,
         connect_args={"check_same_thread": False},
     )
+elif settings.DB_BACKEND == "sqlite":
+    # 单节点文件 SQLite：写会话使用 BEGIN IMMEDIATE 的写引擎，只读会话借用副本路由
+    # 交给普通引擎；同一个数据库文件无复制延迟，不需要写后粘滞
+    SQLALCHEMY_DATABASE_URL = f"sqlite:///{settings.SQLITE_PATH}"
+    sqlite_reader = create_sqlite_engine(SQLALCHEMY_DATABASE_URL)
+    engine = sqlite_reader.execution_options(sqlite_begin="IMMEDIATE")
+    replica_engines = [sqlite_reader]
+    replicas_synchronous = True
+    stickiness_window = 0
 else:
     SQLALCHEMY_DATABASE_URL = (
         f"mysql+pymysql://{settings.DB_USER}:{settings.DB_PASSWORD}"
         f"@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
     )
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL,
-        pool_pre_ping=True,
-        pool_recycle=3600,
-    )
+    engine = _create_server_engine(SQLALCHEMY_DATABASE_URL)
+    replica_engines = [
+        _create_server_engine(url.strip())
+        for url in settings.DB_REPLICA_URLS.split(",") if url.strip()
+    ]
+
+replica_set = ReplicaSet(
+    replica_engines,
+    check_interval=settings.DB_REPLICA_HEALTH_CHECK_INTERVAL,
+    synchronous=replicas_synchronous,
+) if replica_engines else None
+primary_stickiness = PrimaryStickiness(stickiness_window) if stickiness_window > 0 else None
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    replicas=replica_set,
+    stickiness=primary_stickiness,
+)
 
 Base = declarative_base()
 
 
-def get_db():
+def get_db(request: Request):
     db = SessionLocal()
+    if db.stickiness is not None:
+        # 客户端带回的写后粘滞令牌可能由其他进程签发（见 PrimaryStickiness）
+        db.info["sticky_token"] = request.cookies.get(PRIMARY_STICKY_COOKIE)
+        db.info["request_state"] = request.state
     try:
         yield db
     finally:
@@ -1,14 +1,24 @@
+import json
 import logging
+import math
+import time
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from anyio import to_thread
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
-from app.database import engine, Base
+from app.database import PRIMARY_STICKY_COOKIE, engine, replica_set
+from app.migrations import check_schema_version
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.password_hasher import password_hasher
+from app.utils.rental_sweeper import sweep_overdue_rentals
+from app.utils.scheduler import scheduler
+from app.utils.request_metrics import RequestMetrics, bind_metrics, unbind_metrics
 from app.routers import (
     auth_router, users_router, activities_router,
-    boats_router, finances_router, notices_router, forum_router, stats_router
+    boats_router, finances_router, notices_router, notifications_router, forum_router, stats_router
 )
 
 # 配置日志
@@ -21,10 +31,24 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # 启动时创建数据库表
-    Base.metadata.create_all(bind=engine)
+    # 同步端点在线程池中执行，按配置调整每个 worker 的并发上限
+    to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+    # 启动时只核对结构版本（一条查询），建表和迁移由 init_db.py 完成
+    if settings.SCHEMA_CHECK_ON_STARTUP:
+        check_schema_version(engine)
+    if replica_set is not None:
+        replica_set.start()
+    if settings.SCHEDULER_ENABLED:
+        scheduler.start()
     yield
     # 关闭时清理
+    scheduler.stop()
+    if replica_set is not None:
+        replica_set.stop()
+    password_hasher.shutdown()
+
+
+scheduler.add_job("overdue_rentals", settings.OVERDUE_SWEEP_INTERVAL_SECONDS, sweep_overdue_rentals)
 
 
 app = FastAPI(
@@ -49,8 +73,48 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    """记录请求的 SQL 语句数、数据库/认证/序列化耗时，写入 Server-Timing 响应头"""
+    metrics = RequestMetrics()
+    token = bind_metrics(metrics)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        unbind_metrics(token)
+    total = time.perf_counter() - start
+    response.headers["Server-Timing"] = metrics.server_timing(total)
+    if total * 1000 >= settings.SLOW_REQUEST_THRESHOLD_MS:
+        logger.warning(json.dumps({
+            "event": "slow_request",
+            "method": request.method,
+            "path": request.url.path,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 2),
+            **metrics.as_dict(),
+        }))
+    return response
+
+
+@app.middleware("http")
+async def primary_sticky_cookie(request: Request, call_next):
+    """写入后把主库粘滞令牌交给客户端，之后落在其他 worker 进程的读请求也能读到自己的写入"""
+    response = await call_next(request)
+    token = getattr(request.state, "primary_sticky_token", None)
+    if token is not None:
+        response.set_cookie(
+            PRIMARY_STICKY_COOKIE, token,
+            max_age=max(1, math.ceil(settings.DB_STICKY_PRIMARY_SECONDS)),
+            httponly=True, samesite="lax",
+        )
+    return response
+
+
 # 注册路由
 app.include_router(auth_router, prefix="/api")
 app.include_router(users_router, prefix="/api")
@@ -58,6 +122,7 @@ app.include_router(activities_router, prefix="/api")
 app.include_router(boats_router, prefix="/api")
 app.include_router(finances_router, prefix="/api")
 app.include_router(notices_router, prefix="/api")
+app.include_router(notifications_router, prefix="/api")
 app.include_router(forum_router, prefix="/api")
 app.include_router(stats_router, prefix="/api")
 
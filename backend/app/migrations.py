@@ -0,0 +1,205 @@
+"""
+数据库结构版本管理
+
+服务启动时只执行一条查询核对 schema_version，不做任何 DDL；
+建表和结构变更统一由 init_db.py 调用 migrate() 完成。
+"""
+import logging
+
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.exc import DBAPIError
+
+from app.database import Base
+from app.models.schema_version import SchemaVersion
+
+logger = logging.getLogger(__name__)
+
+# 代码期望的结构版本，新增迁移步骤时同步递增
+SCHEMA_VERSION = 13
+
+
+def _add_activity_signup_count(conn):
+    conn.execute(text("ALTER TABLE activities ADD COLUMN signup_count INTEGER NOT NULL DEFAULT 0"))
+    conn.execute(text(
+        "UPDATE activities SET signup_count = "
+        "(SELECT COUNT(*) FROM activity_signups WHERE activity_signups.activity_id = activities.id)"
+    ))
+
+
+def _create_indexes(conn, *names):
+    """按名称创建模型中已声明、旧库中缺失的索引"""
+    indexes = {index.name: index for table in Base.metadata.tables.values() for index in table.indexes}
+    for name in names:
+        indexes[name].create(conn, checkfirst=True)
+
+
+def _add_pagination_indexes(conn):
+    _create_indexes(
+        conn,
+        "ix_activities_start_time",
+        "ix_posts_created_at",
+        "ix_finances_user_id_created_at",
+        "ix_finances_created_at",
+    )
+
+
+def _add_calendar_index(conn):
+    _create_indexes(conn, "ix_activities_start_time_end_time")
+
+
+def _add_columns(conn, table: str, *definitions):
+    """逐列添加缺失的列（SQLite 的 ALTER TABLE 每次只能加一列）"""
+    existing = {column["name"] for column in inspect(conn).get_columns(table)}
+    for definition in definitions:
+        if definition.split()[0] not in existing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {definition}"))
+
+
+def _add_ballot_columns(conn):
+    _add_columns(
+        conn, "activities",
+        "allocation_mode VARCHAR(20) NOT NULL DEFAULT 'fcfs'",
+        "ballot_drawn_at DATETIME",
+        "ballot_seed BIGINT",
+    )
+    # 已有报名均视为已录取
+    _add_columns(
+        conn, "activity_signups",
+        "status VARCHAR(20) NOT NULL DEFAULT 'confirmed'",
+        "waitlist_position INTEGER",
+    )
+
+
+def _add_waitlist(conn):
+    # notifications 表由 create_all 创建
+    _add_columns(conn, "activities", "waitlist_tail INTEGER NOT NULL DEFAULT 0")
+    conn.execute(text(
+        "UPDATE activities SET waitlist_tail = COALESCE((SELECT MAX(waitlist_position) FROM activity_signups "
+        "WHERE activity_signups.activity_id = activities.id), 0)"
+    ))
+    _create_indexes(conn, "ix_activity_signups_waitlist")
+
+
+def _add_feed_indexes(conn):
+    _create_indexes(conn, "ix_activities_updated_at")
+    # init_database.sql 建的 MySQL 库已有同列的 idx_user_id，不再重复建索引
+    existing = [index["column_names"] for index in inspect(conn).get_indexes("activity_signups")]
+    if ["user_id"] not in existing:
+        _create_indexes(conn, "ix_activity_signups_user_id")
+
+
+def _add_boat_reservations(conn):
+    Base.metadata.tables["boat_reservations"].create(conn, checkfirst=True)
+
+
+def _add_rental_time_index(conn):
+    _create_indexes(conn, "ix_boats_rentals_rental_time")
+
+
+def _add_boat_version(conn):
+    _add_columns(conn, "boats", "version INTEGER NOT NULL DEFAULT 0")
+
+
+def _add_job_leases(conn):
+    Base.metadata.tables["job_leases"].create(conn, checkfirst=True)
+    _create_indexes(conn, "ix_boats_rentals_status_rental_time")
+
+
+def _add_hot_query_indexes(conn):
+    """补上引入版本管理之后才在模型中声明、此前没有迁移步骤的热点查询索引和报名唯一约束"""
+    _create_indexes(
+        conn,
+        "ix_finances_type_created_at",
+        "ix_boats_rentals_user_id_status",
+        "ix_posts_tag_id_created_at",
+        "ix_comments_post_id_created_at",
+        "ix_notices_created_at",
+    )
+    inspector = inspect(conn)
+    unique_columns = [index["column_names"] for index in inspector.get_indexes("activity_signups")
+                      if index["unique"]]
+    unique_columns += [constraint["column_names"]
+                       for constraint in inspector.get_unique_constraints("activity_signups")]
+    if ["activity_id", "user_id"] in unique_columns:
+        return
+    # 建唯一索引前删除重复报名（保留最早的一条），并按录取记录重算报名人数
+    conn.execute(text(
+        "DELETE FROM activity_signups WHERE id NOT IN (SELECT id FROM "
+        "(SELECT MIN(id) AS id FROM activity_signups GROUP BY activity_id, user_id) AS kept)"
+    ))
+    conn.execute(text(
+        "UPDATE activities SET signup_count = (SELECT COUNT(*) FROM activity_signups "
+        "WHERE activity_signups.activity_id = activities.id AND activity_signups.status = 'confirmed')"
+    ))
+    # 不能用 Index(...) 构造：会把索引挂到全局 metadata 的表上
+    conn.execute(text("CREATE UNIQUE INDEX unique_signup ON activity_signups (activity_id, user_id)"))
+
+
+def _add_return_time_index(conn):
+    _create_indexes(conn, "ix_boats_rentals_return_time")
+
+
+# 版本号 -> 升级函数（参数为连接），用于已有数据库的增量升级；
+# 全新数据库直接按当前模型建表并记为最新版本
+MIGRATIONS = {
+    2: _add_activity_signup_count,
+    3: _add_pagination_indexes,
+    4: _add_calendar_index,
+    5: _add_ballot_columns,
+    6: _add_waitlist,
+    7: _add_feed_indexes,
+    8: _add_boat_reservations,
+    9: _add_rental_time_index,
+    10: _add_boat_version,
+    11: _add_job_leases,
+    12: _add_hot_query_indexes,
+    13: _add_return_time_index,
+}
+
+
+class SchemaVersionError(RuntimeError):
+    """数据库结构版本与代码不一致"""
+
+
+def get_schema_version(bind):
+    """返回数据库当前结构版本；schema_version 表不存在时返回 None"""
+    try:
+        with bind.connect() as conn:
+            return conn.execute(select(func.max(SchemaVersion.version))).scalar()
+    except DBAPIError:
+        return None
+
+
+def check_schema_version(bind):
+    """启动检查：数据库版本低于代码版本时拒绝启动"""
+    current = get_schema_version(bind)
+    if current is None or current < SCHEMA_VERSION:
+        raise SchemaVersionError(
+            f"数据库结构版本为 {current}，当前代码需要 {SCHEMA_VERSION}，请先运行 python init_db.py"
+        )
+    if current > SCHEMA_VERSION:
+        logger.warning(f"数据库结构版本 {current} 高于代码版本 {SCHEMA_VERSION}，可能正在滚动发布")
+    return current
+
+
+def migrate(bind):
+    """建表并把数据库升级到 SCHEMA_VERSION，返回升级后的版本"""
+    import app.models  # noqa: F401  注册所有模型
+
+    is_new = not inspect(bind).has_table("users")
+    with bind.begin() as conn:
+        # 只会创建缺失的表，已有表的结构变更由 MIGRATIONS 负责
+        Base.metadata.create_all(bind=conn)
+        current = conn.execute(select(func.max(SchemaVersion.version))).scalar()
+        if current is None:
+            # 全新数据库按当前模型建表，直接记为最新版本；
+            # 没有版本记录的旧库视为版本 1（引入版本管理前的结构）
+            current = SCHEMA_VERSION if is_new else 1
+            conn.execute(SchemaVersion.__table__.insert().values(version=current))
+        for version in sorted(MIGRATIONS):
+            if current < version <= SCHEMA_VERSION:
+                logger.info(f"应用数据库迁移 {version}")
+                MIGRATIONS[version](conn)
+                conn.execute(SchemaVersion.__table__.insert().values(version=version))
+                current = version
+    return current
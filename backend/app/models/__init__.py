@@ -1,8 +1,11 @@
 from app.models.user import User, UserRole  # noqa: F401
-from app.models.activity import Activity  # noqa: F401
-from app.models.boat import Boat, BoatRental, BoatStatus  # noqa: F401
+from app.models.activity import Activity, AllocationMode  # noqa: F401
+from app.models.boat import Boat, BoatRental, BoatReservation, BoatStatus, ReservationStatus  # noqa: F401
 from app.models.finance import Finance, FinanceType  # noqa: F401
 from app.models.notice import Notice  # noqa: F401
+from app.models.notification import Notification  # noqa: F401
 from app.models.forum import Post, Comment, Tag  # noqa: F401
-from app.models.signup import ActivitySignup  # noqa: F401
+from app.models.signup import ActivitySignup, SignupStatus  # noqa: F401
+from app.models.schema_version import SchemaVersion  # noqa: F401
+from app.models.job_lease import JobLease  # noqa: F401
 from app.database import Base  # noqa: F401
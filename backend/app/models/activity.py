@@ -1,11 +1,24 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
+import enum
+
+
+class AllocationMode(str, enum.Enum):
+    FCFS = "fcfs"      # 先到先得
+    BALLOT = "ballot"  # 报名期内只登记，截止后统一抽签
 
 
 class Activity(Base):
     __tablename__ = "activities"
+    __table_args__ = (
+        Index("ix_activities_start_time", "start_time"),
+        # 日历按时间窗口查询重叠活动：start_time 范围扫描，end_time 在索引内过滤
+        Index("ix_activities_start_time_end_time", "start_time", "end_time"),
+        # 日历订阅源的 ETag / Last-Modified 取 max(updated_at)，只读索引
+        Index("ix_activities_updated_at", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(100), nullable=False)
@@ -14,6 +27,15 @@ class Activity(Base):
     start_time = Column(DateTime(timezone=True), nullable=False)
     end_time = Column(DateTime(timezone=True), nullable=False)
     max_participants = Column(Integer, default=0)
+    # 冗余的报名人数，由报名/取消报名以条件原子更新维护，避免每次报名 COUNT(*)
+    signup_count = Column(Integer, nullable=False, default=0, server_default="0")
+    allocation_mode = Column(String(20), nullable=False, default=AllocationMode.FCFS.value,
+                             server_default=AllocationMode.FCFS.value)
+    # 抽签时间（之后不再接受报名）和随机种子（同样的报名记录和种子可复现抽签结果）
+    ballot_drawn_at = Column(DateTime(timezone=True))
+    ballot_seed = Column(BigInteger)
+    # 最后发放的候补序号，条件原子自增，保证并发排队的序号不重复
+    waitlist_tail = Column(Integer, nullable=False, default=0, server_default="0")
     creator_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, Text, DECIMAL, ForeignKey
+from sqlalchemy import Column, Integer, DateTime, Text, DECIMAL, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from sqlalchemy.types import TypeDecorator, String
@@ -19,6 +19,8 @@ class CaseInsensitiveEnum(TypeDecorator):
 
     def __init__(self, enum_class, **kwargs):
         self.enum_class = enum_class
+        # 小写值 -> 成员，读取每行时查一次字典，不再逐个比较枚举成员
+        self._members = {member.value.lower(): member for member in enum_class}
         super().__init__(**kwargs)
 
     def load_dialect_impl(self, dialect):
@@ -32,13 +34,8 @@ class CaseInsensitiveEnum(TypeDecorator):
     def process_result_value(self, value, dialect):
         if value is None:
             return None
-        # 大小写不敏感处理
-        value_lower = value.lower()
-        for member in self.enum_class:
-            if member.value.lower() == value_lower:
-                return member
-        # 如果找不到匹配的枚举值，返回默认值
-        return self.enum_class.AVAILABLE
+        # 大小写不敏感处理，找不到匹配的枚举值时返回默认值
+        return self._members.get(value.lower(), self.enum_class.AVAILABLE)
 
     def __repr__(self):
         return f"CaseInsensitiveEnum({self.enum_class.__name__})"
@@ -56,12 +53,23 @@ class Boat(Base):
     description = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # 乐观并发版本号：租借、还船、修改和新增预约时递增，租船按版本号做比较并更新
+    version = Column(Integer, nullable=False, default=0, server_default="0")
 
     rentals = relationship("BoatRental", back_populates="boat")
 
 
 class BoatRental(Base):
     __tablename__ = "boats_rentals"
+    __table_args__ = (
+        Index("ix_boats_rentals_user_id_status", "user_id", "status"),
+        # 利用率分析按 rental_time 顺序扫描，覆盖索引无需回表
+        Index("ix_boats_rentals_rental_time", "rental_time", "boat_id", "return_time"),
+        # 利用率分析取窗口开始时仍在租的记录（return_time 晚于窗口开始或为空）
+        Index("ix_boats_rentals_return_time", "return_time", "rental_time", "boat_id"),
+        # 逾期租借清理按状态和租借时间范围扫描
+        Index("ix_boats_rentals_status_rental_time", "status", "rental_time"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     boat_id = Column(Integer, ForeignKey("boats.id"))
@@ -72,3 +80,32 @@ class BoatRental(Base):
 
     boat = relationship("Boat", back_populates="rentals")
     user = relationship("User")
+
+
+class ReservationStatus(str, enum.Enum):
+    ACTIVE = "active"
+    CANCELLED = "cancelled"
+
+
+class BoatReservation(Base):
+    """提前预约的船只时段 [start_time, end_time)，同一船只的有效预约互不重叠"""
+    __tablename__ = "boat_reservations"
+    __table_args__ = (
+        # 冲突检查：取同一船只 start_time < 新 end_time 的最后一条有效预约，一次索引定位
+        Index("ix_boat_reservations_boat_id_status_start_time", "boat_id", "status", "start_time"),
+        # 可用时段表：按时间窗口范围扫描所有船只的有效预约
+        Index("ix_boat_reservations_status_start_time", "status", "start_time", "end_time"),
+        Index("ix_boat_reservations_user_id_start_time", "user_id", "start_time"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    boat_id = Column(Integer, ForeignKey("boats.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    start_time = Column(DateTime(timezone=True), nullable=False)
+    end_time = Column(DateTime(timezone=True), nullable=False)
+    status = Column(String(20), nullable=False, default=ReservationStatus.ACTIVE.value,
+                    server_default=ReservationStatus.ACTIVE.value)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    boat = relationship("Boat")
+    user = relationship("User")
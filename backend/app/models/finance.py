@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, Text, Enum, DECIMAL, ForeignKey
+from sqlalchemy import Column, Integer, DateTime, Text, Enum, DECIMAL, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -12,6 +12,11 @@ class FinanceType(str, enum.Enum):
 
 class Finance(Base):
     __tablename__ = "finances"
+    __table_args__ = (
+        Index("ix_finances_type_created_at", "type", "created_at"),
+        Index("ix_finances_user_id_created_at", "user_id", "created_at"),
+        Index("ix_finances_created_at", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, DateTime
+from app.database import Base
+
+
+class JobLease(Base):
+    """后台任务租约：多 worker 部署时，同一任务只由持有未过期租约的进程执行"""
+    __tablename__ = "job_leases"
+
+    name = Column(String(100), primary_key=True)
+    owner = Column(String(100), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    last_run_at = Column(DateTime(timezone=True))
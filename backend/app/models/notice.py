@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -6,6 +6,9 @@ from app.database import Base
 
 class Notice(Base):
     __tablename__ = "notices"
+    __table_args__ = (
+        Index("ix_notices_created_at", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(100), nullable=False)
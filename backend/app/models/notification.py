@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class Notification(Base):
+    """发给单个用户的站内通知（公告见 Notice）"""
+    __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_user_id_created_at", "user_id", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    title = Column(String(100), nullable=False)
+    content = Column(Text, nullable=False)
+    is_read = Column(Boolean, nullable=False, default=False, server_default="0")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
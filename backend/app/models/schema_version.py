@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class SchemaVersion(Base):
+    """已应用的数据库结构版本，每次迁移插入一行"""
+    __tablename__ = "schema_version"
+
+    version = Column(Integer, primary_key=True)
+    applied_at = Column(DateTime(timezone=True), server_default=func.now())
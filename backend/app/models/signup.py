@@ -1,17 +1,34 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, UniqueConstraint, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
+import enum
+
+
+class SignupStatus(str, enum.Enum):
+    CONFIRMED = "confirmed"    # 已录取，计入 signup_count
+    PENDING = "pending"        # 抽签活动报名后等待抽签
+    WAITLISTED = "waitlisted"  # 未抽中，按 waitlist_position 候补
 
 
 class ActivitySignup(Base):
     __tablename__ = "activity_signups"
+    __table_args__ = (
+        UniqueConstraint("activity_id", "user_id", name="unique_signup"),
+        # 取消报名时按序号取候补队首
+        Index("ix_activity_signups_waitlist", "activity_id", "status", "waitlist_position"),
+        # 按用户查询报名（我的报名、个人日历订阅源）
+        Index("ix_activity_signups_user_id", "user_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     activity_id = Column(Integer, ForeignKey("activities.id"))
     user_id = Column(Integer, ForeignKey("users.id"))
     signup_time = Column(DateTime(timezone=True), server_default=func.now())
     check_in = Column(Boolean, default=False)
+    status = Column(String(20), nullable=False, default=SignupStatus.CONFIRMED.value,
+                    server_default=SignupStatus.CONFIRMED.value)
+    waitlist_position = Column(Integer)
 
     activity = relationship("Activity", back_populates="signups")
     user = relationship("User", back_populates="signups")
@@ -4,5 +4,6 @@ from app.routers.activities import router as activities_router  # noqa: F401
 from app.routers.boats import router as boats_router  # noqa: F401
 from app.routers.finances import router as finances_router  # noqa: F401
 from app.routers.notices import router as notices_router  # noqa: F401
+from app.routers.notifications import router as notifications_router  # noqa: F401
 from app.routers.forum import router as forum_router  # noqa: F401
 from app.routers.stats import router as stats_router  # noqa: F401
@@ -1,44 +1,202 @@
 import logging
-from typing import List
+from datetime import datetime, timedelta
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, case, func, insert, literal, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, selectinload
 
+from app.config import settings
 from app.database import get_db
-from app.models.activity import Activity
-from app.models.signup import ActivitySignup
+from app.models.activity import Activity, AllocationMode
+from app.models.notification import Notification
+from app.models.signup import ActivitySignup, SignupStatus
 from app.models.user import User, UserRole
-from app.routers.deps import get_current_user
+from app.routers.deps import get_current_user, get_read_db
 from app.schemas.activity import (
     ActivityCreate, ActivityResponse, ActivityUpdate,
-    ActivitySignupCreate, ActivitySignupResponse
+    ActivitySignupCreate, ActivitySignupResponse, ScheduleItemResponse,
+    BatchCheckIn, BatchCheckInResponse, BatchCheckInResult, CheckInTokenResponse,
+    BallotDraw, BallotDrawResponse, FeedTokenResponse
 )
+from app.utils import ballot, ical, timeslots
+from app.utils.pagination import paginate
+from app.utils.security import create_signed_token, decode_signed_token
+from app.utils.request_metrics import TimedRoute
+from app.utils.streaming import ndjson_response, wants_ndjson
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/activities", tags=["activities"])
+router = APIRouter(prefix="/activities", tags=["activities"], route_class=TimedRoute)
+
+
+def _activity_options(include: Optional[str]):
+    """include=signups 时用一次 selectinload 批量加载报名列表，否则不加载"""
+    options = [joinedload(Activity.creator)]
+    if include and "signups" in include.split(","):
+        options.append(selectinload(Activity.signups))
+    return options
 
 
 @router.get("", response_model=List[ActivityResponse])
 def get_activities(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    include: Optional[str] = None,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    activities = db.query(Activity).options(
-        joinedload(Activity.creator)
-    ).order_by(Activity.start_time.desc()).offset(skip).limit(limit).all()
+    query = db.query(Activity).options(*_activity_options(include))
+    activities = paginate(query, response, [Activity.start_time, Activity.id], cursor, skip, limit)
     return activities
 
 
+CALENDAR_MAX_DAYS = 366
+
+
+def _overlapping(query, window_start: datetime, window_end: datetime):
+    """与 [window_start, window_end) 重叠的活动：start_time 走索引范围，end_time 在索引内过滤"""
+    # 库中为 UTC 无时区时间，带时区的参数先换算
+    window_start, window_end = timeslots.to_naive_utc(window_start), timeslots.to_naive_utc(window_end)
+    if window_end <= window_start:
+        raise HTTPException(status_code=400, detail="结束时间必须晚于开始时间")
+    if window_end - window_start > timedelta(days=CALENDAR_MAX_DAYS):
+        raise HTTPException(status_code=400, detail=f"时间范围不能超过 {CALENDAR_MAX_DAYS} 天")
+    return query.filter(
+        Activity.start_time < window_end,
+        Activity.end_time > window_start
+    ).order_by(Activity.start_time, Activity.end_time, Activity.id)
+
+
+# /calendar 必须在 /{activity_id} 之前定义，避免路径冲突
+@router.get("/calendar", response_model=List[ActivityResponse])
+def get_calendar(
+    window_start: datetime = Query(..., alias="from"),
+    window_end: datetime = Query(..., alias="to"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    query = db.query(Activity).options(joinedload(Activity.creator))
+    return _overlapping(query, window_start, window_end).all()
+
+
+@router.get("/my/calendar", response_model=List[ScheduleItemResponse])
+def get_my_calendar(
+    window_start: datetime = Query(..., alias="from"),
+    window_end: datetime = Query(..., alias="to"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    # 同一条查询中连接当前用户的报名记录
+    query = db.query(Activity, ActivitySignup).join(
+        ActivitySignup,
+        and_(ActivitySignup.activity_id == Activity.id, ActivitySignup.user_id == current_user.id)
+    ).options(joinedload(Activity.creator))
+    rows = _overlapping(query, window_start, window_end).all()
+    return [{"activity": activity, "signup": signup} for activity, signup in rows]
+
+
+CALENDAR_FEED_PURPOSE = "calendar_feed"
+# 订阅源只需要这些列，不加载 ORM 对象
+_FEED_COLUMNS = (Activity.id, Activity.title, Activity.description, Activity.location,
+                 Activity.start_time, Activity.end_time, Activity.created_at, Activity.updated_at)
+
+
+@router.get("/feed-token", response_model=FeedTokenResponse)
+def get_feed_token(request: Request, current_user: User = Depends(get_current_user)):
+    # 日历应用无法携带 Authorization 头，订阅链接中带签名令牌，验证无需查询数据库
+    expires = timedelta(days=settings.CALENDAR_FEED_TOKEN_EXPIRE_DAYS)
+    token = create_signed_token(CALENDAR_FEED_PURPOSE, {"user_id": current_user.id}, expires)
+    return FeedTokenResponse(
+        token=token,
+        expires_in=int(expires.total_seconds()),
+        club_feed_url=str(request.url_for("get_club_feed").include_query_params(token=token)),
+        my_feed_url=str(request.url_for("get_my_feed").include_query_params(token=token)),
+    )
+
+
+def _feed_user_id(token: str) -> int:
+    payload = decode_signed_token(token, CALENDAR_FEED_PURPOSE)
+    if payload is None or "user_id" not in payload:
+        raise HTTPException(status_code=401, detail="无效的订阅链接")
+    return payload["user_id"]
+
+
+def _feed_window_start() -> datetime:
+    # 按天取整，同一天内的请求窗口相同，ETag 才能稳定
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=settings.CALENDAR_FEED_PAST_DAYS)
+
+
+def _feed_response(db: Session, name: str, events, etag: str, last_modified):
+    """行已取完，事件在输出时逐个渲染；查询落在副本上时先归还连接，不在写出响应期间占用"""
+    if db.info.get("replica") is not None:
+        db.rollback()
+    return StreamingResponse(
+        ical.stream_calendar(name, events),
+        media_type=ical.MEDIA_TYPE,
+        headers=ical.validator_headers(etag, last_modified),
+    )
+
+
+@router.get("/feed.ics", name="get_club_feed")
+def get_club_feed(request: Request, token: str, db: Session = Depends(get_read_db)):
+    _feed_user_id(token)
+    window_start = _feed_window_start()
+    # 校验值只用聚合查询：max(updated_at) 和 max(id) 各走一次索引，COUNT 扫描索引
+    last_modified, count, max_id = db.query(
+        func.max(Activity.updated_at), func.count(Activity.id), func.max(Activity.id)
+    ).one()
+    etag = ical.make_etag("club", last_modified, count, max_id, window_start.date())
+    cached = ical.not_modified(request, etag, last_modified)
+    if cached is not None:
+        return cached
+
+    rows = db.query(*_FEED_COLUMNS).filter(
+        Activity.start_time >= window_start
+    ).order_by(Activity.start_time, Activity.id).all()
+    return _feed_response(db, "帆船协会活动", (ical.render_event(row) for row in rows),
+                          etag, last_modified)
+
+
+@router.get("/my/feed.ics", name="get_my_feed")
+def get_my_feed(request: Request, token: str, db: Session = Depends(get_read_db)):
+    user_id = _feed_user_id(token)
+    window_start = _feed_window_start()
+    # 报名记录没有 updated_at：用报名数、最大报名 ID 和已录取数反映报名、取消和转正
+    last_modified, count, max_id, confirmed = db.query(
+        func.max(Activity.updated_at), func.count(ActivitySignup.id), func.max(ActivitySignup.id),
+        func.sum(case((ActivitySignup.status == SignupStatus.CONFIRMED.value, 1), else_=0))
+    ).join(Activity, Activity.id == ActivitySignup.activity_id).filter(
+        ActivitySignup.user_id == user_id
+    ).one()
+    etag = ical.make_etag("user", user_id, last_modified, count, max_id, confirmed, window_start.date())
+    cached = ical.not_modified(request, etag, last_modified)
+    if cached is not None:
+        return cached
+
+    rows = db.query(*_FEED_COLUMNS, ActivitySignup.status).join(
+        ActivitySignup,
+        and_(ActivitySignup.activity_id == Activity.id, ActivitySignup.user_id == user_id)
+    ).filter(Activity.start_time >= window_start).order_by(Activity.start_time, Activity.id).all()
+    return _feed_response(db, "我的帆船活动", (ical.render_event(row, row.status) for row in rows),
+                          etag, last_modified)
+
+
 @router.get("/{activity_id}", response_model=ActivityResponse)
 def get_activity(
     activity_id: int,
-    db: Session = Depends(get_db),
+    include: Optional[str] = None,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    activity = db.query(Activity).filter(Activity.id == activity_id).first()
+    activity = db.query(Activity).options(
+        *_activity_options(include)
+    ).filter(Activity.id == activity_id).first()
     if not activity:
         raise HTTPException(status_code=404, detail="活动不存在")
     return activity
@@ -54,7 +212,11 @@ def create_activity(
     if activity_data.end_time <= activity_data.start_time:
         raise HTTPException(status_code=400, detail="结束时间必须晚于开始时间")
 
-    new_activity = Activity(**activity_data.model_dump(), creator_id=current_user.id)
+    new_activity = Activity(
+        **activity_data.model_dump(exclude={"allocation_mode"}),
+        allocation_mode=activity_data.allocation_mode.value,
+        creator_id=current_user.id
+    )
     db.add(new_activity)
     try:
         db.commit()
@@ -122,31 +284,55 @@ def signup_activity(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    # 使用行级锁防止并发报名超员
-    activity = db.query(Activity).filter(
-        Activity.id == signup_data.activity_id
-    ).with_for_update().first()
-    if not activity:
+    # 一次查询取出活动的分配方式和当前用户的报名记录（并发重复报名由唯一约束兜底）
+    row = db.query(Activity.allocation_mode, Activity.ballot_drawn_at, ActivitySignup.id).outerjoin(
+        ActivitySignup,
+        and_(ActivitySignup.activity_id == Activity.id, ActivitySignup.user_id == current_user.id)
+    ).filter(Activity.id == signup_data.activity_id).first()
+    if not row:
         raise HTTPException(status_code=404, detail="活动不存在")
-
-    # 检查是否已报名
-    existing_signup = db.query(ActivitySignup).filter(
-        ActivitySignup.activity_id == signup_data.activity_id,
-        ActivitySignup.user_id == current_user.id
-    ).first()
-    if existing_signup:
+    allocation_mode, ballot_drawn_at, existing_signup_id = row
+    if existing_signup_id:
         raise HTTPException(status_code=400, detail="已报名此活动")
 
-    # 检查人数限制（已在事务中加锁）
-    signup_count = db.query(ActivitySignup).filter(ActivitySignup.activity_id == signup_data.activity_id).count()
-    if activity.max_participants > 0 and signup_count >= activity.max_participants:
-        raise HTTPException(status_code=400, detail="活动人数已满")
-
-    signup = ActivitySignup(activity_id=signup_data.activity_id, user_id=current_user.id)
+    if allocation_mode == AllocationMode.BALLOT:
+        if ballot_drawn_at is not None:
+            raise HTTPException(status_code=400, detail="抽签已结束")
+        return _enter_ballot(signup_data.activity_id, db, current_user)
+
+    # 条件原子自增占用名额，不再先锁行再 COUNT(*)；行锁只持有到本事务提交
+    admitted = db.execute(
+        update(Activity)
+        .where(
+            Activity.id == signup_data.activity_id,
+            or_(
+                Activity.max_participants.is_(None),
+                Activity.max_participants <= 0,
+                Activity.signup_count < Activity.max_participants,
+            ),
+        )
+        .values(signup_count=Activity.signup_count + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if admitted:
+        signup = ActivitySignup(activity_id=signup_data.activity_id, user_id=current_user.id)
+    else:
+        # 名额已满时排入候补队列，有人取消时自动转正，客户端不必轮询重试
+        position = _next_waitlist_position(db, signup_data.activity_id)
+        if position is None:
+            db.rollback()
+            raise HTTPException(status_code=404, detail="活动不存在")
+        signup = ActivitySignup(
+            activity_id=signup_data.activity_id, user_id=current_user.id,
+            status=SignupStatus.WAITLISTED.value, waitlist_position=position
+        )
     db.add(signup)
     try:
         db.commit()
         db.refresh(signup)
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="已报名此活动")
     except Exception as e:
         db.rollback()
         logger.error(f"创建报名记录失败: {str(e)}")
@@ -154,6 +340,83 @@ def signup_activity(
     return signup
 
 
+def _next_waitlist_position(db: Session, activity_id: int) -> Optional[int]:
+    """原子递增活动的候补序号并返回新序号（在本事务内读到自己的更新）"""
+    db.execute(
+        update(Activity)
+        .where(Activity.id == activity_id)
+        .values(waitlist_tail=Activity.waitlist_tail + 1)
+        .execution_options(synchronize_session=False)
+    )
+    return db.query(Activity.waitlist_tail).filter(Activity.id == activity_id).scalar()
+
+
+def _promote_from_waitlist(db: Session, activity: Activity) -> Optional[int]:
+    """把候补队首转为已录取并通知本人，与释放名额在同一事务内完成；返回转正的用户 id
+
+    先锁活动行，与排入候补（递增 waitlist_tail）串行，再加锁读取队首：快照读会漏掉
+    读快照之后提交的候补，名额被释放而候补仍在排队。
+    以条件更新转正：并发取消取到同一个队首时只有一个成功，另一个跳过它继续取下一位。
+    """
+    db.query(Activity.id).filter(Activity.id == activity.id).with_for_update().first()
+    skipped = []
+    while True:
+        head = db.query(ActivitySignup.id, ActivitySignup.user_id).filter(
+            ActivitySignup.activity_id == activity.id,
+            ActivitySignup.status == SignupStatus.WAITLISTED.value,
+            ActivitySignup.id.notin_(skipped)
+        ).order_by(ActivitySignup.waitlist_position, ActivitySignup.id).with_for_update().first()
+        if head is None:
+            return None
+        promoted = db.execute(
+            update(ActivitySignup)
+            .where(ActivitySignup.id == head.id, ActivitySignup.status == SignupStatus.WAITLISTED.value)
+            .values(status=SignupStatus.CONFIRMED.value, waitlist_position=None)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if promoted:
+            break
+        skipped.append(head.id)
+
+    db.add(Notification(
+        user_id=head.user_id,
+        title="候补转正",
+        content=f"有人取消报名，你已从候补转为正式报名：{activity.title}"
+    ))
+    return head.user_id
+
+
+def _enter_ballot(activity_id: int, db: Session, current_user: User) -> ActivitySignup:
+    """抽签活动报名期内只登记，不检查名额也不锁活动行
+
+    INSERT ... SELECT 以「尚未抽签」为条件，与抽签并发时不会留下漏抽的报名。
+    """
+    entry = select(
+        literal(activity_id), literal(current_user.id), literal(SignupStatus.PENDING.value)
+    ).where(Activity.id == activity_id, Activity.ballot_drawn_at.is_(None))
+    try:
+        inserted = db.execute(
+            insert(ActivitySignup).from_select(["activity_id", "user_id", "status"], entry)
+        ).rowcount
+        if not inserted:
+            db.rollback()
+            raise HTTPException(status_code=400, detail="抽签已结束")
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="已报名此活动")
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.error(f"登记抽签报名失败: {str(e)}")
+        raise HTTPException(status_code=500, detail="操作失败")
+    return db.query(ActivitySignup).filter(
+        ActivitySignup.activity_id == activity_id,
+        ActivitySignup.user_id == current_user.id
+    ).one()
+
+
 @router.post("/{activity_id}/checkin", response_model=ActivitySignupResponse)
 def checkin_activity(
     activity_id: int,
@@ -167,6 +430,8 @@ def checkin_activity(
 
     if not signup:
         raise HTTPException(status_code=404, detail="未找到报名记录")
+    if signup.status != SignupStatus.CONFIRMED:
+        raise HTTPException(status_code=400, detail="报名尚未确认")
 
     signup.check_in = True
     try:
@@ -178,16 +443,188 @@ def checkin_activity(
     return signup
 
 
+CHECKIN_TOKEN_PURPOSE = "checkin"
+
+
+@router.get("/{activity_id}/checkin-token", response_model=CheckInTokenResponse)
+def get_checkin_token(
+    activity_id: int,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    # 签到码只签发给已录取的用户，码内带活动和用户，扫码时凭签名即可验证
+    signup = db.query(ActivitySignup.status).filter(
+        ActivitySignup.activity_id == activity_id,
+        ActivitySignup.user_id == current_user.id
+    ).first()
+    if not signup:
+        raise HTTPException(status_code=404, detail="未找到报名记录")
+    if signup.status != SignupStatus.CONFIRMED:
+        raise HTTPException(status_code=400, detail="报名尚未确认")
+
+    expires = timedelta(hours=settings.CHECKIN_TOKEN_EXPIRE_HOURS)
+    token = create_signed_token(
+        CHECKIN_TOKEN_PURPOSE, {"activity_id": activity_id, "user_id": current_user.id}, expires
+    )
+    return CheckInTokenResponse(token=token, expires_in=int(expires.total_seconds()))
+
+
+@router.post("/{activity_id}/checkin/batch", response_model=BatchCheckInResponse)
+def batch_checkin(
+    activity_id: int,
+    batch: BatchCheckIn,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    activity = db.query(Activity.id, Activity.creator_id).filter(Activity.id == activity_id).first()
+    if not activity:
+        raise HTTPException(status_code=404, detail="活动不存在")
+
+    # 创建者或管理员可以批量签到
+    if activity.creator_id != current_user.id and current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="权限不足")
+
+    results = [BatchCheckInResult(user_id=user_id, status="") for user_id in batch.user_ids]
+    for token in batch.tokens:
+        payload = decode_signed_token(token, CHECKIN_TOKEN_PURPOSE)
+        if payload is None or payload.get("activity_id") != activity_id:
+            results.append(BatchCheckInResult(token=token, status="invalid_token"))
+        else:
+            results.append(BatchCheckInResult(user_id=payload["user_id"], token=token, status=""))
+
+    # 一次查询取出涉及用户的报名状态，一条 UPDATE ... WHERE user_id IN (...) 完成签到
+    user_ids = {r.user_id for r in results if not r.status}
+    signups = {row.user_id: row for row in db.query(
+        ActivitySignup.user_id, ActivitySignup.check_in, ActivitySignup.status
+    ).filter(
+        ActivitySignup.activity_id == activity_id,
+        ActivitySignup.user_id.in_(user_ids)
+    ).all()} if user_ids else {}
+    to_check_in = {
+        user_id for user_id, row in signups.items()
+        if row.status == SignupStatus.CONFIRMED and not row.check_in
+    }
+
+    seen = set()
+    for result in results:
+        if result.status:
+            continue
+        if result.user_id in seen:
+            result.status = "duplicate"
+        elif result.user_id not in signups:
+            result.status = "not_signed_up"
+        elif signups[result.user_id].status != SignupStatus.CONFIRMED:
+            result.status = "not_confirmed"
+        elif result.user_id in to_check_in:
+            result.status = "checked_in"
+        else:
+            result.status = "already_checked_in"
+        seen.add(result.user_id)
+
+    if to_check_in:
+        db.execute(
+            update(ActivitySignup)
+            .where(ActivitySignup.activity_id == activity_id, ActivitySignup.user_id.in_(to_check_in))
+            .values(check_in=True)
+            .execution_options(synchronize_session=False)
+        )
+        try:
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"批量签到失败: {str(e)}")
+            raise HTTPException(status_code=500, detail="操作失败")
+    return BatchCheckInResponse(checked_in=len(to_check_in), results=results)
+
+
+@router.post("/{activity_id}/ballot/draw", response_model=BallotDrawResponse)
+def draw_ballot(
+    activity_id: int,
+    draw_data: Optional[BallotDraw] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    seed = draw_data.seed if draw_data and draw_data.seed is not None else ballot.new_seed()
+    # 以「尚未抽签」为条件认领，重复或并发触发只有一次生效；此后不再接受报名。
+    # 认领必须是事务的第一条语句：之前若有普通读取，REPEATABLE READ 下读取报名用的是
+    # 那时的快照，两次语句之间提交的报名会漏抽，永远停在待抽签
+    claim = update(Activity).where(
+        Activity.id == activity_id,
+        Activity.allocation_mode == AllocationMode.BALLOT.value,
+        Activity.ballot_drawn_at.is_(None)
+    )
+    # 创建者或管理员可以抽签
+    if current_user.role != UserRole.ADMIN:
+        claim = claim.where(Activity.creator_id == current_user.id)
+    claimed = db.execute(
+        claim.values(ballot_drawn_at=func.now(), ballot_seed=seed)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    activity = db.query(Activity).filter(Activity.id == activity_id).first()
+    if not claimed:
+        db.rollback()
+        if not activity:
+            raise HTTPException(status_code=404, detail="活动不存在")
+        if activity.creator_id != current_user.id and current_user.role != UserRole.ADMIN:
+            raise HTTPException(status_code=403, detail="权限不足")
+        if activity.allocation_mode != AllocationMode.BALLOT:
+            raise HTTPException(status_code=400, detail="该活动不是抽签报名")
+        raise HTTPException(status_code=400, detail="抽签已结束")
+
+    entry_ids = [row.id for row in db.query(ActivitySignup.id).filter(
+        ActivitySignup.activity_id == activity_id,
+        ActivitySignup.status == SignupStatus.PENDING.value
+    ).all()]
+    confirmed, waitlist = ballot.draw(entry_ids, activity.max_participants or 0, seed)
+
+    # 按主键批量更新（executemany），录取人数一次写入 signup_count
+    rows = [
+        {"id": signup_id, "status": SignupStatus.CONFIRMED.value, "waitlist_position": None}
+        for signup_id in confirmed
+    ] + [
+        {"id": signup_id, "status": SignupStatus.WAITLISTED.value, "waitlist_position": position}
+        for position, signup_id in enumerate(waitlist, start=1)
+    ]
+    if rows:
+        db.execute(update(ActivitySignup), rows)
+    db.execute(
+        update(Activity)
+        .where(Activity.id == activity_id)
+        .values(
+            signup_count=Activity.signup_count + len(confirmed),
+            waitlist_tail=Activity.waitlist_tail + len(waitlist)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"抽签失败: {str(e)}")
+        raise HTTPException(status_code=500, detail="操作失败")
+    return BallotDrawResponse(
+        activity_id=activity_id, seed=seed, confirmed=len(confirmed), waitlisted=len(waitlist)
+    )
+
+
 @router.get("/my/signups", response_model=List[ActivitySignupResponse])
-def get_my_signups(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    signups = db.query(ActivitySignup).filter(ActivitySignup.user_id == current_user.id).all()
+def get_my_signups(
+    request: Request,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    query = db.query(ActivitySignup).filter(ActivitySignup.user_id == current_user.id)
+    if wants_ndjson(request):
+        return ndjson_response(query.order_by(ActivitySignup.id), ActivitySignupResponse)
+    signups = query.all()
     return signups
 
 
 @router.get("/{activity_id}/signups", response_model=List[ActivitySignupResponse])
 def get_activity_signups(
     activity_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     activity = db.query(Activity).filter(Activity.id == activity_id).first()
@@ -198,10 +635,17 @@ def get_activity_signups(
     if activity.creator_id != current_user.id and current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="权限不足")
 
-    signups = db.query(ActivitySignup).filter(ActivitySignup.activity_id == activity_id).all()
+    query = db.query(ActivitySignup).filter(ActivitySignup.activity_id == activity_id)
+    if wants_ndjson(request):
+        return ndjson_response(query.order_by(ActivitySignup.id), ActivitySignupResponse)
+    signups = query.all()
     return signups
 
 
+# 取消报名时报名状态被并发改变后的最多尝试次数
+CANCEL_SIGNUP_ATTEMPTS = 3
+
+
 @router.delete("/signup/{activity_id}")
 def cancel_signup(
     activity_id: int,
@@ -213,15 +657,36 @@ def cancel_signup(
     if not activity:
         raise HTTPException(status_code=404, detail="活动不存在")
 
-    signup = db.query(ActivitySignup).filter(
-        ActivitySignup.activity_id == activity_id,
-        ActivitySignup.user_id == current_user.id
-    ).first()
-
-    if not signup:
-        raise HTTPException(status_code=404, detail="未找到报名记录")
-
-    db.delete(signup)
+    # 加锁读取（当前读，不受 REPEATABLE READ 快照影响），再以读到的状态为删除条件，
+    # 按删除行数判断：重复的并发取消只会有一次成功并递减报名人数；
+    # 读取后报名仍被并发转正（候补/待抽签 -> 已录取）时删除失败，重新读取，有限次后返回 409
+    for _ in range(CANCEL_SIGNUP_ATTEMPTS):
+        signup = db.query(ActivitySignup.status).filter(
+            ActivitySignup.activity_id == activity_id,
+            ActivitySignup.user_id == current_user.id
+        ).with_for_update().first()
+        if not signup:
+            db.rollback()
+            raise HTTPException(status_code=404, detail="未找到报名记录")
+        deleted = db.query(ActivitySignup).filter(
+            ActivitySignup.activity_id == activity_id,
+            ActivitySignup.user_id == current_user.id,
+            ActivitySignup.status == signup.status
+        ).delete(synchronize_session=False)
+        if deleted:
+            break
+    else:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="报名状态已变化，请重试")
+
+    # 只有已录取的报名占用名额；有候补时名额直接转给队首，报名人数不变
+    if signup.status == SignupStatus.CONFIRMED and _promote_from_waitlist(db, activity) is None:
+        db.execute(
+            update(Activity)
+            .where(Activity.id == activity_id, Activity.signup_count > 0)
+            .values(signup_count=Activity.signup_count - 1)
+            .execution_options(synchronize_session=False)
+        )
     try:
         db.commit()
     except Exception:
@@ -3,21 +3,30 @@ from datetime import timedelta
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.config import settings
 from app.database import get_db
 from app.models.user import User, UserRole
 from app.routers.deps import get_current_user
 from app.schemas.user import UserCreate, UserLogin, Token, UserResponse
-from app.utils.security import hash_password, verify_password, create_access_token
+from app.utils.password_hasher import HashingQueueFull, password_hasher
+from app.utils.request_metrics import TimedRoute
+from app.utils.security import create_access_token
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(prefix="/auth", tags=["auth"], route_class=TimedRoute)
 
 
-@router.post("/register", response_model=Token)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def _hash_or_503(coro):
+    try:
+        return await coro
+    except HashingQueueFull:
+        raise HTTPException(status_code=503, detail="服务繁忙，请稍后重试")
+
+
+def _check_new_user(db: Session, user_data: UserCreate):
     # 检查用户名是否已存在
     existing_user = db.query(User).filter(User.username == user_data.username).first()
     if existing_user:
@@ -28,8 +37,11 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     if existing_email:
         raise HTTPException(status_code=400, detail="邮箱已被注册")
 
-    # 创建新用户
-    hashed_password = hash_password(user_data.password)
+    # 哈希前结束只读事务，归还连接（SQLite 模式下同时释放写锁），写入时再开新事务
+    db.rollback()
+
+
+def _create_user(db: Session, user_data: UserCreate, hashed_password: str) -> User:
     new_user = User(
         username=user_data.username,
         password_hash=hashed_password,
@@ -46,6 +58,27 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         db.rollback()
         logger.error(f"用户注册失败: {str(e)}")
         raise HTTPException(status_code=500, detail="注册失败，请稍后重试")
+    return new_user
+
+
+def _get_user_by_username(db: Session, username: str):
+    user = db.query(User).filter(User.username == username).first()
+    # 校验密码前结束事务归还连接，用户对象脱离会话以保留已加载的属性
+    if user is not None:
+        db.expunge(user)
+    db.rollback()
+    return user
+
+
+# register/login 为异步端点：数据库操作放到线程池，bcrypt 交给进程池，
+# 避免哈希计算长时间占用线程池工作线程
+@router.post("/register", response_model=Token)
+async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+    await run_in_threadpool(_check_new_user, db, user_data)
+
+    # 创建新用户
+    hashed_password = await _hash_or_503(password_hasher.hash(user_data.password))
+    new_user = await run_in_threadpool(_create_user, db, user_data, hashed_password)
 
     # 生成token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -58,9 +91,9 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-def login(user_data: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == user_data.username).first()
-    if not user or not verify_password(user_data.password, user.password_hash):
+async def login(user_data: UserLogin, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_get_user_by_username, db, user_data.username)
+    if not user or not await _hash_or_503(password_hasher.verify(user_data.password, user.password_hash)):
         raise HTTPException(status_code=401, detail="用户名或密码错误")
 
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -1,67 +1,227 @@
 import logging
-from datetime import datetime
-from typing import List
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import update
+from sqlalchemy.orm import Session, joinedload, selectinload
 
+from app.config import settings
 from app.database import get_db
-from app.models.boat import Boat, BoatRental, BoatStatus
+from app.models.boat import Boat, BoatRental, BoatReservation, BoatStatus, ReservationStatus
 from app.models.user import User, UserRole
-from app.routers.deps import get_current_user, get_current_admin
+from app.routers.deps import get_current_user, get_current_admin, get_read_db
 from app.schemas.boat import (
     BoatCreate, BoatResponse, BoatUpdate,
-    BoatRentalResponse, BoatReturn
+    BoatRentalResponse, BoatRentalSummary, BoatReturn, RentalHistoryResponse,
+    BoatReservationCreate, BoatReservationResponse, BoatAvailabilityResponse
 )
+from app.utils import timeslots
+from app.utils.fleet_board import fleet_board
+from app.utils.identity_cache import identity_cache
+from app.utils.pagination import paginate, paginate_sorted
+from app.utils.rental_sweeper import OUTSTANDING_STATUSES
+from app.utils.request_metrics import TimedRoute
+from app.utils.streaming import ndjson_response, wants_ndjson
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/boats", tags=["boats"])
+router = APIRouter(prefix="/boats", tags=["boats"], route_class=TimedRoute)
 
 
 @router.get("", response_model=List[BoatResponse])
 def get_boats(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     status: BoatStatus = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
+    if fleet_board.enabled:
+        return paginate_sorted(fleet_board.list(db, status), response, Boat.id, cursor, skip, limit)
     query = db.query(Boat)
     if status:
         query = query.filter(Boat.status == status)
-    boats = query.offset(skip).limit(limit).all()
+    boats = paginate(query, response, [Boat.id], cursor, skip, limit, descending=False)
     return boats
 
 
 # /rentals 必须在 /{boat_id} 之前定义，避免路径冲突
 @router.get("/rentals", response_model=List[BoatRentalResponse])
 def get_my_rentals(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    rentals = db.query(BoatRental).filter(BoatRental.user_id == current_user.id).all()
+    query = db.query(BoatRental).filter(BoatRental.user_id == current_user.id)
+    if wants_ndjson(request):
+        return ndjson_response(query.options(joinedload(BoatRental.boat)).order_by(BoatRental.id), BoatRentalResponse)
+    # 一次 selectinload 批量加载船只，避免序列化时每条租借记录查询一次 boats
+    rentals = query.options(selectinload(BoatRental.boat)).all()
     return rentals
 
 
+@router.get("/rentals/compact", response_model=RentalHistoryResponse)
+def get_my_rental_history(
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """我的租借记录（精简格式）：每条记录不再重复嵌入船只，船只去重后单独返回"""
+    rentals = db.query(BoatRental).filter(
+        BoatRental.user_id == current_user.id
+    ).options(selectinload(BoatRental.boat)).order_by(BoatRental.id).all()
+    boats = {rental.boat.id: rental.boat for rental in rentals if rental.boat is not None}
+    return RentalHistoryResponse(
+        rentals=[BoatRentalSummary.model_validate(rental) for rental in rentals],
+        boats=[BoatResponse.model_validate(boat) for boat in sorted(boats.values(), key=lambda boat: boat.id)]
+    )
+
+
 @router.get("/all/rentals", response_model=List[BoatRentalResponse])
 def get_all_rentals(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_admin)
 ):
-    rentals = db.query(BoatRental).options(
-        joinedload(BoatRental.boat)
-    ).all()
+    query = db.query(BoatRental).options(joinedload(BoatRental.boat))
+    # Accept: application/x-ndjson 时逐批流式输出，不在内存中构建完整列表
+    if wants_ndjson(request):
+        return ndjson_response(query.order_by(BoatRental.id), BoatRentalResponse)
+    rentals = query.all()
     return rentals
 
 
+AVAILABILITY_MAX_DAYS = 31
+
+
+def _conflicting_reservation(db: Session, boat_id: int, start: datetime, end: datetime):
+    """返回与 [start, end) 重叠的有效预约
+
+    同一船只的有效预约互不重叠，按开始时间排序后结束时间也有序，因此只需按索引取
+    start_time < end 的最后一条：它不与 [start, end) 重叠，更早的预约也都不会重叠。
+    """
+    latest = db.query(BoatReservation).filter(
+        BoatReservation.boat_id == boat_id,
+        BoatReservation.status == ReservationStatus.ACTIVE.value,
+        BoatReservation.start_time < end
+    ).order_by(BoatReservation.start_time.desc()).first()
+    if latest is not None and latest.end_time > start:
+        return latest
+    return None
+
+
+def _validate_slot(start: datetime, end: datetime):
+    slot = settings.RESERVATION_SLOT_MINUTES
+    if end <= start:
+        raise HTTPException(status_code=400, detail="结束时间必须晚于开始时间")
+    if not (timeslots.is_aligned(start, slot) and timeslots.is_aligned(end, slot)):
+        raise HTTPException(status_code=400, detail=f"预约时段须以 {slot} 分钟为单位")
+    if end - start > timedelta(hours=settings.RESERVATION_MAX_HOURS):
+        raise HTTPException(status_code=400, detail=f"单次预约不能超过 {settings.RESERVATION_MAX_HOURS} 小时")
+    now = datetime.utcnow()
+    if start < now:
+        raise HTTPException(status_code=400, detail="不能预约已经开始的时段")
+    if start > now + timedelta(days=settings.RESERVATION_MAX_DAYS_AHEAD):
+        raise HTTPException(status_code=400, detail=f"最多提前 {settings.RESERVATION_MAX_DAYS_AHEAD} 天预约")
+
+
+@router.get("/availability", response_model=List[BoatAvailabilityResponse])
+def get_availability(
+    window_start: datetime = Query(..., alias="from"),
+    window_end: datetime = Query(..., alias="to"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    window_start, window_end = timeslots.to_naive_utc(window_start), timeslots.to_naive_utc(window_end)
+    if window_end <= window_start:
+        raise HTTPException(status_code=400, detail="结束时间必须晚于开始时间")
+    if window_end - window_start > timedelta(days=AVAILABILITY_MAX_DAYS):
+        raise HTTPException(status_code=400, detail=f"时间范围不能超过 {AVAILABILITY_MAX_DAYS} 天")
+    # 已经开始的时段不可预约
+    window_start = max(window_start, timeslots.ceil_to_slot(datetime.utcnow(), settings.RESERVATION_SLOT_MINUTES))
+
+    if fleet_board.enabled:
+        boats = fleet_board.list(db)
+    else:
+        boats = [row._asdict() for row in db.query(Boat.id, Boat.name, Boat.status).order_by(Boat.id)]
+
+    # 一次查询取出窗口内所有船只的有效预约；预约时长有上限，start_time 的扫描范围有下界
+    max_length = timedelta(hours=settings.RESERVATION_MAX_HOURS)
+    rows = db.query(BoatReservation.boat_id, BoatReservation.start_time, BoatReservation.end_time).filter(
+        BoatReservation.status == ReservationStatus.ACTIVE.value,
+        BoatReservation.start_time > window_start - max_length,
+        BoatReservation.start_time < window_end,
+        BoatReservation.end_time > window_start
+    ).order_by(BoatReservation.start_time).all()
+    busy = defaultdict(list)
+    for boat_id, start, end in rows:
+        busy[boat_id].append((start, end))
+
+    result = []
+    for boat in boats:
+        if boat["status"] == BoatStatus.MAINTENANCE or window_start >= window_end:
+            free = []
+        else:
+            free = timeslots.free_slots(window_start, window_end, busy.get(boat["id"], []))
+        result.append(BoatAvailabilityResponse(
+            boat_id=boat["id"], name=boat["name"], status=boat["status"],
+            free=[{"start_time": start, "end_time": end} for start, end in free]
+        ))
+    return result
+
+
+@router.get("/reservations", response_model=List[BoatReservationResponse])
+def get_my_reservations(
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """本人尚未结束的有效预约"""
+    return db.query(BoatReservation).filter(
+        BoatReservation.user_id == current_user.id,
+        BoatReservation.status == ReservationStatus.ACTIVE.value,
+        BoatReservation.end_time > datetime.utcnow()
+    ).order_by(BoatReservation.start_time).all()
+
+
+@router.delete("/reservations/{reservation_id}")
+def cancel_reservation(
+    reservation_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    reservation = db.query(BoatReservation).filter(
+        BoatReservation.id == reservation_id,
+        BoatReservation.status == ReservationStatus.ACTIVE.value
+    ).with_for_update().first()
+    if not reservation:
+        raise HTTPException(status_code=404, detail="预约不存在")
+    # 管理员可以取消任何预约，普通用户只能取消自己的
+    if current_user.role != UserRole.ADMIN and current_user.id != reservation.user_id:
+        raise HTTPException(status_code=403, detail="权限不足")
+
+    reservation.status = ReservationStatus.CANCELLED.value
+    try:
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"取消预约失败: {str(e)}")
+        raise HTTPException(status_code=500, detail="操作失败")
+    return {"message": "预约已取消"}
+
+
 @router.get("/{boat_id}", response_model=BoatResponse)
 def get_boat(
     boat_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    boat = db.query(Boat).filter(Boat.id == boat_id).first()
+    if fleet_board.enabled:
+        boat = fleet_board.get(db, boat_id)
+    else:
+        boat = db.query(Boat).filter(Boat.id == boat_id).first()
     if not boat:
         raise HTTPException(status_code=404, detail="船只不存在")
     return boat
@@ -76,6 +236,7 @@ def create_boat(
     new_boat = Boat(**boat_data.model_dump())
     db.add(new_boat)
     try:
+        fleet_board.stage(db, new_boat)
         db.commit()
         db.refresh(new_boat)
     except Exception as e:
@@ -92,15 +253,18 @@ def update_boat(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
 ):
-    boat = db.query(Boat).filter(Boat.id == boat_id).first()
+    # 加行锁：并发修改同一船只时，状态表登记顺序与提交顺序一致
+    boat = db.query(Boat).filter(Boat.id == boat_id).with_for_update().first()
     if not boat:
         raise HTTPException(status_code=404, detail="船只不存在")
 
     update_data = boat_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(boat, field, value)
+    boat.version = Boat.version + 1
 
     try:
+        fleet_board.stage(db, boat)
         db.commit()
         db.refresh(boat)
     except Exception as e:
@@ -116,12 +280,13 @@ def delete_boat(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
 ):
-    boat = db.query(Boat).filter(Boat.id == boat_id).first()
+    boat = db.query(Boat).filter(Boat.id == boat_id).with_for_update().first()
     if not boat:
         raise HTTPException(status_code=404, detail="船只不存在")
 
     try:
         db.delete(boat)
+        fleet_board.stage_delete(db, boat_id)
         db.commit()
     except Exception as e:
         db.rollback()
@@ -130,46 +295,114 @@ def delete_boat(
     return {"message": "船只删除成功"}
 
 
-@router.post("/{boat_id}/rent", response_model=BoatRentalResponse)
-def rent_boat(
+@router.post("/{boat_id}/reservations", response_model=BoatReservationResponse)
+def create_reservation(
     boat_id: int,
+    reservation_data: BoatReservationCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    # 使用 with_for_update() 添加行级锁，防止竞态条件
+    start, end = reservation_data.start_time, reservation_data.end_time
+    _validate_slot(start, end)
+
+    # 锁定船只行，同一船只的冲突检查和插入串行执行（SQLite 模式下由写锁串行化）
     boat = db.query(Boat).filter(Boat.id == boat_id).with_for_update().first()
     if not boat:
         raise HTTPException(status_code=404, detail="船只不存在")
+    if boat.status == BoatStatus.MAINTENANCE:
+        raise HTTPException(status_code=400, detail="船只维护中")
+    if _conflicting_reservation(db, boat_id, start, end):
+        raise HTTPException(status_code=400, detail="该时段已被预约")
+
+    reservation = BoatReservation(boat_id=boat_id, user_id=current_user.id, start_time=start, end_time=end)
+    db.add(reservation)
+    # 递增版本号：与之并发、已做过预约检查的租船会比较失败并重新检查
+    boat.version = Boat.version + 1
+    try:
+        fleet_board.stage(db, boat)
+        db.commit()
+        db.refresh(reservation)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"预约船只失败: {str(e)}")
+        raise HTTPException(status_code=500, detail="操作失败")
+    return reservation
+
+
+def _read_boat(db: Session, boat_id: int, fresh: bool) -> Optional[dict]:
+    """租船前读取船只状态和版本号（不加锁）；首次优先读状态表，比较失败重试时读数据库"""
+    if fleet_board.enabled and not fresh:
+        return fleet_board.get(db, boat_id)
+    row = db.query(Boat.id, Boat.status, Boat.rental_price, Boat.version).filter(Boat.id == boat_id).first()
+    return row._asdict() if row else None
 
-    if boat.status != BoatStatus.AVAILABLE:
-        raise HTTPException(status_code=400, detail="船只不可租借")
 
-    # 检查用户余额
-    if current_user.balance < boat.rental_price:
+@router.post("/{boat_id}/rent", response_model=BoatRentalResponse)
+def rent_boat(
+    boat_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """先不加锁地读取船只版本号并做检查，再以版本号和状态为条件更新船只；
+    版本号已变化（被并发租借、修改或新增预约）时回滚并重新读取，最多重试 BOAT_RENT_MAX_RETRIES 次。
+    余额同样用条件更新扣减，整个过程不持有 SELECT ... FOR UPDATE 行锁。
+    """
+    for attempt in range(settings.BOAT_RENT_MAX_RETRIES + 1):
+        boat = _read_boat(db, boat_id, fresh=attempt > 0)
+        if not boat:
+            raise HTTPException(status_code=404, detail="船只不存在")
+
+        if boat["status"] != BoatStatus.AVAILABLE:
+            raise HTTPException(status_code=400, detail="船只不可租借")
+
+        # 当前时段被他人预约时不能直接租用；预约人本人可以直接取船
+        now = datetime.utcnow()
+        reserved = _conflicting_reservation(db, boat_id, now, now + timedelta(microseconds=1))
+        if reserved is not None and reserved.user_id != current_user.id:
+            raise HTTPException(status_code=400, detail="船只当前时段已被预约")
+
+        swapped = db.execute(
+            update(Boat)
+            .where(Boat.id == boat_id, Boat.version == boat["version"], Boat.status == BoatStatus.AVAILABLE)
+            .values(status=BoatStatus.RENTED, version=Boat.version + 1)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if swapped:
+            break
+        db.rollback()
+    else:
+        logger.warning(f"租船版本冲突重试 {settings.BOAT_RENT_MAX_RETRIES} 次仍失败: boat_id={boat_id}")
+        raise HTTPException(status_code=409, detail="船只状态已变化，请重试")
+
+    # 条件扣减余额，不先加锁读取；current_user 可能来自身份缓存，不能用其中的余额判断
+    charged = db.execute(
+        update(User)
+        .where(User.id == current_user.id, User.balance >= boat["rental_price"])
+        .values(balance=User.balance - boat["rental_price"])
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not charged:
+        db.rollback()
         raise HTTPException(status_code=400, detail="余额不足")
 
-    # 创建租赁记录
     rental = BoatRental(
         boat_id=boat_id,
         user_id=current_user.id,
-        rental_time=datetime.utcnow(),
+        rental_time=now,
         status="active"
     )
     db.add(rental)
 
-    # 更新船只状态
-    boat.status = BoatStatus.RENTED
-
-    # 扣减余额
-    current_user.balance -= boat.rental_price
-
     try:
+        if fleet_board.enabled:
+            fleet_board.stage(db, db.get(Boat, boat_id))
         db.commit()
         db.refresh(rental)
     except Exception as e:
         db.rollback()
         logger.error(f"租船失败: {str(e)}")
         raise HTTPException(status_code=500, detail="操作失败")
+    identity_cache.invalidate(current_user.id)
     return rental
 
 
@@ -179,11 +412,11 @@ def return_boat(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    # 使用 with_for_update() 添加行级锁，确保事务一致性
+    # 被清理任务标记为逾期（overdue）的租借同样可以归还
     rental = db.query(BoatRental).filter(
         BoatRental.id == return_data.rental_id,
-        BoatRental.status == "active"
-    ).with_for_update().first()
+        BoatRental.status.in_(OUTSTANDING_STATUSES)
+    ).first()
 
     if not rental:
         raise HTTPException(status_code=404, detail="未找到租赁记录")
@@ -192,15 +425,30 @@ def return_boat(
     if current_user.role != UserRole.ADMIN and current_user.id != rental.user_id:
         raise HTTPException(status_code=403, detail="权限不足")
 
-    boat = db.query(Boat).filter(Boat.id == rental.boat_id).with_for_update().first()
-    if not boat:
-        raise HTTPException(status_code=404, detail="船只不存在")
+    # 以读到的状态为条件更新，并发重复还船（或与逾期清理并发）时只有一个成功
+    returned = db.execute(
+        update(BoatRental)
+        .where(BoatRental.id == rental.id, BoatRental.status == rental.status)
+        .values(status="returned", return_time=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not returned:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="未找到租赁记录")
 
-    rental.return_time = datetime.utcnow()
-    rental.status = "returned"
-    boat.status = BoatStatus.AVAILABLE
+    released = db.execute(
+        update(Boat)
+        .where(Boat.id == rental.boat_id)
+        .values(status=BoatStatus.AVAILABLE, version=Boat.version + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not released:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="船只不存在")
 
     try:
+        if fleet_board.enabled:
+            fleet_board.stage(db, db.get(Boat, rental.boat_id))
         db.commit()
         db.refresh(rental)
     except Exception as e:
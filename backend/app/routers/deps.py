@@ -1,20 +1,85 @@
+import time
+from typing import Optional
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from app.database import get_db
 from app.models.user import User, UserRole
 from app.schemas.user import TokenData
+from app.utils.identity_cache import identity_cache
+from app.utils.request_metrics import current_metrics
 from app.utils.security import decode_access_token
 
 # 创建 HTTPBearer 安全方案
 security = HTTPBearer(auto_error=False)
 
+_USER_COLUMNS = [attr.key for attr in inspect(User).column_attrs]
+
+
+def _attach_snapshot(db: Session, snapshot: dict) -> User:
+    """将用户快照挂到当前会话，不发出查询"""
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def _load_user(db: Session, user_id, username: str):
+    """按 token 声明加载用户，优先使用身份缓存"""
+    # 旧 token 没有 user_id 声明，直接按用户名查询
+    if user_id is None:
+        return db.query(User).filter(User.username == username).first()
+
+    snapshot = identity_cache.get(user_id)
+    if snapshot is not None:
+        if snapshot["username"] != username:
+            return None
+        return _attach_snapshot(db, snapshot)
 
-async def get_current_user(
+    query = db.query(User).filter(User.id == user_id)
+    # 副本无复制延迟时认证查询走只读副本：依赖与端点之间还要再等一次线程池，写请求的会话若在此时
+    # 已占着主库连接（SQLite 模式下还占着写锁），洪峰时排队中的请求会与正在执行的端点互相等待。
+    # 有复制延迟的副本上刚注册的用户查不到，失效后读到的旧角色、用户名还会被重新缓存，仍读主库
+    replicas = getattr(db, "replicas", None)
+    if replicas is not None and replicas.synchronous:
+        query = query.execution_options(prefer_replica=True)
+    user = query.first()
+    # 用户名已修改的旧 token 视为无效，与按用户名查询的行为一致
+    if user is None or user.username != username:
+        return None
+    snapshot = {key: getattr(user, key) for key in _USER_COLUMNS}
+    identity_cache.set(user.id, snapshot)
+    if db.info.get("replica") is None:
+        return user
+    # 查询落在副本上时立即结束只读事务归还副本连接，用户以快照形式挂回会话
+    db.expunge(user)
+    db.rollback()
+    return _attach_snapshot(db, snapshot)
+
+
+def get_read_db(db: Session = Depends(get_db)) -> Session:
+    """只读端点使用的会话：查询可路由到只读副本，写入和加锁查询仍走主库"""
+    db.info["read_only"] = True
+    return db
+
+
+# 依赖为同步函数：FastAPI 会在线程池中执行，数据库查询不会阻塞事件循环
+def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> User:
+    start = time.perf_counter()
+    try:
+        return _authenticate(credentials, db)
+    finally:
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.auth_time += time.perf_counter() - start
+
+
+def _authenticate(credentials: Optional[HTTPAuthorizationCredentials], db: Session) -> User:
     if credentials is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -34,7 +99,9 @@ async def get_current_user(
     token_data = TokenData(**payload)
     # JWT token 使用 "sub" 字段，但 TokenData 使用 "username"
     username = payload.get("sub") or token_data.username
-    user = db.query(User).filter(User.username == username).first()
+    # 供读写分离会话判断该用户是否需要粘滞在主库
+    db.info["user_id"] = payload.get("user_id")
+    user = _load_user(db, payload.get("user_id"), username)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -45,7 +112,7 @@ async def get_current_user(
     return user
 
 
-async def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -55,7 +122,7 @@ async def get_current_admin(current_user: User = Depends(get_current_user)) -> U
 
 
 def require_role(allowed_roles: list):
-    async def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    def role_checker(current_user: User = Depends(get_current_user)) -> User:
         if current_user.role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -1,28 +1,33 @@
 import logging
 from decimal import Decimal
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models.finance import Finance, FinanceType
 from app.models.user import User, UserRole
-from app.routers.deps import get_current_user, get_current_admin
+from app.routers.deps import get_current_user, get_current_admin, get_read_db
 from app.schemas.finance import FinanceCreate, FinanceResponse, BalanceResponse
+from app.utils.identity_cache import identity_cache
+from app.utils.pagination import paginate
+from app.utils.request_metrics import TimedRoute
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/finances", tags=["finances"])
+router = APIRouter(prefix="/finances", tags=["finances"], route_class=TimedRoute)
 
 
 @router.get("", response_model=List[FinanceResponse])
 def get_finances(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     type: FinanceType = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     query = db.query(Finance)
@@ -31,13 +36,15 @@ def get_finances(
     # 普通用户只能看自己的记录
     if current_user.role == UserRole.USER:
         query = query.filter(Finance.user_id == current_user.id)
-    finances = query.order_by(Finance.created_at.desc()).offset(skip).limit(limit).all()
+    finances = paginate(query, response, [Finance.created_at, Finance.id], cursor, skip, limit)
     return finances
 
 
 @router.get("/balance", response_model=BalanceResponse)
-def get_balance(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return BalanceResponse(total_balance=current_user.balance, user_id=current_user.id)
+def get_balance(db: Session = Depends(get_read_db), current_user: User = Depends(get_current_user)):
+    # current_user 可能来自身份缓存，余额以数据库为准
+    balance = db.query(User.balance).filter(User.id == current_user.id).scalar()
+    return BalanceResponse(total_balance=balance, user_id=current_user.id)
 
 
 @router.post("", response_model=FinanceResponse)
@@ -54,8 +61,9 @@ def create_finance(
     db.add(new_finance)
 
     # 如果是收入/支出涉及用户，更新用户余额，使用行级锁
+    # populate_existing：目标为本人时会话中已有身份缓存挂入的快照，需用数据库中的值覆盖
     if finance_data.user_id:
-        user = db.query(User).filter(User.id == finance_data.user_id).with_for_update().first()
+        user = db.query(User).filter(User.id == finance_data.user_id).with_for_update().populate_existing().first()
         if user:
             if finance_data.type == FinanceType.INCOME:
                 user.balance += Decimal(str(finance_data.amount))
@@ -71,6 +79,8 @@ def create_finance(
         db.rollback()
         logger.error(f"创建财务记录失败: {str(e)}")
         raise HTTPException(status_code=500, detail="操作失败")
+    if finance_data.user_id:
+        identity_cache.invalidate(finance_data.user_id)
     return new_finance
 
 
@@ -86,11 +96,11 @@ def deposit(
     if amount <= 0:
         raise HTTPException(status_code=400, detail="充值金额必须大于0")
 
-    # 使用行级锁防止并发充值
+    # 使用行级锁防止并发充值；populate_existing 覆盖会话中来自身份缓存的旧快照
     if user_id:
-        user = db.query(User).filter(User.id == user_id).with_for_update().first()
+        user = db.query(User).filter(User.id == user_id).with_for_update().populate_existing().first()
     else:
-        user = db.query(User).filter(User.id == current_user.id).with_for_update().first()
+        user = db.query(User).filter(User.id == current_user.id).with_for_update().populate_existing().first()
 
     if not user:
         raise HTTPException(status_code=404, detail="用户不存在")
@@ -114,12 +124,13 @@ def deposit(
         db.rollback()
         logger.error(f"充值失败: {str(e)}")
         raise HTTPException(status_code=500, detail="操作失败")
+    identity_cache.invalidate(user.id)
     return {"message": "充值成功", "new_balance": user.balance}
 
 
 @router.get("/report")
 def get_finance_report(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_admin)
 ):
     income_sum = db.query(func.sum(Finance.amount)).filter(
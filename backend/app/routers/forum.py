@@ -1,26 +1,28 @@
 import logging
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models.forum import Post, Comment, Tag
 from app.models.user import User, UserRole
-from app.routers.deps import get_current_user, get_current_admin
+from app.routers.deps import get_current_user, get_current_admin, get_read_db
 from app.schemas.forum import (
     PostCreate, PostResponse, PostUpdate,
     CommentCreate, CommentResponse, TagResponse
 )
+from app.utils.pagination import paginate
+from app.utils.request_metrics import TimedRoute
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/forum", tags=["forum"])
+router = APIRouter(prefix="/forum", tags=["forum"], route_class=TimedRoute)
 
 
 # ===== 标签管理 =====
 @router.get("/tags", response_model=List[TagResponse])
-def get_tags(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_tags(db: Session = Depends(get_read_db), current_user: User = Depends(get_current_user)):
     tags = db.query(Tag).all()
     return tags
 
@@ -46,23 +48,25 @@ def create_tag(name: str, db: Session = Depends(get_db), current_user: User = De
 # ===== 帖子管理 =====
 @router.get("/posts", response_model=List[PostResponse])
 def get_posts(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     tag_id: int = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     query = db.query(Post)
     if tag_id:
         query = query.filter(Post.tag_id == tag_id)
-    posts = query.order_by(Post.created_at.desc()).offset(skip).limit(limit).all()
+    posts = paginate(query, response, [Post.created_at, Post.id], cursor, skip, limit)
     return posts
 
 
 @router.get("/posts/{post_id}", response_model=PostResponse)
 def get_post(
     post_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     post = db.query(Post).filter(Post.id == post_id).first()
@@ -144,12 +148,15 @@ def delete_post(
 @router.get("/posts/{post_id}/comments", response_model=List[CommentResponse])
 def get_comments(
     post_id: int,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    comments = db.query(Comment).filter(Comment.post_id == post_id).offset(skip).limit(limit).all()
+    query = db.query(Comment).filter(Comment.post_id == post_id)
+    comments = paginate(query, response, [Comment.created_at, Comment.id], cursor, skip, limit, descending=False)
     return comments
 
 
@@ -1,35 +1,39 @@
 import logging
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models.notice import Notice
 from app.models.user import User
-from app.routers.deps import get_current_user, get_current_admin
+from app.routers.deps import get_current_user, get_current_admin, get_read_db
 from app.schemas.notice import NoticeCreate, NoticeResponse, NoticeUpdate
+from app.utils.pagination import paginate
+from app.utils.request_metrics import TimedRoute
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/notices", tags=["notices"])
+router = APIRouter(prefix="/notices", tags=["notices"], route_class=TimedRoute)
 
 
 @router.get("", response_model=List[NoticeResponse])
 def get_notices(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    notices = db.query(Notice).order_by(Notice.created_at.desc()).offset(skip).limit(limit).all()
+    notices = paginate(db.query(Notice), response, [Notice.created_at, Notice.id], cursor, skip, limit)
     return notices
 
 
 @router.get("/{notice_id}", response_model=NoticeResponse)
 def get_notice(
     notice_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     notice = db.query(Notice).filter(Notice.id == notice_id).first()
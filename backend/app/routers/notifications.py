@@ -0,0 +1,57 @@
+import logging
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.notification import Notification
+from app.models.user import User
+from app.routers.deps import get_current_user, get_read_db
+from app.schemas.notification import NotificationResponse
+from app.utils.pagination import paginate
+from app.utils.request_metrics import TimedRoute
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/notifications", tags=["notifications"], route_class=TimedRoute)
+
+
+@router.get("", response_model=List[NotificationResponse])
+def get_my_notifications(
+    response: Response,
+    unread: bool = False,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    query = db.query(Notification).filter(Notification.user_id == current_user.id)
+    if unread:
+        query = query.filter(Notification.is_read.is_(False))
+    return paginate(query, response, [Notification.created_at, Notification.id], cursor, skip, limit)
+
+
+@router.put("/{notification_id}/read", response_model=NotificationResponse)
+def mark_notification_read(
+    notification_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    notification = db.query(Notification).filter(
+        Notification.id == notification_id,
+        Notification.user_id == current_user.id
+    ).first()
+    if not notification:
+        raise HTTPException(status_code=404, detail="通知不存在")
+
+    notification.is_read = True
+    try:
+        db.commit()
+        db.refresh(notification)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"标记通知已读失败: {str(e)}")
+        raise HTTPException(status_code=500, detail="操作失败")
+    return notification
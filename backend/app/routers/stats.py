@@ -1,19 +1,26 @@
-from fastapi import APIRouter, Depends
+import itertools
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
-from datetime import datetime
+from sqlalchemy import func, extract, or_
+from datetime import datetime, timedelta
 from calendar import monthrange
-from typing import List, Dict
+from typing import List, Dict, Optional
 
-from app.database import get_db
+from app.database import get_pool_status
 from app.models.user import User
 from app.models.boat import Boat, BoatRental
 from app.models.activity import Activity
 from app.models.signup import ActivitySignup
 from app.models.finance import Finance, FinanceType
-from app.routers.deps import get_current_admin
+from app.routers.deps import get_current_admin, get_read_db
+from app.utils import fleet_analytics, timeslots
+from app.utils.fleet_board import fleet_board
+from app.utils.identity_cache import identity_cache
+from app.utils.request_metrics import TimedRoute
+from app.utils.scheduler import scheduler
 
-router = APIRouter(prefix="/stats", tags=["stats"])
+router = APIRouter(prefix="/stats", tags=["stats"], route_class=TimedRoute)
 
 
 def get_month_range(month_offset):
@@ -42,7 +49,7 @@ def get_recent_months(n: int) -> List[datetime]:
 
 
 @router.get("")
-def get_stats(db: Session = Depends(get_db), current_user: User = Depends(get_current_admin)):
+def get_stats(db: Session = Depends(get_read_db), current_user: User = Depends(get_current_admin)):
     """获取所有统计数据"""
     now = datetime.utcnow()
     month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
@@ -146,3 +153,95 @@ def get_stats(db: Session = Depends(get_db), current_user: User = Depends(get_cu
         "revenue_history": revenue_history,
         "activity_participation": activity_participation,
     }
+
+
+FLEET_ANALYTICS_MAX_DAYS = 3660
+FLEET_ANALYTICS_DEFAULT_DAYS = 90
+
+
+@router.get("/fleet-utilization")
+def get_fleet_utilization(
+    window_start: Optional[datetime] = Query(None, alias="from"),
+    window_end: Optional[datetime] = Query(None, alias="to"),
+    boat_type: Optional[str] = Query(None, alias="type"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """船只利用率分析：各船只占用时长、平均租借时长、最长空闲间隔和周内小时热力图
+
+    默认统计最近 90 天；统计截止时间不晚于当前时间，未归还的租借占用到截止时间。
+    """
+    now = datetime.utcnow()
+    window_end = timeslots.to_naive_utc(window_end) if window_end else now
+    window_start = (timeslots.to_naive_utc(window_start) if window_start
+                    else window_end - timedelta(days=FLEET_ANALYTICS_DEFAULT_DAYS))
+    if window_end <= window_start:
+        raise HTTPException(status_code=400, detail="结束时间必须晚于开始时间")
+    if window_end - window_start > timedelta(days=FLEET_ANALYTICS_MAX_DAYS):
+        raise HTTPException(status_code=400, detail=f"时间范围不能超过 {FLEET_ANALYTICS_MAX_DAYS} 天")
+    window_end = max(min(window_end, now), window_start)
+
+    if fleet_board.enabled:
+        boats = fleet_board.list(db)
+    else:
+        boats = [row._asdict() for row in db.query(Boat.id, Boat.name, Boat.type).order_by(Boat.id)]
+    if boat_type is not None:
+        boats = [boat for boat in boats if boat["type"] == boat_type]
+
+    rows = []
+    if boats:
+        columns = (BoatRental.boat_id, BoatRental.rental_time, BoatRental.return_time)
+        boat_filter = [BoatRental.boat_id.in_([boat["id"] for boat in boats])] if boat_type is not None else []
+        # 窗口开始时仍在租的记录：按 return_time 索引定位（ix_boats_rentals_return_time），
+        # rental_time 条件包一层 coalesce 只在索引内过滤，避免优化器改用 rental_time 索引扫描全部历史；
+        # 这类记录很少，在内存中排序
+        spanning = db.query(*columns).filter(
+            or_(BoatRental.return_time > window_start, BoatRental.return_time.is_(None)),
+            func.coalesce(BoatRental.rental_time, window_start) < window_start,
+            *boat_filter
+        ).all()
+        spanning.sort(key=lambda row: row.rental_time)
+        # 窗口内租出的记录：rental_time 两端都有界，按覆盖索引 ix_boats_rentals_rental_time 顺序流式读取
+        started = db.query(*columns).filter(
+            BoatRental.rental_time >= window_start, BoatRental.rental_time < window_end, *boat_filter
+        ).order_by(BoatRental.rental_time).yield_per(5000)
+        rows = itertools.chain(spanning, started)
+
+    result = fleet_analytics.analyze(rows, [boat["id"] for boat in boats], window_start, window_end)
+    names = {boat["id"]: boat for boat in boats}
+    for usage in result["boats"]:
+        usage["boat_name"] = names[usage["boat_id"]]["name"]
+        usage["type"] = names[usage["boat_id"]]["type"]
+    return {"from": window_start, "to": window_end, "type": boat_type, **result}
+
+
+@router.get("/identity-cache")
+def get_identity_cache_stats(current_user: User = Depends(get_current_admin)):
+    """获取身份缓存命中统计，用于调整缓存容量和 TTL"""
+    return identity_cache.stats()
+
+
+@router.get("/fleet-board")
+def check_fleet_board(
+    reload: bool = False,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """获取船只状态表统计并与 boats 表核对；reload=true 时在不一致后丢弃快照，下次读取重新加载"""
+    result = {**fleet_board.stats(), **fleet_board.check(db)}
+    if reload and not result["consistent"]:
+        fleet_board.invalidate()
+        result["reloaded"] = True
+    return result
+
+
+@router.get("/scheduler")
+def get_scheduler_stats(current_user: User = Depends(get_current_admin)):
+    """获取后台任务执行统计：执行/因租约跳过/失败次数、最近一次结果和累计处理数"""
+    return scheduler.stats()
+
+
+@router.get("/db-pool")
+def get_db_pool_stats(current_user: User = Depends(get_current_admin)):
+    """获取数据库连接池状态，用于区分连接池耗尽和慢查询"""
+    return get_pool_status()
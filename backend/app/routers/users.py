@@ -1,28 +1,33 @@
 import logging
 from decimal import Decimal
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models.user import User, UserRole
-from app.routers.deps import get_current_user, get_current_admin
+from app.routers.deps import get_current_user, get_current_admin, get_read_db
 from app.schemas.user import UserResponse, UserUpdate
+from app.utils.identity_cache import identity_cache
+from app.utils.pagination import paginate
+from app.utils.request_metrics import TimedRoute
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(prefix="/users", tags=["users"], route_class=TimedRoute)
 
 
 @router.get("", response_model=List[UserResponse])
 def get_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_admin)
 ):
-    users = db.query(User).offset(skip).limit(limit).all()
+    users = paginate(db.query(User), response, [User.id], cursor, skip, limit, descending=False)
     return users
 
 
@@ -32,11 +37,12 @@ def get_my_info(current_user: User = Depends(get_current_user)):
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user(user_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_user(user_id: int, db: Session = Depends(get_read_db), current_user: User = Depends(get_current_user)):
     # 只有管理员或本人可以查看用户信息
     if current_user.id != user_id and current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="权限不足")
-    user = db.query(User).filter(User.id == user_id).first()
+    # 查看本人时会话中已有身份缓存的快照，覆盖为数据库中的值
+    user = db.query(User).filter(User.id == user_id).populate_existing().first()
     if not user:
         raise HTTPException(status_code=404, detail="用户不存在")
     return user
@@ -53,7 +59,7 @@ def update_user(
     if current_user.id != user_id and current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="权限不足")
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.query(User).filter(User.id == user_id).populate_existing().first()
     if not user:
         raise HTTPException(status_code=404, detail="用户不存在")
 
@@ -68,6 +74,7 @@ def update_user(
         db.rollback()
         logger.error(f"操作失败: {str(e)}")
         raise HTTPException(status_code=500, detail="操作失败")
+    identity_cache.invalidate(user_id)
     return user
 
 
@@ -84,6 +91,7 @@ def delete_user(user_id: int, db: Session = Depends(get_db), current_user: User
         db.rollback()
         logger.error(f"操作失败: {str(e)}")
         raise HTTPException(status_code=500, detail="操作失败")
+    identity_cache.invalidate(user_id)
     return {"message": "用户删除成功"}
 
 
@@ -98,7 +106,8 @@ def update_balance(
     if amount == 0:
         raise HTTPException(status_code=400, detail="金额不能为零")
 
-    user = db.query(User).filter(User.id == user_id).first()
+    # 目标为本人时会话中已有身份缓存挂入的快照，加锁重新读取并覆盖为数据库中的值
+    user = db.query(User).filter(User.id == user_id).with_for_update().populate_existing().first()
     if not user:
         raise HTTPException(status_code=404, detail="用户不存在")
 
@@ -110,4 +119,5 @@ def update_balance(
         db.rollback()
         logger.error(f"操作失败: {str(e)}")
         raise HTTPException(status_code=500, detail="操作失败")
+    identity_cache.invalidate(user_id)
     return {"message": "余额更新成功", "new_balance": user.balance}
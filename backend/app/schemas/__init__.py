@@ -5,10 +5,12 @@ from app.schemas.activity import (  # noqa: F401
 )
 from app.schemas.boat import (  # noqa: F401
     BoatCreate, BoatResponse, BoatUpdate,
-    BoatRentalCreate, BoatRentalResponse, BoatReturn
+    BoatRentalCreate, BoatRentalResponse, BoatReturn,
+    BoatReservationCreate, BoatReservationResponse, BoatAvailabilityResponse
 )
 from app.schemas.finance import FinanceCreate, FinanceResponse, BalanceResponse, TransactionCreate  # noqa: F401
 from app.schemas.notice import NoticeCreate, NoticeResponse, NoticeUpdate  # noqa: F401
+from app.schemas.notification import NotificationResponse  # noqa: F401
 from app.schemas.forum import (  # noqa: F401
     PostCreate, PostResponse, PostUpdate,
     CommentCreate, CommentResponse, TagResponse
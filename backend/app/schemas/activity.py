@@ -1,6 +1,9 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional
 from datetime import datetime
+from sqlalchemy import inspect as sa_inspect
+from app.models.activity import AllocationMode
+from app.models.signup import SignupStatus
 from app.schemas.user import UserResponse
 
 
@@ -11,6 +14,7 @@ class ActivityBase(BaseModel):
     start_time: datetime
     end_time: datetime
     max_participants: int = Field(0, ge=0, description="最大参与人数不能为负数")
+    allocation_mode: AllocationMode = Field(AllocationMode.FCFS, description="fcfs 先到先得，ballot 抽签")
 
 
 class ActivityCreate(ActivityBase):
@@ -26,31 +30,91 @@ class ActivityUpdate(BaseModel):
     max_participants: Optional[int] = None
 
 
+class ActivitySignupCreate(BaseModel):
+    activity_id: int
+
+
+class ActivitySignupResponse(BaseModel):
+    id: int
+    activity_id: int
+    user_id: int
+    signup_time: datetime
+    check_in: bool
+    status: SignupStatus = SignupStatus.CONFIRMED
+    waitlist_position: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+
 class ActivityResponse(ActivityBase):
     id: int
     creator_id: int
     creator: Optional[UserResponse] = None
+    signup_count: int = 0
+    ballot_drawn_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
-    signups: list = []
+    # 仅在 ?include=signups 时返回报名列表，默认为 null，只返回 signup_count
+    signups: Optional[List[ActivitySignupResponse]] = None
 
     class Config:
         from_attributes = True
 
+    @model_validator(mode="before")
+    @classmethod
+    def skip_unloaded_signups(cls, data):
+        # 未预先加载的报名列表不触发懒加载（每个活动一次查询）
+        state = sa_inspect(data, raiseerr=False)
+        if state is not None and "signups" in state.unloaded:
+            return {name: getattr(data, name) for name in cls.model_fields if name != "signups"}
+        return data
 
-class ActivitySignupCreate(BaseModel):
-    activity_id: int
 
+class ScheduleItemResponse(BaseModel):
+    activity: ActivityResponse
+    signup: ActivitySignupResponse
 
-class ActivitySignupResponse(BaseModel):
-    id: int
-    activity_id: int
-    user_id: int
-    signup_time: datetime
-    check_in: bool
 
-    class Config:
-        from_attributes = True
+class CheckInTokenResponse(BaseModel):
+    token: str
+    expires_in: int
+
+
+class FeedTokenResponse(BaseModel):
+    token: str
+    expires_in: int
+    club_feed_url: str
+    my_feed_url: str
+
+
+class BatchCheckIn(BaseModel):
+    user_ids: List[int] = Field(default_factory=list, max_length=500)
+    tokens: List[str] = Field(default_factory=list, max_length=500)
+
+
+class BatchCheckInResult(BaseModel):
+    # 对应请求中的 user_id 或签到码
+    user_id: Optional[int] = None
+    token: Optional[str] = None
+    status: str  # checked_in / already_checked_in / not_signed_up / not_confirmed / invalid_token / duplicate
+
+
+class BatchCheckInResponse(BaseModel):
+    checked_in: int
+    results: List[BatchCheckInResult]
+
+
+class BallotDraw(BaseModel):
+    # 不传时随机生成，结果中返回种子供复核
+    seed: Optional[int] = Field(None, ge=0, lt=2 ** 63)
+
+
+class BallotDrawResponse(BaseModel):
+    activity_id: int
+    seed: int
+    confirmed: int
+    waitlisted: int
 
 
 class CheckIn(BaseModel):
@@ -1,7 +1,8 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
 from datetime import datetime
-from app.models.boat import BoatStatus
+from app.models.boat import BoatStatus, ReservationStatus
+from app.utils.timeslots import to_naive_utc
 
 
 class BoatBase(BaseModel):
@@ -39,18 +40,63 @@ class BoatRentalCreate(BaseModel):
     boat_id: int
 
 
-class BoatRentalResponse(BaseModel):
+class BoatRentalSummary(BaseModel):
     id: int
     boat_id: int
     user_id: int
     rental_time: datetime
     return_time: Optional[datetime] = None
     status: str
-    boat: Optional[BoatResponse] = None
 
     class Config:
         from_attributes = True
 
 
+class BoatRentalResponse(BoatRentalSummary):
+    boat: Optional[BoatResponse] = None
+
+
+class RentalHistoryResponse(BaseModel):
+    # 租借记录只带 boat_id，涉及的船只去重后单独列出
+    rentals: List[BoatRentalSummary]
+    boats: List[BoatResponse]
+
+
 class BoatReturn(BaseModel):
     rental_id: int
+
+
+class BoatReservationCreate(BaseModel):
+    start_time: datetime
+    end_time: datetime
+
+    @field_validator("start_time", "end_time")
+    @classmethod
+    def naive_utc(cls, value: datetime) -> datetime:
+        return to_naive_utc(value)
+
+
+class BoatReservationResponse(BaseModel):
+    id: int
+    boat_id: int
+    user_id: int
+    start_time: datetime
+    end_time: datetime
+    status: ReservationStatus
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class FreeSlot(BaseModel):
+    start_time: datetime
+    end_time: datetime
+
+
+class BoatAvailabilityResponse(BaseModel):
+    boat_id: int
+    name: str
+    status: BoatStatus
+    # 维护中的船只没有可预约时段
+    free: List[FreeSlot]
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from datetime import datetime
+
+
+class NotificationResponse(BaseModel):
+    id: int
+    user_id: int
+    title: str
+    content: str
+    is_read: bool
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,27 @@
+"""
+抽签分配
+
+抽签活动报名期内的报名只登记为 pending，不检查名额也不锁活动行；
+抽签时由 draw() 一次性决定录取名单和候补顺序。
+同样的报名记录和种子总是得到同样的结果，抽签结果可以复核。
+"""
+import random
+import secrets
+from typing import List, Sequence, Tuple
+
+
+def new_seed() -> int:
+    """生成随机种子（落在 BIGINT 范围内）"""
+    return secrets.randbits(63)
+
+
+def draw(entry_ids: Sequence[int], capacity: int, seed: int) -> Tuple[List[int], List[int]]:
+    """按种子打乱报名记录 id，前 capacity 个录取，其余按抽中顺序候补
+
+    capacity <= 0 表示不限人数，全部录取。
+    """
+    order = sorted(entry_ids)
+    random.Random(seed).shuffle(order)
+    if capacity <= 0:
+        return order, []
+    return order[:capacity], order[capacity:]
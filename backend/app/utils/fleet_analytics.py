@@ -0,0 +1,115 @@
+"""
+船只利用率分析
+
+租借记录按 rental_time 升序单次流式遍历，每条船只只保存"已占用到"的时间点，
+据此累计占用时长、最长空闲间隔和按周内小时划分的占用热力图。
+内存只与船只数量有关，与租借记录数无关。
+
+时间均为 UTC 无时区时间，区间左闭右开 [start, end)；未归还的租借视为占用到统计截止时间。
+同一船只的租借记录若有重叠，重叠部分只计一次。
+"""
+import math
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+HOURS_PER_WEEK = 7 * 24
+# 某个周一零点，作为周内小时的计算起点
+_MONDAY = datetime(2000, 1, 3)
+
+
+def _hours(delta: timedelta) -> float:
+    return delta.total_seconds() / 3600
+
+
+def add_to_heatmap(heatmap: List[float], start: datetime, end: datetime) -> None:
+    """把 [start, end) 按小时拆分累加到周内小时槽（下标 = weekday * 24 + hour）"""
+    # 换算为距 _MONDAY 的小时数后用浮点运算拆分，比逐小时构造 datetime 快得多
+    cursor = _hours(start - _MONDAY)
+    end_hours = _hours(end - _MONDAY)
+    weeks = int((end_hours - cursor) // HOURS_PER_WEEK)
+    if weeks:
+        # 整周的占用对每个槽贡献相同，直接批量累加
+        for slot in range(HOURS_PER_WEEK):
+            heatmap[slot] += weeks
+        cursor += weeks * HOURS_PER_WEEK
+    hour = math.floor(cursor)
+    while cursor < end_hours:
+        hour += 1
+        segment_end = min(hour, end_hours)
+        heatmap[(hour - 1) % HOURS_PER_WEEK] += segment_end - cursor
+        cursor = segment_end
+
+
+class _BoatUsage:
+    """单条船只的累计值"""
+
+    def __init__(self, window_start: datetime):
+        self.busy_until = window_start
+        self.rental_count = 0
+        self.busy = timedelta(0)
+        self.returned_count = 0
+        self.returned_duration = timedelta(0)
+        self.longest_idle: Optional[Tuple[datetime, datetime]] = None
+
+    def idle(self, start: datetime, end: datetime) -> None:
+        if end > start and (self.longest_idle is None or end - start > self.longest_idle[1] - self.longest_idle[0]):
+            self.longest_idle = (start, end)
+
+
+def analyze(rows: Iterable[Tuple[int, datetime, Optional[datetime]]], boat_ids: Iterable[int],
+            window_start: datetime, window_end: datetime) -> dict:
+    """统计 [window_start, window_end) 内各船只的利用率
+
+    rows 为 (boat_id, rental_time, return_time)，须按 rental_time 升序，包含所有与窗口重叠的租借；
+    window_end 不应晚于当前时间。不在 boat_ids 中的船只的记录被忽略。
+    """
+    usage = {boat_id: _BoatUsage(window_start) for boat_id in boat_ids}
+    heatmap = [0.0] * HOURS_PER_WEEK
+
+    for boat_id, rental_time, return_time in rows:
+        boat = usage.get(boat_id)
+        if boat is None:
+            continue
+        boat.rental_count += 1
+        if return_time is not None:
+            boat.returned_count += 1
+            boat.returned_duration += return_time - rental_time
+        start = max(rental_time, boat.busy_until)
+        end = min(return_time or window_end, window_end)
+        boat.idle(boat.busy_until, start)
+        if end > start:
+            boat.busy += end - start
+            add_to_heatmap(heatmap, start, end)
+            boat.busy_until = end
+
+    window_hours = max(_hours(window_end - window_start), 0.0)
+    boats = []
+    for boat_id, boat in usage.items():
+        boat.idle(boat.busy_until, window_end)
+        boats.append({
+            "boat_id": boat_id,
+            "rental_count": boat.rental_count,
+            "utilization_hours": round(_hours(boat.busy), 2),
+            "utilization_rate": round(_hours(boat.busy) / window_hours, 4) if window_hours else 0.0,
+            "mean_duration_hours": (
+                round(_hours(boat.returned_duration) / boat.returned_count, 2) if boat.returned_count else None
+            ),
+            "longest_idle_hours": round(_hours(boat.longest_idle[1] - boat.longest_idle[0]), 2)
+            if boat.longest_idle else 0.0,
+            "longest_idle_start": boat.longest_idle[0] if boat.longest_idle else None,
+            "longest_idle_end": boat.longest_idle[1] if boat.longest_idle else None,
+        })
+
+    busy = sum((boat.busy for boat in usage.values()), timedelta(0))
+    returned_count = sum(boat.returned_count for boat in usage.values())
+    returned_duration = sum((boat.returned_duration for boat in usage.values()), timedelta(0))
+    return {
+        "window_hours": round(window_hours, 2),
+        "rental_count": sum(boat.rental_count for boat in usage.values()),
+        "utilization_hours": round(_hours(busy), 2),
+        "utilization_rate": round(_hours(busy) / (window_hours * len(usage)), 4) if window_hours and usage else 0.0,
+        "mean_duration_hours": round(_hours(returned_duration) / returned_count, 2) if returned_count else None,
+        "boats": boats,
+        # heatmap[weekday][hour]：周一为 0，值为该周内小时的累计占用船只小时数
+        "heatmap": [[round(value, 2) for value in heatmap[day * 24:(day + 1) * 24]] for day in range(7)],
+    }
@@ -0,0 +1,167 @@
+"""
+进程内船只状态表
+
+船只数量很少而读取频繁（每次打开应用都要查可租船只），因此在进程内保存全部船只行的快照，
+首次读取时加载一次，之后列表和详情读取不访问数据库。
+
+写船只的端点在事务内 flush 后调用 stage / stage_delete 登记新快照，会话提交后才应用到状态表，
+回滚则丢弃。登记发生在持有行锁（SQLite 模式下为写锁）期间，序号顺序即同一船只的提交顺序，
+应用时跳过比已应用序号旧的快照，提交后线程调度的先后不会让旧状态覆盖新状态。
+
+状态表只立即反映本进程内的写入。其他 worker 进程（包括执行逾期清理的进程）或其他程序对
+boats 表的修改，要等快照超过 FLEET_BOARD_TTL_SECONDS 后下次读取时整体重新加载才可见，
+过期时间即读取到旧状态的上限。默认只在单节点 SQLite 模式下开启，FLEET_BOARD_ENABLED=False
+时回退为查询数据库。check 用于与表内容核对。
+"""
+import itertools
+import threading
+import time
+from typing import List, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.boat import Boat, BoatStatus
+
+_BOAT_COLUMNS = [attr.key for attr in inspect(Boat).column_attrs]
+_DELETED = None
+
+
+def _snapshot(boat: Boat) -> dict:
+    return {key: getattr(boat, key) for key in _BOAT_COLUMNS}
+
+
+class FleetBoard:
+    """船只快照表（线程安全），由提交事件更新"""
+
+    def __init__(self, enabled: bool, ttl: float = 0):
+        self.enabled = enabled
+        self.ttl = ttl
+        self._boats: dict = {}
+        # boat id -> 最后应用的登记序号；重新加载时保留，避免加载前登记的旧快照覆盖新状态
+        self._applied: dict = {}
+        self._loaded = False
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._sequence = itertools.count(1)
+        self.reads = 0
+        self.loads = 0
+        self.updates = 0
+
+    def _load(self, db: Session) -> None:
+        # 持锁加载：与加载并发提交的写入会在加载完成后按序号应用
+        self._boats = {boat.id: _snapshot(boat) for boat in db.query(Boat).all()}
+        self._loaded = True
+        self._loaded_at = time.monotonic()
+        self.loads += 1
+
+    def _ensure_loaded(self, db: Session) -> None:
+        # 调用方持锁；未加载或快照已过期时重新加载
+        if not self._loaded or (self.ttl and time.monotonic() - self._loaded_at >= self.ttl):
+            self._load(db)
+
+    def list(self, db: Session, status: Optional[BoatStatus] = None) -> List[dict]:
+        """按 id 升序返回船只快照，可按状态过滤"""
+        with self._lock:
+            self._ensure_loaded(db)
+            self.reads += 1
+            boats = sorted(self._boats.values(), key=lambda boat: boat["id"])
+        if status is not None:
+            boats = [boat for boat in boats if boat["status"] == status]
+        return boats
+
+    def get(self, db: Session, boat_id: int) -> Optional[dict]:
+        with self._lock:
+            self._ensure_loaded(db)
+            self.reads += 1
+            return self._boats.get(boat_id)
+
+    def stage(self, db: Session, boat: Boat) -> None:
+        """在写事务内登记船只的新状态，提交后生效；调用前会 flush 并重新读取该行"""
+        if not self.enabled:
+            return
+        db.flush()
+        # 重新读取以拿到数据库生成的 updated_at 和规范化后的列值（如 DECIMAL 租金）
+        db.refresh(boat)
+        self._stage(db, boat.id, _snapshot(boat))
+
+    def stage_delete(self, db: Session, boat_id: int) -> None:
+        if not self.enabled:
+            return
+        db.flush()
+        self._stage(db, boat_id, _DELETED)
+
+    def _stage(self, db: Session, boat_id: int, snapshot) -> None:
+        db.info.setdefault("fleet_board", []).append((next(self._sequence), boat_id, snapshot))
+
+    def apply(self, changes) -> None:
+        with self._lock:
+            for sequence, boat_id, snapshot in changes:
+                if sequence <= self._applied.get(boat_id, 0):
+                    continue
+                self._applied[boat_id] = sequence
+                self.updates += 1
+                # 未加载时也应用，加载会整体覆盖
+                if snapshot is _DELETED:
+                    self._boats.pop(boat_id, None)
+                else:
+                    self._boats[boat_id] = snapshot
+
+    def check(self, db: Session) -> dict:
+        """与 boats 表逐行核对，返回缺失、多余和不一致的船只 ID"""
+        table = {boat.id: _snapshot(boat) for boat in db.query(Boat).all()}
+        with self._lock:
+            board = dict(self._boats) if self._loaded else None
+        if board is None:
+            return {"loaded": False, "consistent": True, "missing": [], "extra": [], "mismatched": []}
+        missing = sorted(table.keys() - board.keys())
+        extra = sorted(board.keys() - table.keys())
+        mismatched = sorted(boat_id for boat_id in table.keys() & board.keys() if table[boat_id] != board[boat_id])
+        return {
+            "loaded": True,
+            "consistent": not (missing or extra or mismatched),
+            "missing": missing,
+            "extra": extra,
+            "mismatched": mismatched,
+        }
+
+    def invalidate(self) -> None:
+        """丢弃已加载的快照，下次读取时重新加载"""
+        with self._lock:
+            self._boats = {}
+            self._loaded = False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._boats = {}
+            self._applied = {}
+            self._loaded = False
+            self.reads = self.loads = self.updates = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "ttl_seconds": self.ttl,
+                "loaded": self._loaded,
+                "size": len(self._boats),
+                "reads": self.reads,
+                "loads": self.loads,
+                "updates": self.updates,
+            }
+
+
+fleet_board = FleetBoard(enabled=settings.FLEET_BOARD_ENABLED, ttl=settings.FLEET_BOARD_TTL_SECONDS)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_staged(session):
+    changes = session.info.pop("fleet_board", None)
+    if changes:
+        fleet_board.apply(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_staged(session):
+    session.info.pop("fleet_board", None)
@@ -0,0 +1,120 @@
+"""
+iCalendar（RFC 5545）订阅源生成
+
+日历应用定期轮询订阅地址，活动很少变化，因此：
+- 响应体逐个事件生成并分块输出，不在内存中拼接整个文件；
+- ETag / Last-Modified 由聚合查询（max(updated_at)、行数等）计算，
+  条件请求命中时直接返回 304，不读取活动明细。
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Iterator, Optional
+
+from fastapi import Request, Response
+
+PRODID = "-//UM Sailing//Activities//ZH"
+MEDIA_TYPE = "text/calendar; charset=utf-8"
+# 每块包含的事件数
+CHUNK_EVENTS = 50
+
+
+def _utc(value: datetime) -> datetime:
+    # 库中的无时区时间按 UTC 处理（SQLite 的 CURRENT_TIMESTAMP 即 UTC）
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _format_time(value: datetime) -> str:
+    return _utc(value).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _escape(text: str) -> str:
+    return (text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def _fold(line: str) -> str:
+    """按 RFC 5545 将超过 75 字节的行折行（续行以空格开头），不拆开多字节字符"""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts, current, size, limit = [], [], 0, 75
+    for char in line:
+        width = len(char.encode("utf-8"))
+        if size + width > limit:
+            parts.append("".join(current))
+            current, size, limit = [], 0, 74
+        current.append(char)
+        size += width
+    parts.append("".join(current))
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def render_event(activity, status: Optional[str] = None, host: str = "umsailing") -> str:
+    """渲染一个 VEVENT；status 为报名状态，未录取的报名标记为 TENTATIVE"""
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:activity-{activity.id}@{host}",
+        f"DTSTAMP:{_format_time(activity.updated_at or activity.created_at)}",
+        f"DTSTART:{_format_time(activity.start_time)}",
+        f"DTEND:{_format_time(activity.end_time)}",
+        f"SUMMARY:{_escape(activity.title)}",
+    ]
+    if activity.location:
+        lines.append(f"LOCATION:{_escape(activity.location)}")
+    if activity.description:
+        lines.append(f"DESCRIPTION:{_escape(activity.description)}")
+    if status is not None:
+        lines.append("STATUS:CONFIRMED" if status == "confirmed" else "STATUS:TENTATIVE")
+    lines.append("END:VEVENT")
+    return "".join(_fold(line) for line in lines)
+
+
+def stream_calendar(name: str, events: Iterable[str]) -> Iterator[bytes]:
+    """逐块输出日历文件，events 为已渲染的 VEVENT 文本"""
+    header = ["BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:{PRODID}", "CALSCALE:GREGORIAN",
+              f"X-WR-CALNAME:{_escape(name)}"]
+    yield "".join(_fold(line) for line in header).encode("utf-8")
+    chunk = []
+    for event in events:
+        chunk.append(event)
+        if len(chunk) >= CHUNK_EVENTS:
+            yield "".join(chunk).encode("utf-8")
+            chunk = []
+    chunk.append("END:VCALENDAR\r\n")
+    yield "".join(chunk).encode("utf-8")
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> Optional[Response]:
+    """按 If-None-Match（优先）或 If-Modified-Since 判断缓存是否仍然有效，有效时返回 304 响应"""
+    headers = validator_headers(etag, last_modified)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in tags or etag in tags:
+            return Response(status_code=304, headers=headers)
+        return None
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return None
+        if since.tzinfo is not None and _utc(last_modified).replace(microsecond=0) <= since:
+            return Response(status_code=304, headers=headers)
+    return None
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime]) -> dict:
+    # no-cache：客户端每次都用条件请求重新验证
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_utc(last_modified), usegmt=True)
+    return headers
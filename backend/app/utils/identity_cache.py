@@ -0,0 +1,85 @@
+"""
+进程内身份缓存
+
+按 JWT 中的 user_id 声明缓存用户行快照，避免每个认证请求都查询 users 表。
+缓存有容量上限（LRU 淘汰）和 TTL，修改用户或余额的端点提交后需调用 invalidate。
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.config import settings
+
+
+class IdentityCache:
+    """有界、按 TTL 过期的用户快照缓存（线程安全）"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, user_id: int) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, snapshot = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return snapshot
+
+    def set(self, user_id: int, snapshot: dict) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl_seconds, snapshot)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+identity_cache = IdentityCache(
+    max_size=settings.IDENTITY_CACHE_MAX_SIZE,
+    ttl_seconds=settings.IDENTITY_CACHE_TTL_SECONDS,
+)
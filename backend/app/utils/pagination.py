@@ -0,0 +1,101 @@
+"""
+游标（keyset）分页
+
+列表端点按「排序列 + id」排序，下一页游标为上一页最后一行这些列的值（base64 编码，对客户端不透明），
+查询条件为 (排序列, id) 严格位于游标之后，可直接走索引定位，深翻页与第一页成本相同。
+游标通过 X-Next-Cursor 响应头返回，响应体仍是列表，保持兼容；未传 cursor 时继续支持 skip/limit。
+
+SQLite 的日期时间列按文本存储、按字符串比较和排序，而且格式不统一：服务端默认值写入
+'YYYY-MM-DD HH:MM:SS'，ORM 写入带 6 位微秒。游标因此保存该列的原始文本并按文本原样绑定，
+与 ORDER BY 的比较方式一致；若改为绑定 datetime（总是带微秒），默认值写入的行会排在自身游标之后。
+"""
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, Response
+from sqlalchemy import DateTime, String, and_, or_, type_coerce
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, columns, stored_text: bool = False) -> list:
+    """解码游标；stored_text 为真时日期时间值校验后按原始文本绑定"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError(cursor)
+        decoded = []
+        for column, v in zip(columns, values):
+            if isinstance(column.type, DateTime):
+                parsed = datetime.fromisoformat(v)
+                v = type_coerce(v, String) if stored_text else parsed
+            decoded.append(v)
+        return decoded
+    except (ValueError, TypeError, UnicodeError):
+        raise HTTPException(status_code=400, detail="无效的分页游标")
+
+
+def _stored_as_text(query, columns) -> bool:
+    """日期时间列是否按文本存储比较（SQLite）"""
+    if not any(isinstance(column.type, DateTime) for column in columns):
+        return False
+    bind = query.session.bind or query.session.get_bind()
+    return bind.dialect.name == "sqlite"
+
+
+def _after(columns, values, descending: bool):
+    """(c1, c2, ...) 严格排在 (v1, v2, ...) 之后的条件，展开为可走索引范围扫描的形式"""
+    column, value = columns[0], values[0]
+    beyond = column < value if descending else column > value
+    if len(columns) == 1:
+        return beyond
+    reached = column <= value if descending else column >= value
+    return and_(reached, or_(beyond, _after(columns[1:], values[1:], descending)))
+
+
+def paginate(query, response: Response, columns, cursor: str = None,
+             skip: int = 0, limit: int = 100, descending: bool = True):
+    """按 columns（最后一列应为主键）排序取一页；满页时在响应头写入下一页游标
+
+    传入 cursor 时忽略 skip。
+    """
+    stored_text = _stored_as_text(query, columns)
+    if cursor:
+        query = query.filter(_after(columns, decode_cursor(cursor, columns, stored_text), descending))
+    query = query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+    if skip and not cursor:
+        query = query.offset(skip)
+    if not stored_text:
+        rows = query.limit(limit).all()
+        if limit and len(rows) == limit:
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(rows[-1], c.key) for c in columns])
+        return rows
+
+    # 同时取出排序列的原始文本作为游标
+    raw_columns = [type_coerce(c, String) if isinstance(c.type, DateTime) else c for c in columns]
+    result = query.add_columns(*raw_columns).limit(limit).all()
+    if limit and len(result) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(list(result[-1][1:]))
+    return [row[0] for row in result]
+
+
+def paginate_sorted(items, response: Response, column, cursor: str = None,
+                    skip: int = 0, limit: int = 100):
+    """对已按整数列 column 升序排列的内存列表（dict）分页，游标格式与 paginate 相同"""
+    if cursor:
+        (after,) = decode_cursor(cursor, [column])
+        if not isinstance(after, int):
+            raise HTTPException(status_code=400, detail="无效的分页游标")
+        items = [item for item in items if item[column.key] > after]
+    elif skip:
+        items = items[skip:]
+    page = items[:limit]
+    if limit and len(page) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([page[-1][column.key]])
+    return page
@@ -0,0 +1,82 @@
+"""
+bcrypt 进程池哈希服务
+
+bcrypt 每次计算都要占用数百毫秒 CPU，在线程池中执行会挤占其他端点的工作线程。
+这里把哈希/校验放到独立的进程池中执行，并限制排队深度，队列满时直接拒绝。
+"""
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.utils.security import hash_password, verify_password
+
+logger = logging.getLogger(__name__)
+
+
+class HashingQueueFull(Exception):
+    """哈希任务排队已满"""
+
+
+class PasswordHasher:
+    """有界的 bcrypt 哈希服务；workers 为 0 时退化为在线程池中执行"""
+
+    def __init__(self, workers: int, queue_depth: int):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # 使用 spawn，避免在多线程进程中 fork
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._in_flight >= self.queue_depth:
+                raise HashingQueueFull()
+            self._in_flight += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    async def _run(self, func, *args):
+        self._acquire()
+        try:
+            if self.workers <= 0:
+                return await run_in_threadpool(func, *args)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_depth=settings.PASSWORD_HASH_QUEUE_DEPTH,
+)
@@ -0,0 +1,84 @@
+"""
+逾期租借清理
+
+租出超过 RENTAL_OVERDUE_HOURS 仍未归还的租借按 RENTAL_OVERDUE_ACTION 处理：
+- flag：标记为 overdue，船只保持租出状态，用户仍可正常还船；
+- return：自动归还（包括此前已标记为 overdue 的租借），并释放没有其他未归还租借的船只。
+
+按 (status, rental_time) 索引分批取出逾期记录，每批一个短事务，以原状态为条件更新，
+与用户并发还船时不会重复处理。由调度器定时执行，也可直接调用。
+"""
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import exists, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.boat import Boat, BoatRental, BoatStatus
+from app.utils.fleet_board import fleet_board
+
+# 尚未归还的租借状态
+OUTSTANDING_STATUSES = ("active", "overdue")
+
+
+def _release_boats(db: Session, boat_ids: List[int]) -> int:
+    """把没有其他未归还租借的船只改回可租借，返回释放的船只数"""
+    still_out = exists().where(BoatRental.boat_id == Boat.id, BoatRental.status.in_(OUTSTANDING_STATUSES))
+    candidates = [boat_id for (boat_id,) in db.query(Boat.id).filter(
+        Boat.id.in_(boat_ids), Boat.status == BoatStatus.RENTED, ~still_out
+    )]
+    if not candidates:
+        return 0
+    released = db.execute(
+        update(Boat)
+        .where(Boat.id.in_(candidates), Boat.status == BoatStatus.RENTED, ~still_out)
+        .values(status=BoatStatus.AVAILABLE, version=Boat.version + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if fleet_board.enabled:
+        for boat in db.query(Boat).filter(Boat.id.in_(candidates)):
+            fleet_board.stage(db, boat)
+    return released
+
+
+def _sweep_status(db: Session, status: str, cutoff: datetime, now: datetime, auto_return: bool,
+                  batch_size: int, result: dict) -> None:
+    while True:
+        rows = db.query(BoatRental.id, BoatRental.boat_id).filter(
+            BoatRental.status == status,
+            BoatRental.rental_time < cutoff
+        ).order_by(BoatRental.rental_time).limit(batch_size).all()
+        if not rows:
+            db.rollback()
+            return
+        ids = [rental_id for rental_id, _ in rows]
+        values = {"status": "returned", "return_time": now} if auto_return else {"status": "overdue"}
+        changed = db.execute(
+            update(BoatRental)
+            .where(BoatRental.id.in_(ids), BoatRental.status == status)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if auto_return:
+            result["returned"] += changed
+            result["boats_released"] += _release_boats(db, sorted({boat_id for _, boat_id in rows}))
+        else:
+            result["flagged"] += changed
+        db.commit()
+        result["batches"] += 1
+        if len(rows) < batch_size:
+            return
+
+
+def sweep_overdue_rentals(db: Session, now: Optional[datetime] = None,
+                          batch_size: Optional[int] = None) -> dict:
+    """处理所有逾期租借，返回各项计数"""
+    now = now or datetime.utcnow()
+    batch_size = batch_size or settings.OVERDUE_SWEEP_BATCH_SIZE
+    cutoff = now - timedelta(hours=settings.RENTAL_OVERDUE_HOURS)
+    auto_return = settings.RENTAL_OVERDUE_ACTION == "return"
+    result = {"flagged": 0, "returned": 0, "boats_released": 0, "batches": 0}
+    for status in (OUTSTANDING_STATUSES if auto_return else ("active",)):
+        _sweep_status(db, status, cutoff, now, auto_return, batch_size, result)
+    return result
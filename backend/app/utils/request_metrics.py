@@ -0,0 +1,135 @@
+"""
+请求级性能指标
+
+每个请求在中间件中绑定一个 RequestMetrics，数据库引擎事件、认证依赖和路由处理器
+分别记录 SQL 语句数/耗时、SQLite 写锁排队时间、认证耗时和响应序列化耗时，最终写入 Server-Timing 响应头。
+"""
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+
+
+class RequestMetrics:
+    """单个请求（或一段代码）的耗时统计，时间单位为秒"""
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_time = 0.0
+        self.lock_wait = 0.0
+        self.auth_time = 0.0
+        self.serialize_time = 0.0
+        self.endpoint_done_at = None
+
+    def record_query(self, elapsed: float):
+        self.query_count += 1
+        self.db_time += elapsed
+
+    def record_lock_wait(self, elapsed: float):
+        self.lock_wait += elapsed
+
+    def server_timing(self, total: float) -> str:
+        return ", ".join([
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.query_count} queries"',
+            f"lock;dur={self.lock_wait * 1000:.2f}",
+            f"auth;dur={self.auth_time * 1000:.2f}",
+            f"serialize;dur={self.serialize_time * 1000:.2f}",
+            f"total;dur={total * 1000:.2f}",
+        ])
+
+    def as_dict(self) -> dict:
+        return {
+            "db_queries": self.query_count,
+            "db_ms": round(self.db_time * 1000, 2),
+            "lock_wait_ms": round(self.lock_wait * 1000, 2),
+            "auth_ms": round(self.auth_time * 1000, 2),
+            "serialize_ms": round(self.serialize_time * 1000, 2),
+        }
+
+
+# 同步端点在线程池中执行时会复制上下文，因此这里存放可变对象而不是计数值本身
+_current_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+
+def current_metrics() -> Optional[RequestMetrics]:
+    return _current_metrics.get()
+
+
+def bind_metrics(metrics: RequestMetrics):
+    return _current_metrics.set(metrics)
+
+
+def unbind_metrics(token):
+    _current_metrics.reset(token)
+
+
+@contextmanager
+def track_queries(engine):
+    """统计 with 块内指定引擎执行的 SQL 语句数和耗时，不依赖请求上下文（供测试和基准脚本使用）"""
+    metrics = RequestMetrics()
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["tracked_query_start"] = time.perf_counter()
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        # 监听器在语句执行中途注册时没有开始时间，跳过该语句
+        start = conn.info.pop("tracked_query_start", None)
+        if start is not None:
+            metrics.record_query(time.perf_counter() - start)
+
+    event.listen(engine, "before_cursor_execute", before)
+    event.listen(engine, "after_cursor_execute", after)
+    try:
+        yield metrics
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+        event.remove(engine, "after_cursor_execute", after)
+
+
+def _mark_endpoint_done():
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics.endpoint_done_at = time.perf_counter()
+
+
+def _timed_endpoint(endpoint):
+    """包装端点函数，记录端点返回的时间点；包装后的函数类型与原函数一致"""
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _mark_endpoint_done()
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                _mark_endpoint_done()
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """记录响应序列化耗时的路由：从端点返回到响应对象构建完成的时间"""
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            response = await handler(request)
+            metrics = current_metrics()
+            if metrics is not None and metrics.endpoint_done_at is not None:
+                metrics.serialize_time += time.perf_counter() - metrics.endpoint_done_at
+            return response
+
+        return timed_handler
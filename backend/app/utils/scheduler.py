@@ -0,0 +1,175 @@
+"""
+进程内后台定时任务
+
+调度器在一个守护线程中按固定间隔执行已注册的任务，由 main.py 的 lifespan 启动和停止。
+每个 worker 进程都运行自己的调度器；任务执行前先以条件更新抢占 job_leases 表中的租约，
+租约时长等于执行间隔且执行后不释放，因此多 worker 部署时每个间隔内只有一个进程执行该任务。
+租约时间取各进程的本机时钟，主机间时钟偏差应远小于执行间隔。
+"""
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.job_lease import JobLease
+
+logger = logging.getLogger(__name__)
+
+
+def acquire_lease(db: Session, name: str, owner: str, seconds: float, now: Optional[datetime] = None) -> bool:
+    """抢占任务租约并提交：租约不存在、已过期或本来就属于 owner 时成功"""
+    now = now or datetime.utcnow()
+    expires_at = now + timedelta(seconds=seconds)
+    acquired = db.execute(
+        update(JobLease)
+        .where(JobLease.name == name, or_(JobLease.owner == owner, JobLease.expires_at <= now))
+        .values(owner=owner, expires_at=expires_at, last_run_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not acquired:
+        if db.query(JobLease.name).filter(JobLease.name == name).first() is not None:
+            db.rollback()
+            return False
+        db.add(JobLease(name=name, owner=owner, expires_at=expires_at, last_run_at=now))
+    try:
+        db.commit()
+    except IntegrityError:
+        # 另一进程同时插入了同名租约
+        db.rollback()
+        return False
+    return True
+
+
+class Job:
+    """已注册的任务及其执行统计"""
+
+    def __init__(self, name: str, interval: float, func: Callable[[Session], dict]):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.next_run = 0.0
+        self.runs = 0
+        self.skipped = 0
+        self.failures = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_duration_ms: Optional[float] = None
+        self.last_result: Optional[dict] = None
+        self.last_error: Optional[str] = None
+        # 任务返回结果中数值项的累计值，例如累计处理的记录数
+        self.totals: Counter = Counter()
+
+
+class Scheduler:
+    """按间隔执行任务的后台线程（线程安全）"""
+
+    def __init__(self, session_factory=SessionLocal, owner: Optional[str] = None):
+        self.session_factory = session_factory
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._jobs: dict = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_job(self, name: str, interval: float, func: Callable[[Session], dict]) -> None:
+        """注册任务；func 接收一个会话，返回写入统计的结果字典，需自行提交"""
+        with self._lock:
+            self._jobs[name] = Job(name, interval, func)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="scheduler", daemon=True)
+        self._thread.start()
+        logger.info(f"后台任务调度器已启动: owner={self.owner}")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """通知线程退出并等待当前任务执行完"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self.run_pending()
+            with self._lock:
+                due = min((job.next_run for job in self._jobs.values()), default=time.monotonic() + 60)
+            self._stop.wait(max(due - time.monotonic(), 0.1))
+
+    def run_pending(self) -> None:
+        """执行所有已到期的任务"""
+        with self._lock:
+            due = [job for job in self._jobs.values() if job.next_run <= time.monotonic()]
+        for job in due:
+            if self._stop.is_set():
+                return
+            self.run_job(job.name)
+            job.next_run = time.monotonic() + job.interval
+
+    def run_job(self, name: str) -> bool:
+        """抢到租约时执行一次任务，返回是否执行；任务异常只记录，不向外抛出"""
+        job = self._jobs[name]
+        db = self.session_factory()
+        try:
+            if not acquire_lease(db, job.name, self.owner, job.interval):
+                job.skipped += 1
+                return False
+            start = time.perf_counter()
+            job.last_run_at = datetime.utcnow()
+            result = job.func(db) or {}
+            job.last_duration_ms = round((time.perf_counter() - start) * 1000, 2)
+            job.runs += 1
+            job.last_result = result
+            job.last_error = None
+            job.totals.update({key: value for key, value in result.items() if isinstance(value, int)})
+            logger.info(json.dumps({
+                "event": "job_run", "job": job.name, "duration_ms": job.last_duration_ms, **result
+            }, default=str))
+            return True
+        except Exception as e:
+            db.rollback()
+            job.failures += 1
+            job.last_error = str(e)
+            logger.error(f"后台任务 {job.name} 执行失败: {str(e)}")
+            return True
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            "running": self.running,
+            "owner": self.owner,
+            "jobs": [{
+                "name": job.name,
+                "interval_seconds": job.interval,
+                "runs": job.runs,
+                "skipped": job.skipped,
+                "failures": job.failures,
+                "last_run_at": job.last_run_at,
+                "last_duration_ms": job.last_duration_ms,
+                "last_result": job.last_result,
+                "last_error": job.last_error,
+                "totals": dict(job.totals),
+            } for job in jobs],
+        }
+
+
+scheduler = Scheduler()
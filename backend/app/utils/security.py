@@ -37,6 +37,25 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
 def decode_access_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except jwt.JWTError:
         return None
+    # 带 purpose 声明的是专用签名令牌（如签到码），不能用作访问令牌
+    if "purpose" in payload:
+        return None
+    return payload
+
+
+def create_signed_token(purpose: str, claims: dict, expires_delta: timedelta) -> str:
+    """签发专用令牌，只能由 decode_signed_token 按相同 purpose 验证，验证无需查询数据库"""
+    to_encode = dict(claims, purpose=purpose, exp=datetime.utcnow() + expires_delta)
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def decode_signed_token(token: str, purpose: str) -> dict:
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except jwt.JWTError:
+        return None
+    if payload.get("purpose") != purpose:
+        return None
+    return payload
@@ -0,0 +1,44 @@
+"""
+NDJSON 流式列表响应
+
+不分页的列表端点在请求头 Accept 含 application/x-ndjson 时改为流式输出：
+查询用 yield_per 分批读取（服务端游标，MySQL 下不会一次取回全部结果），
+每批序列化为每行一个 JSON 对象后立即写出。已写出的 ORM 对象不再被引用，
+内存占用只与批大小有关，与总行数无关。
+
+数据库连接在响应写完后（依赖清理时）才归还，因此只用于低频的管理/导出类端点。
+"""
+import logging
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_BATCH_SIZE = 500
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _ndjson_batches(query, schema, batch_size: int):
+    batch = []
+    try:
+        for row in query.yield_per(batch_size):
+            batch.append(schema.model_validate(row).model_dump_json())
+            if len(batch) >= batch_size:
+                yield ("\n".join(batch) + "\n").encode("utf-8")
+                batch = []
+    except Exception as e:
+        # 响应头已经发出，无法再返回错误状态码，客户端会收到截断的内容
+        logger.error(f"流式输出中断: {str(e)}")
+        raise
+    if batch:
+        yield ("\n".join(batch) + "\n").encode("utf-8")
+
+
+def ndjson_response(query, schema, batch_size: int = STREAM_BATCH_SIZE) -> StreamingResponse:
+    """按 schema 逐行序列化 query 的结果；query 应带确定的排序"""
+    return StreamingResponse(_ndjson_batches(query, schema, batch_size), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,42 @@
+"""
+预约时段计算
+
+时间统一为 UTC 无时区时间（与库中 CURRENT_TIMESTAMP 一致），区间均为左闭右开 [start, end)。
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Tuple
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    """带时区的时间转为 UTC 无时区时间，无时区的时间视为 UTC"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def is_aligned(value: datetime, slot_minutes: int) -> bool:
+    return value.second == 0 and value.microsecond == 0 and (value.hour * 60 + value.minute) % slot_minutes == 0
+
+
+def ceil_to_slot(value: datetime, slot_minutes: int) -> datetime:
+    """向后取整到时段边界"""
+    floor = value.replace(minute=0, second=0, microsecond=0) + timedelta(
+        minutes=value.minute // slot_minutes * slot_minutes
+    )
+    return floor if floor == value else floor + timedelta(minutes=slot_minutes)
+
+
+def free_slots(window_start: datetime, window_end: datetime,
+               busy: Iterable[Tuple[datetime, datetime]]) -> List[Tuple[datetime, datetime]]:
+    """窗口内未被占用的区间；busy 须按开始时间升序"""
+    free = []
+    cursor = window_start
+    for start, end in busy:
+        if start > cursor:
+            free.append((cursor, min(start, window_end)))
+        cursor = max(cursor, end)
+        if cursor >= window_end:
+            break
+    if cursor < window_end:
+        free.append((cursor, window_end))
+    return [(start, end) for start, end in free if start < end]
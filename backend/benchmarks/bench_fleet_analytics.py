@@ -0,0 +1,88 @@
+"""
+船只利用率分析基准
+
+在文件 SQLite 中生成若干年的租借记录（默认 20 条船、每天 30 次租借），
+直接调用 get_fleet_utilization，分别统计最近 90 天、1 年和全部年份的耗时。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_fleet_analytics --years 5 --per-day 30
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from benchmarks.common import setup_environment
+
+setup_environment()
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.database import Base  # noqa: E402
+from app.models.boat import Boat, BoatRental  # noqa: E402
+from app.models.user import User, UserRole  # noqa: E402
+from app.routers.stats import get_fleet_utilization  # noqa: E402
+
+
+def _seed(engine, boats: int, years: int, per_day: int, end: datetime):
+    rng = random.Random(42)
+    days = years * 365
+    start = end - timedelta(days=days)
+    rows = []
+    for day in range(days):
+        for _ in range(per_day):
+            rental_time = start + timedelta(days=day, hours=rng.randint(7, 18), minutes=rng.choice([0, 15, 30, 45]))
+            rows.append({"boat_id": rng.randint(1, boats), "user_id": 1, "rental_time": rental_time,
+                         "return_time": rental_time + timedelta(minutes=rng.randint(30, 240)), "status": "returned"})
+    rows.sort(key=lambda row: row["rental_time"])
+    with engine.begin() as conn:
+        for offset in range(0, len(rows), 50000):
+            conn.execute(insert(BoatRental), rows[offset:offset + 50000])
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--boats", type=int, default=20)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--per-day", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    now = datetime.utcnow()
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'analytics.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            admin = User(username="admin", email="admin@example.com", password_hash="x",
+                         role=UserRole.ADMIN, balance=0)
+            db.add(admin)
+            db.add_all([Boat(name=f"boat{i}", type="laser" if i % 2 else "keelboat",
+                             rental_price=Decimal("10.00")) for i in range(args.boats)])
+            db.commit()
+            db.refresh(admin)
+            db.expunge(admin)
+        total = _seed(engine, args.boats, args.years, args.per_day, now)
+        print(f"{total} 条租借记录，{args.boats} 条船")
+
+        print(f"{'范围':>10} {'船型':>10} {'记录数':>8} {'耗时(ms)':>10}")
+        for days in (90, 365, args.years * 365):
+            for boat_type in (None, "laser"):
+                timings = []
+                for _ in range(args.repeat):
+                    with Session() as db:
+                        start = time.perf_counter()
+                        result = get_fleet_utilization(window_start=now - timedelta(days=days), window_end=now,
+                                                       boat_type=boat_type, db=db, current_user=admin)
+                        timings.append((time.perf_counter() - start) * 1000)
+                print(f"{days:>8}天 {boat_type or '全部':>10} {result['rental_count']:>8} {min(timings):>10.1f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
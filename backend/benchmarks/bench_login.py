@@ -0,0 +1,89 @@
+"""
+登录吞吐基准：对比 bcrypt 在线程池中执行与交给进程池执行
+
+同时并发发起登录请求和 /health 探测请求，报告登录吞吐以及探测请求延迟，
+后者反映 bcrypt 是否挤占了其他端点的线程池工作线程。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_login --logins 64 --concurrency 16 --workers 2
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import setup_environment, make_memory_engine, override_db, summarize
+
+setup_environment()
+
+import bcrypt  # noqa: E402
+import httpx  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.models.user import User, UserRole  # noqa: E402
+from app.routers import auth  # noqa: E402
+from app.utils.password_hasher import PasswordHasher  # noqa: E402
+
+
+async def _run(logins: int, concurrency: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        semaphore = asyncio.Semaphore(concurrency)
+        probe_latencies = []
+        done = asyncio.Event()
+
+        async def login():
+            async with semaphore:
+                response = await client.post(
+                    "/api/auth/login", json={"username": "bench", "password": "password123"}
+                )
+                response.raise_for_status()
+
+        async def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/health")
+                probe_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.01)
+
+        probe_task = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await probe_task
+    return elapsed, probe_latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=2, help="进程池工作进程数")
+    args = parser.parse_args()
+
+    engine = make_memory_engine()
+    Session = override_db(app, engine)
+    with Session() as db:
+        db.add(User(
+            username="bench",
+            email="bench@example.com",
+            password_hash=bcrypt.hashpw(b"password123", bcrypt.gensalt()).decode("utf-8"),
+            role=UserRole.USER,
+            balance=0,
+        ))
+        db.commit()
+
+    for label, workers in (("线程池", 0), ("进程池", args.workers)):
+        hasher = PasswordHasher(workers=workers, queue_depth=args.logins)
+        auth.password_hasher = hasher
+        try:
+            elapsed, probes = asyncio.run(_run(args.logins, args.concurrency))
+        finally:
+            hasher.shutdown()
+        print(f"[{label}] workers={workers} 登录 {args.logins} 次，耗时 {elapsed:.2f}s，"
+              f"吞吐 {args.logins / elapsed:.1f} 次/秒")
+        print(f"    /health 探测延迟: {summarize(probes)}")
+
+
+if __name__ == "__main__":
+    main()
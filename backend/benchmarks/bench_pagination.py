@@ -0,0 +1,85 @@
+"""
+深翻页基准：OFFSET 分页与游标分页对比
+
+在文件 SQLite 中插入 --rows 条公告，分别在不同深度取一页（按 created_at DESC, id DESC），
+报告 OFFSET 方式与游标方式的取页耗时。游标方式的耗时应与深度无关。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_pagination --rows 1000000 --limit 20
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import setup_environment
+
+setup_environment()
+
+from fastapi import Response  # noqa: E402
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.database import Base  # noqa: E402
+from app.models.notice import Notice  # noqa: E402
+from app.utils.pagination import encode_cursor, paginate  # noqa: E402
+
+ORDER = [Notice.created_at, Notice.id]
+
+
+def _seed(engine, rows: int):
+    Base.metadata.create_all(bind=engine)
+    start = datetime(2020, 1, 1)
+    batch = 50000
+    with engine.begin() as conn:
+        for offset in range(0, rows, batch):
+            conn.execute(insert(Notice), [
+                # 每 10 行共用一个时间戳，覆盖并列排序的情况
+                {"title": f"notice {i}", "content": "bench", "created_at": start + timedelta(minutes=i // 10)}
+                for i in range(offset, min(offset + batch, rows))
+            ])
+
+
+def _time(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'pagination.db')}")
+        start = time.perf_counter()
+        _seed(engine, args.rows)
+        print(f"插入 {args.rows} 条公告，耗时 {time.perf_counter() - start:.1f}s")
+
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            query = db.query(Notice)
+            print(f"{'深度':>10} {'OFFSET(ms)':>12} {'游标(ms)':>10}")
+            for fraction in (0, 0.1, 0.5, 0.99):
+                depth = int(args.rows * fraction)
+                cursor = None
+                if depth:
+                    # 游标取自深度处的前一行（不计时）
+                    previous = query.order_by(Notice.created_at.desc(), Notice.id.desc()).offset(depth - 1).first()
+                    cursor = encode_cursor([previous.created_at, previous.id])
+                offset_ms = _time(lambda: paginate(query, Response(), ORDER, skip=depth, limit=args.limit), args.repeat)
+                cursor_ms = _time(lambda: paginate(query, Response(), ORDER, cursor=cursor, limit=args.limit), args.repeat)
+                print(f"{depth:>10} {offset_ms:>12.2f} {cursor_ms:>10.2f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+租船/还船并发基准：行锁实现与乐观并发实现对比
+
+多个线程（每个线程一个用户）在少量船只上循环"租船-还船"，分别使用：
+- 行锁：原实现，SELECT ... FOR UPDATE 锁船只和用户行后读改写；
+- 乐观并发：当前 rent_boat / return_boat，版本号比较并更新、余额条件扣减。
+报告吞吐、延迟、锁等待和失败分布。SQLite 下锁等待为进程内写锁的排队时间；
+MySQL 下为 Innodb_row_lock_time / Innodb_row_lock_waits 的增量。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_rent_concurrency --threads 8 --iterations 100 --boats 4
+    python -m benchmarks.bench_rent_concurrency --mysql-url mysql+pymysql://root:pw@localhost/bench
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from benchmarks.common import setup_environment, summarize
+
+setup_environment()
+
+from fastapi import HTTPException  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.database import Base, create_sqlite_engine, _create_server_engine  # noqa: E402
+from app.models.boat import Boat, BoatRental, BoatStatus  # noqa: E402
+from app.models.user import User, UserRole  # noqa: E402
+from app.routers import boats  # noqa: E402
+from app.schemas.boat import BoatReturn  # noqa: E402
+from app.utils.fleet_board import fleet_board  # noqa: E402
+from app.utils.request_metrics import RequestMetrics, bind_metrics, unbind_metrics  # noqa: E402
+
+
+def _rent_locking(db, boat_id, user):
+    """原实现：锁船只行和用户行后读改写"""
+    boat = db.query(Boat).filter(Boat.id == boat_id).with_for_update().first()
+    if boat.status != BoatStatus.AVAILABLE:
+        raise HTTPException(status_code=400, detail="船只不可租借")
+    now = datetime.utcnow()
+    reserved = boats._conflicting_reservation(db, boat_id, now, now + timedelta(microseconds=1))
+    if reserved is not None and reserved.user_id != user.id:
+        raise HTTPException(status_code=400, detail="船只当前时段已被预约")
+    locked_user = db.query(User).filter(User.id == user.id).with_for_update().populate_existing().first()
+    if locked_user.balance < boat.rental_price:
+        raise HTTPException(status_code=400, detail="余额不足")
+    rental = BoatRental(boat_id=boat_id, user_id=user.id, rental_time=now, status="active")
+    db.add(rental)
+    boat.status = BoatStatus.RENTED
+    locked_user.balance -= boat.rental_price
+    fleet_board.stage(db, boat)
+    db.commit()
+    return rental.id
+
+
+def _return_locking(db, rental_id, user):
+    rental = db.query(BoatRental).filter(
+        BoatRental.id == rental_id, BoatRental.status == "active"
+    ).with_for_update().first()
+    boat = db.query(Boat).filter(Boat.id == rental.boat_id).with_for_update().first()
+    rental.return_time = datetime.utcnow()
+    rental.status = "returned"
+    boat.status = BoatStatus.AVAILABLE
+    fleet_board.stage(db, boat)
+    db.commit()
+
+
+def _rent_optimistic(db, boat_id, user):
+    return boats.rent_boat(boat_id, db=db, current_user=user).id
+
+
+def _return_optimistic(db, rental_id, user):
+    boats.return_boat(BoatReturn(rental_id=rental_id), db=db, current_user=user)
+
+
+MODES = {
+    "行锁": (_rent_locking, _return_locking),
+    "乐观并发": (_rent_optimistic, _return_optimistic),
+}
+
+
+def _row_lock_status(engine):
+    if engine.dialect.name != "mysql":
+        return None
+    with engine.connect() as conn:
+        rows = conn.execute(text("SHOW GLOBAL STATUS LIKE 'Innodb_row_lock_%'")).all()
+    return {name: int(value) for name, value in rows}
+
+
+def _run(engine, mode, threads, iterations, boat_count):
+    rent, give_back = MODES[mode]
+    Base.metadata.create_all(bind=engine)
+    fleet_board.clear()
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add_all([Boat(name=f"boat{i}", type="laser", rental_price=Decimal("1.00")) for i in range(boat_count)])
+        users = [User(username=f"u{i}", email=f"u{i}@example.com", password_hash="x",
+                      role=UserRole.USER, balance=Decimal("100000")) for i in range(threads)]
+        db.add_all(users)
+        db.commit()
+        boat_ids = [boat_id for (boat_id,) in db.query(Boat.id)]
+        for user in users:
+            db.refresh(user)
+            db.expunge(user)
+
+    latencies = []
+    outcomes = Counter()
+    lock_wait = [0.0]
+    lock = threading.Lock()
+
+    def timed(action, *args):
+        metrics = RequestMetrics()
+        token = bind_metrics(metrics)
+        start = time.perf_counter()
+        try:
+            with Session() as db:
+                return action(db, *args)
+        finally:
+            elapsed = time.perf_counter() - start
+            unbind_metrics(token)
+            with lock:
+                latencies.append(elapsed)
+                lock_wait[0] += metrics.lock_wait
+
+    def worker(user, seed):
+        rng = random.Random(seed)
+        for _ in range(iterations):
+            try:
+                rental_id = timed(rent, rng.choice(boat_ids), user)
+            except HTTPException as e:
+                outcomes[f"租船 {e.status_code}"] += 1
+                continue
+            except Exception as e:
+                outcomes[type(e).__name__] += 1
+                continue
+            outcomes["租船成功"] += 1
+            try:
+                timed(give_back, rental_id, user)
+            except Exception as e:
+                outcomes[type(e).__name__] += 1
+
+    before = _row_lock_status(engine)
+    workers = [threading.Thread(target=worker, args=(user, i)) for i, user in enumerate(users)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    after = _row_lock_status(engine)
+
+    with Session() as db:
+        rented = db.query(Boat).filter(Boat.status == BoatStatus.RENTED).count()
+        spent = db.query(BoatRental).count()
+        balance = sum(b for (b,) in db.query(User.balance))
+    assert rented == 0, "所有船只都应已归还"
+    assert balance == Decimal("100000") * threads - spent, "扣费与租借记录数不一致"
+    Base.metadata.drop_all(bind=engine)
+
+    row_locks = None
+    if before is not None:
+        row_locks = {key: after[key] - before[key]
+                     for key in ("Innodb_row_lock_time", "Innodb_row_lock_waits") if key in after}
+    return elapsed, latencies, outcomes, lock_wait[0], row_locks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=100, help="每个线程的租船次数")
+    parser.add_argument("--boats", type=int, default=4)
+    parser.add_argument("--mysql-url", default=os.getenv("BENCH_MYSQL_URL"), help="可选，对比用的 MySQL 库")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engines = [("SQLite 生产模式", lambda mode: create_sqlite_engine(
+            f"sqlite:///{os.path.join(tmp, f'{mode}.db')}"
+        ).execution_options(sqlite_begin="IMMEDIATE"))]
+        if args.mysql_url:
+            engines.append(("MySQL", lambda mode: _create_server_engine(args.mysql_url)))
+
+        for label, make_engine in engines:
+            for mode in MODES:
+                engine = make_engine(mode)
+                elapsed, latencies, outcomes, lock_wait, row_locks = _run(
+                    engine, mode, args.threads, args.iterations, args.boats
+                )
+                engine.dispose()
+                print(f"[{label} / {mode}] {len(latencies)} 个事务，耗时 {elapsed:.2f}s，"
+                      f"吞吐 {len(latencies) / elapsed:.1f} 事务/秒")
+                print(f"    延迟: {summarize(latencies)}")
+                print(f"    写锁等待合计: {lock_wait * 1000:.1f} ms，结果: {dict(outcomes)}")
+                if row_locks is not None:
+                    print(f"    InnoDB 行锁: {row_locks}")
+
+
+if __name__ == "__main__":
+    main()
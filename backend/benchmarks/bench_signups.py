@@ -0,0 +1,119 @@
+"""
+并发报名基准：旧的「锁活动行 + COUNT(*)」流程与条件原子自增流程对比
+
+同时发起 N 个报名（每个用户一次），名额为 --capacity，报告每次报名的延迟分布、
+最终录取人数（用于确认没有超员）和候补人数。默认使用生产模式的文件 SQLite，
+传入 --mysql-url 时在 MySQL 上运行（行锁竞争在 MySQL 上更明显）。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_signups --signups 500 --capacity 100
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import setup_environment, summarize
+
+setup_environment(DB_POOL_SIZE=32, DB_MAX_OVERFLOW=512, DB_POOL_TIMEOUT=120, SQLITE_BUSY_TIMEOUT_MS=120000)
+
+from fastapi import HTTPException  # noqa: E402
+from sqlalchemy import func  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.database import Base, create_sqlite_engine, _create_server_engine  # noqa: E402
+from app.models.activity import Activity  # noqa: E402
+from app.models.signup import ActivitySignup, SignupStatus  # noqa: E402
+from app.models.user import User, UserRole  # noqa: E402
+from app.routers.activities import signup_activity  # noqa: E402
+from app.schemas.activity import ActivitySignupCreate  # noqa: E402
+
+
+def legacy_signup(signup_data, db, current_user):
+    """改造前的报名流程：锁定活动行后统计报名数"""
+    activity = db.query(Activity).filter(Activity.id == signup_data.activity_id).with_for_update().first()
+    existing = db.query(ActivitySignup).filter(
+        ActivitySignup.activity_id == signup_data.activity_id,
+        ActivitySignup.user_id == current_user.id
+    ).first()
+    if existing:
+        raise HTTPException(status_code=400, detail="已报名此活动")
+    count = db.query(ActivitySignup).filter(ActivitySignup.activity_id == signup_data.activity_id).count()
+    if activity.max_participants > 0 and count >= activity.max_participants:
+        raise HTTPException(status_code=400, detail="活动人数已满")
+    db.add(ActivitySignup(activity_id=signup_data.activity_id, user_id=current_user.id))
+    db.commit()
+
+
+def _run(engine, handler, signups: int, capacity: int):
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        users = [User(username=f"bench{i}", email=f"bench{i}@example.com", password_hash="x",
+                      role=UserRole.USER, balance=0) for i in range(signups)]
+        db.add_all(users)
+        activity = Activity(title="bench", start_time=datetime.utcnow() + timedelta(days=1),
+                            end_time=datetime.utcnow() + timedelta(days=1, hours=2),
+                            max_participants=capacity)
+        db.add(activity)
+        db.commit()
+        for user in users:
+            db.refresh(user)
+        activity_id = activity.id
+        db.expunge_all()
+
+    latencies = []
+    barrier = threading.Barrier(signups)
+    lock = threading.Lock()
+
+    def attempt(user):
+        barrier.wait()
+        start = time.perf_counter()
+        with Session() as db:
+            try:
+                handler(ActivitySignupCreate(activity_id=activity_id), db=db, current_user=user)
+            except HTTPException:
+                pass
+        with lock:
+            latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=attempt, args=(user,)) for user in users]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    with Session() as db:
+        counts = dict(db.query(ActivitySignup.status, func.count()).filter(
+            ActivitySignup.activity_id == activity_id
+        ).group_by(ActivitySignup.status).all())
+    Base.metadata.drop_all(bind=engine)
+    return latencies, counts.get(SignupStatus.CONFIRMED.value, 0), counts.get(SignupStatus.WAITLISTED.value, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--signups", type=int, default=500)
+    parser.add_argument("--capacity", type=int, default=100)
+    parser.add_argument("--mysql-url", default=os.getenv("BENCH_MYSQL_URL"))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.mysql_url:
+            engine = _create_server_engine(args.mysql_url)
+        else:
+            engine = create_sqlite_engine(
+                f"sqlite:///{os.path.join(tmp, 'signups.db')}"
+            ).execution_options(sqlite_begin="IMMEDIATE")
+
+        for label, handler in (("锁行 + COUNT(*)", legacy_signup), ("条件原子自增", signup_activity)):
+            latencies, confirmed, waitlisted = _run(engine, handler, args.signups, args.capacity)
+            print(f"[{label}] 录取 {confirmed}（名额 {args.capacity}），候补 {waitlisted}")
+            print(f"    延迟: {summarize(latencies)}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+写事务吞吐基准：默认配置的文件 SQLite、调优后的 SQLite 生产模式，以及可选的 MySQL
+
+每个线程循环执行与充值接口相同形状的事务（读取用户余额、更新余额、插入一条财务记录），
+报告吞吐、事务延迟和失败次数（默认配置下并发的读后写事务会因 database is locked 失败）。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_sqlite_writes --threads 8 --transactions 200
+    python -m benchmarks.bench_sqlite_writes --mysql-url mysql+pymysql://root:pw@localhost/bench
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+from benchmarks.common import setup_environment, summarize
+
+setup_environment()
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.database import Base, create_sqlite_engine, _create_server_engine  # noqa: E402
+from app.models.finance import Finance, FinanceType  # noqa: E402
+from app.models.user import User, UserRole  # noqa: E402
+
+
+def _run(engine, threads: int, transactions: int):
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add(User(username="bench", email="bench@example.com", password_hash="x",
+                    role=UserRole.USER, balance=Decimal("0")))
+        db.commit()
+        user_id = db.query(User.id).filter(User.username == "bench").scalar()
+
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(transactions):
+            start = time.perf_counter()
+            try:
+                with Session() as db:
+                    user = db.query(User).filter(User.id == user_id).with_for_update().one()
+                    user.balance = user.balance + Decimal("1")
+                    db.add(Finance(type=FinanceType.INCOME, amount=Decimal("1"),
+                                   description="bench", user_id=user_id))
+                    db.commit()
+            except Exception as e:
+                with lock:
+                    failures.append(type(e).__name__)
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    with Session() as db:
+        balance = db.query(User.balance).filter(User.id == user_id).scalar()
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+    return elapsed, latencies, failures, balance
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--transactions", type=int, default=200, help="每个线程的事务数")
+    parser.add_argument("--mysql-url", default=os.getenv("BENCH_MYSQL_URL"), help="可选，对比用的 MySQL 库")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        candidates = [
+            ("SQLite 默认", create_engine(
+                f"sqlite:///{os.path.join(tmp, 'default.db')}",
+                connect_args={"check_same_thread": False, "timeout": 5},
+            )),
+            ("SQLite 生产模式", create_sqlite_engine(
+                f"sqlite:///{os.path.join(tmp, 'tuned.db')}"
+            ).execution_options(sqlite_begin="IMMEDIATE")),
+        ]
+        if args.mysql_url:
+            candidates.append(("MySQL", _create_server_engine(args.mysql_url)))
+
+        total = args.threads * args.transactions
+        for label, engine in candidates:
+            elapsed, latencies, failures, balance = _run(engine, args.threads, args.transactions)
+            print(f"[{label}] {len(latencies)}/{total} 成功，耗时 {elapsed:.2f}s，"
+                  f"吞吐 {len(latencies) / elapsed:.1f} 事务/秒，最终余额 {balance}")
+            print(f"    延迟: {summarize(latencies)}")
+            if failures:
+                print(f"    失败: {len(failures)} 次（{', '.join(sorted(set(failures)))}）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+启动耗时基准
+
+1. 在全新子进程中测量 import app.main / import app.utils.password_hasher（密码哈希子进程的导入）耗时，
+   并用 -X importtime 列出最慢的 app.* 模块；
+2. 对已初始化的文件 SQLite 库，对比旧的启动建表（create_all）与结构版本检查的耗时和 SQL 语句数；
+3. 在子进程中测量从启动解释器到第一个请求返回的总耗时。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import setup_environment
+
+setup_environment()
+
+from sqlalchemy import create_engine  # noqa: E402
+
+from app.database import Base  # noqa: E402
+from app.migrations import check_schema_version, migrate  # noqa: E402
+from app.utils.request_metrics import track_queries  # noqa: E402
+
+_IMPORT_SNIPPET = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+_FIRST_REQUEST_SNIPPET = """
+import time
+t = time.perf_counter()
+from fastapi.testclient import TestClient
+from app.main import app
+with TestClient(app) as client:
+    client.get("/health").raise_for_status()
+print(time.perf_counter() - t)
+"""
+
+
+def _child(code: str, env: dict) -> float:
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _median_ms(samples):
+    return round(statistics.median(samples) * 1000, 1)
+
+
+def _slowest_app_modules(env: dict, top: int):
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        self_us, cumulative_us, name = self_us.strip(), cumulative_us.strip(), name.strip()
+        if name.split(".")[0] == "app":
+            rows.append((int(cumulative_us), int(self_us), name))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "startup.db")
+        env = {k: v for k, v in os.environ.items() if k != "TESTING"}
+        env.update({"DB_BACKEND": "sqlite", "SQLITE_PATH": db_path, "PASSWORD_HASH_WORKERS": "0"})
+
+        engine = create_engine(f"sqlite:///{db_path}")
+        migrate(engine)
+        engine.dispose()
+
+        for module in ("app.main", "app.utils.password_hasher"):
+            samples = [_child(_IMPORT_SNIPPET.format(module=module), env) for _ in range(args.runs)]
+            print(f"import {module}: 中位数 {_median_ms(samples)} ms")
+
+        print(f"最慢的 {args.top} 个 app 模块（累计 / 自身，微秒）:")
+        for cumulative, self_time, name in _slowest_app_modules(env, args.top):
+            print(f"    {name:<40} {cumulative:>8} / {self_time:>8}")
+
+        for label, boot in (("create_all", lambda e: Base.metadata.create_all(bind=e)),
+                            ("结构版本检查", check_schema_version)):
+            samples = []
+            for _ in range(args.runs):
+                engine = create_engine(f"sqlite:///{db_path}")
+                with track_queries(engine) as metrics:
+                    start = time.perf_counter()
+                    boot(engine)
+                    samples.append(time.perf_counter() - start)
+                engine.dispose()
+            print(f"启动检查 [{label}]: 中位数 {_median_ms(samples)} ms，{metrics.query_count} 条 SQL")
+
+        samples = [_child(_FIRST_REQUEST_SNIPPET, env) for _ in range(args.runs)]
+        print(f"启动到第一个请求返回: 中位数 {_median_ms(samples)} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+大列表内存基准：JSON 列表与 NDJSON 流式输出对比
+
+在文件 SQLite 中逐步插入租借记录，在不同行数下分别以两种模式调用 get_all_rentals，
+用 tracemalloc 记录从查询到响应体全部生成完毕的内存峰值。JSON 列表模式的峰值随行数线性增长，
+流式模式的峰值只与批大小有关。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_streaming --rows 10000 50000 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List
+
+from benchmarks.common import setup_environment
+
+setup_environment()
+
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+
+from app.database import Base  # noqa: E402
+from app.models.boat import Boat, BoatRental  # noqa: E402
+from app.models.user import User, UserRole  # noqa: E402
+from app.routers.boats import get_all_rentals  # noqa: E402
+from app.schemas.boat import BoatRentalResponse  # noqa: E402
+from app.utils.streaming import NDJSON_MEDIA_TYPE  # noqa: E402
+
+RENTALS = TypeAdapter(List[BoatRentalResponse])
+
+
+def _request(accept: str) -> Request:
+    return Request({"type": "http", "method": "GET", "headers": [(b"accept", accept.encode())]})
+
+
+def _seed(engine, start: int, stop: int):
+    base = datetime(2020, 1, 1)
+    batch = 50000
+    with engine.begin() as conn:
+        for offset in range(start, stop, batch):
+            conn.execute(insert(BoatRental), [
+                {"boat_id": 1 + i % 20, "user_id": 1, "rental_time": base + timedelta(hours=i),
+                 "return_time": base + timedelta(hours=i, minutes=90), "status": "returned"}
+                for i in range(offset, min(offset + batch, stop))
+            ])
+
+
+def _list_mode(db, admin):
+    # 与 FastAPI 处理 response_model 的过程一致：校验为模型、转为 JSON 兼容对象、整体编码
+    rentals = get_all_rentals(_request("application/json"), db=db, current_user=admin)
+    body = json.dumps(RENTALS.dump_python(RENTALS.validate_python(rentals, from_attributes=True), mode="json"))
+    return len(body)
+
+
+def _stream_mode(db, admin):
+    response = get_all_rentals(_request(NDJSON_MEDIA_TYPE), db=db, current_user=admin)
+
+    async def drain():
+        size = 0
+        async for chunk in response.body_iterator:
+            size += len(chunk)
+        return size
+
+    return asyncio.run(drain())
+
+
+def _measure(Session, admin, mode):
+    with Session() as db:
+        tracemalloc.start()
+        start = time.perf_counter()
+        size = mode(db, admin)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return peak / 1024 / 1024, elapsed, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 50000, 100000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'streaming.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            admin = User(username="admin", email="admin@example.com", password_hash="x",
+                         role=UserRole.ADMIN, balance=0)
+            db.add(admin)
+            db.add_all([Boat(name=f"boat{i}", type="laser", rental_price=Decimal("10.00")) for i in range(20)])
+            db.commit()
+            db.refresh(admin)
+            db.expunge(admin)
+
+        print(f"{'行数':>8} {'列表峰值(MB)':>14} {'流式峰值(MB)':>14} {'列表(s)':>9} {'流式(s)':>9}")
+        seeded = 0
+        for rows in sorted(args.rows):
+            _seed(engine, seeded, rows)
+            seeded = rows
+            list_peak, list_time, list_size = _measure(Session, admin, _list_mode)
+            stream_peak, stream_time, _ = _measure(Session, admin, _stream_mode)
+            print(f"{rows:>8} {list_peak:>14.1f} {stream_peak:>14.1f} {list_time:>9.2f} {stream_time:>9.2f}"
+                  f"   (JSON {list_size / 1024 / 1024:.1f} MB)")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
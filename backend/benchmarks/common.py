@@ -0,0 +1,85 @@
+"""
+基准测试共用工具
+
+基准脚本在进程内运行应用（httpx + ASGITransport），数据库使用本地 SQLite，
+必须在导入 app 之前调用 setup_environment()。
+"""
+import os
+import statistics
+
+
+def setup_environment(**overrides):
+    """设置测试环境变量，必须在导入 app 之前调用"""
+    os.environ.setdefault("TESTING", "true")
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+    for key, value in overrides.items():
+        os.environ[key] = str(value)
+
+
+def make_memory_engine():
+    """创建所有线程共享同一连接的内存 SQLite 引擎，并建表"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import StaticPool
+
+    from app.database import Base
+    import app.models  # noqa: F401
+
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def override_db(app, engine, replicas=None, synchronous=False):
+    """让应用的 get_db 依赖使用指定引擎（可选传入只读副本引擎列表，参数含义同 ReplicaSet）"""
+    from sqlalchemy.orm import sessionmaker
+
+    from app.database import ReplicaSet, RoutingSession, get_db
+
+    Session = sessionmaker(
+        class_=RoutingSession, autocommit=False, autoflush=False, bind=engine,
+        replicas=ReplicaSet(replicas, check_interval=60, synchronous=synchronous) if replicas else None,
+    )
+
+    def _get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = _get_db
+    return Session
+
+
+def parse_server_timing(header: str) -> dict:
+    """把 Server-Timing 响应头解析为 {名称: 秒}"""
+    timings = {}
+    for part in header.split(","):
+        name, *params = [p.strip() for p in part.split(";")]
+        for param in params:
+            if param.startswith("dur="):
+                timings[name] = float(param[4:]) / 1000
+    return timings
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    """返回毫秒单位的延迟摘要"""
+    return {
+        "count": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 2) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+    }
@@ -0,0 +1,155 @@
+"""
+报名洪峰压测场景：名额有限的活动开放报名时全员同时抢报
+
+在进程内运行应用（httpx.AsyncClient + ASGITransport），使用本地文件 SQLite（生产模式引擎）
+或 --mysql-url 指定的库，预先写入 --users 个用户和一个名额为 --capacity 的活动，
+所有用户同时 POST /api/activities/signup（在途请求数由 --concurrency 限制，相当于服务器的
+--limit-concurrency；响应发送前每个请求仍占用一个数据库连接，在途请求数超过连接池大小时
+请求会排队等待连接直到 DB_POOL_TIMEOUT）。报告吞吐、延迟 p50/p95/p99、
+写锁等待和数据库耗时（取自 Server-Timing 响应头），以及最终报名数与名额的对比。
+出现超员时以非零状态退出，可作为发布前检查。
+
+--ballot 时活动为抽签报名：洪峰期间只登记，结束后由活动创建者调用一次抽签，另外报告抽签耗时。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.stampede_signups --users 1000 --capacity 100
+    python -m benchmarks.stampede_signups --users 1000 --capacity 100 --ballot
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from benchmarks.common import setup_environment, override_db, parse_server_timing, summarize
+
+setup_environment(
+    DB_POOL_SIZE=80, DB_MAX_OVERFLOW=0, DB_POOL_TIMEOUT=300,
+    SQLITE_BUSY_TIMEOUT_MS=300000, PASSWORD_HASH_WORKERS=0,
+)
+
+import httpx  # noqa: E402
+from anyio import to_thread  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.database import Base, create_sqlite_engine, _create_server_engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.activity import Activity, AllocationMode  # noqa: E402
+from app.models.signup import ActivitySignup, SignupStatus  # noqa: E402
+from app.models.user import User, UserRole  # noqa: E402
+from app.utils.security import create_access_token  # noqa: E402
+
+
+def _seed(Session, users: int, capacity: int, allocation_mode: AllocationMode):
+    with Session() as db:
+        members = [User(username=f"member{i}", email=f"member{i}@example.com", password_hash="x",
+                        role=UserRole.USER, balance=0) for i in range(users)]
+        db.add_all(members)
+        activity = Activity(title="开放报名的赛事", start_time=datetime.utcnow() + timedelta(days=7),
+                            end_time=datetime.utcnow() + timedelta(days=7, hours=4),
+                            max_participants=capacity, allocation_mode=allocation_mode.value)
+        db.add(activity)
+        db.flush()
+        activity.creator_id = members[0].id
+        db.commit()
+        tokens = [
+            create_access_token({"sub": m.username, "user_id": m.id, "role": m.role.value})
+            for m in members
+        ]
+        return activity.id, tokens
+
+
+async def _stampede(activity_id: int, tokens, concurrency: int, ballot: bool):
+    to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, lock_waits, db_times, statuses = [], [], [], Counter()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://stampede", timeout=None) as client:
+
+        async def signup(token):
+            # 延迟包含在客户端排队的时间
+            start = time.perf_counter()
+            async with semaphore:
+                response = await client.post(
+                    "/api/activities/signup",
+                    json={"activity_id": activity_id},
+                    headers={"Authorization": f"Bearer {token}"},
+                )
+                latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+            timings = parse_server_timing(response.headers.get("Server-Timing", ""))
+            lock_waits.append(timings.get("lock", 0.0))
+            db_times.append(timings.get("db", 0.0))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(signup(token) for token in tokens))
+        elapsed = time.perf_counter() - start
+
+        draw_elapsed = None
+        if ballot:
+            # tokens[0] 是活动创建者
+            start = time.perf_counter()
+            response = await client.post(
+                f"/api/activities/{activity_id}/ballot/draw",
+                headers={"Authorization": f"Bearer {tokens[0]}"},
+            )
+            draw_elapsed = time.perf_counter() - start
+            response.raise_for_status()
+    return elapsed, draw_elapsed, latencies, lock_waits, db_times, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--capacity", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=64, help="同时在途的请求数，应小于连接池大小")
+    parser.add_argument("--ballot", action="store_true", help="抽签报名，洪峰结束后统一抽签")
+    parser.add_argument("--mysql-url", default=os.getenv("BENCH_MYSQL_URL"))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.mysql_url:
+            engine = _create_server_engine(args.mysql_url)
+            replicas = None
+        else:
+            # 与生产 SQLite 模式相同：写引擎排队获取写锁，普通引擎作为只读副本
+            reader = create_sqlite_engine(f"sqlite:///{os.path.join(tmp, 'stampede.db')}")
+            engine = reader.execution_options(sqlite_begin="IMMEDIATE")
+            replicas = [reader]
+        Base.metadata.create_all(bind=engine)
+        Session = override_db(app, engine, replicas, synchronous=replicas is not None)
+        mode = AllocationMode.BALLOT if args.ballot else AllocationMode.FCFS
+        activity_id, tokens = _seed(Session, args.users, args.capacity, mode)
+
+        elapsed, draw_elapsed, latencies, lock_waits, db_times, statuses = asyncio.run(
+            _stampede(activity_id, tokens, args.concurrency, args.ballot)
+        )
+
+        with Session() as db:
+            rows = db.query(ActivitySignup).filter(
+                ActivitySignup.activity_id == activity_id,
+                ActivitySignup.status == SignupStatus.CONFIRMED.value
+            ).count()
+            counter = db.get(Activity, activity_id).signup_count
+        if args.mysql_url:
+            Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+    print(f"请求 {len(latencies)} 个，耗时 {elapsed:.2f}s，吞吐 {len(latencies) / elapsed:.1f} 请求/秒")
+    print(f"状态码: {dict(sorted(statuses.items()))}")
+    print(f"延迟: {summarize(latencies)}")
+    print(f"写锁等待: {summarize(lock_waits)}")
+    print(f"数据库耗时: {summarize(db_times)}")
+    if draw_elapsed is not None:
+        print(f"抽签耗时 {draw_elapsed * 1000:.1f}ms")
+    print(f"录取记录 {rows}，signup_count {counter}，名额 {args.capacity}")
+    if rows > args.capacity or counter != rows:
+        print("超员或计数不一致！")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
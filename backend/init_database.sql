@@ -30,11 +30,18 @@ CREATE TABLE IF NOT EXISTS activities (
     start_time DATETIME NOT NULL,
     end_time DATETIME NOT NULL,
     max_participants INT DEFAULT 0,
+    signup_count INT NOT NULL DEFAULT 0,
+    allocation_mode VARCHAR(20) NOT NULL DEFAULT 'fcfs',
+    ballot_drawn_at DATETIME,
+    ballot_seed BIGINT,
+    waitlist_tail INT NOT NULL DEFAULT 0,
     creator_id INT,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (creator_id) REFERENCES users(id) ON DELETE SET NULL,
-    INDEX idx_start_time (start_time)
+    INDEX ix_activities_start_time (start_time),
+    INDEX ix_activities_start_time_end_time (start_time, end_time),
+    INDEX ix_activities_updated_at (updated_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- 船只表
@@ -48,6 +55,7 @@ CREATE TABLE IF NOT EXISTS boats (
     description TEXT,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    version INT NOT NULL DEFAULT 0,
     INDEX idx_status (status)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
@@ -62,7 +70,26 @@ CREATE TABLE IF NOT EXISTS boats_rentals (
     FOREIGN KEY (boat_id) REFERENCES boats(id) ON DELETE CASCADE,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     INDEX idx_boat_id (boat_id),
-    INDEX idx_user_id (user_id)
+    INDEX ix_boats_rentals_user_id_status (user_id, status),
+    INDEX ix_boats_rentals_rental_time (rental_time, boat_id, return_time),
+    INDEX ix_boats_rentals_return_time (return_time, rental_time, boat_id),
+    INDEX ix_boats_rentals_status_rental_time (status, rental_time)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 船只预约表（同一船只的有效预约时段互不重叠）
+CREATE TABLE IF NOT EXISTS boat_reservations (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    boat_id INT NOT NULL,
+    user_id INT NOT NULL,
+    start_time DATETIME NOT NULL,
+    end_time DATETIME NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'active',
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (boat_id) REFERENCES boats(id) ON DELETE CASCADE,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    INDEX ix_boat_reservations_boat_id_status_start_time (boat_id, status, start_time),
+    INDEX ix_boat_reservations_status_start_time (status, start_time, end_time),
+    INDEX ix_boat_reservations_user_id_start_time (user_id, start_time)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- 财务表
@@ -74,8 +101,9 @@ CREATE TABLE IF NOT EXISTS finances (
     description TEXT,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL,
-    INDEX idx_user_id (user_id),
-    INDEX idx_type (type)
+    INDEX ix_finances_user_id_created_at (user_id, created_at),
+    INDEX ix_finances_type_created_at (type, created_at),
+    INDEX ix_finances_created_at (created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- 通知公告表
@@ -86,7 +114,8 @@ CREATE TABLE IF NOT EXISTS notices (
     author_id INT,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    FOREIGN KEY (author_id) REFERENCES users(id) ON DELETE SET NULL
+    FOREIGN KEY (author_id) REFERENCES users(id) ON DELETE SET NULL,
+    INDEX ix_notices_created_at (created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- 标签表
@@ -107,7 +136,8 @@ CREATE TABLE IF NOT EXISTS posts (
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     FOREIGN KEY (tag_id) REFERENCES tags(id) ON DELETE SET NULL,
     INDEX idx_user_id (user_id),
-    INDEX idx_tag_id (tag_id)
+    INDEX ix_posts_tag_id_created_at (tag_id, created_at),
+    INDEX ix_posts_created_at (created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- 评论表
@@ -119,7 +149,7 @@ CREATE TABLE IF NOT EXISTS comments (
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (post_id) REFERENCES posts(id) ON DELETE CASCADE,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-    INDEX idx_post_id (post_id)
+    INDEX ix_comments_post_id_created_at (post_id, created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- 活动报名表
@@ -129,13 +159,44 @@ CREATE TABLE IF NOT EXISTS activity_signups (
     user_id INT,
     signup_time DATETIME DEFAULT CURRENT_TIMESTAMP,
     check_in BOOLEAN DEFAULT FALSE,
+    status VARCHAR(20) NOT NULL DEFAULT 'confirmed',
+    waitlist_position INT,
     FOREIGN KEY (activity_id) REFERENCES activities(id) ON DELETE CASCADE,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     UNIQUE KEY unique_signup (activity_id, user_id),
     INDEX idx_activity_id (activity_id),
-    INDEX idx_user_id (user_id)
+    INDEX ix_activity_signups_user_id (user_id),
+    INDEX ix_activity_signups_waitlist (activity_id, status, waitlist_position)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- 站内通知表（发给单个用户，如候补转正）
+CREATE TABLE IF NOT EXISTS notifications (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    title VARCHAR(100) NOT NULL,
+    content TEXT NOT NULL,
+    is_read BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    INDEX ix_notifications_user_id_created_at (user_id, created_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 后台任务租约（多 worker 部署时同一任务只由持有未过期租约的进程执行）
+CREATE TABLE IF NOT EXISTS job_leases (
+    name VARCHAR(100) PRIMARY KEY,
+    owner VARCHAR(100) NOT NULL,
+    expires_at DATETIME NOT NULL,
+    last_run_at DATETIME
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 数据库结构版本（与 app/migrations.py 中的 SCHEMA_VERSION 一致，服务启动时核对）
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INT PRIMARY KEY,
+    applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT IGNORE INTO schema_version (version) VALUES (13);
+
 -- 插入默认管理员
 INSERT INTO users (username, password_hash, email, role, balance)
 VALUES ('admin', '$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/X4.Ey.1TnlI8zfuhe', 'admin@uma.edu.mo', 'admin', 0.00);
@@ -1,8 +1,10 @@
 """
 初始化数据库脚本
-运行此脚本创建所有表并添加初始数据
+运行此脚本创建所有表、执行结构迁移并添加初始数据
+服务启动时不再建表，部署新版本前需先运行此脚本
 """
-from app.database import engine, Base
+from app.database import engine
+from app.migrations import migrate
 from app.models import *
 from app.models.user import UserRole
 from app.utils.security import hash_password
@@ -19,9 +21,9 @@ import app.models.signup
 
 
 def init_db():
-    # 创建所有表
-    Base.metadata.create_all(bind=engine)
-    print("数据库表创建完成")
+    # 创建缺失的表并执行结构迁移，记录 schema_version
+    version = migrate(engine)
+    print(f"数据库表创建完成，结构版本 {version}")
 
 
 def create_default_admin():
@@ -9,6 +9,12 @@ import bcrypt
 # 设置测试环境变量 - 必须在导入 app 之前设置
 os.environ["TESTING"] = "true"
 os.environ["SECRET_KEY"] = "test-secret-key-for-testing"
+# 测试库由 fixture 建表，不走启动时的结构版本检查
+os.environ["SCHEMA_CHECK_ON_STARTUP"] = "false"
+# 后台任务由测试直接调用，不随 TestClient 的 lifespan 启动
+os.environ["SCHEDULER_ENABLED"] = "false"
+# 测试使用 SQLite 测试库，但配置默认为 MySQL，显式开启船只状态表
+os.environ["FLEET_BOARD_ENABLED"] = "true"
 
 # 导入相关模块
 from sqlalchemy import create_engine
@@ -40,11 +46,15 @@ from app.database import Base, get_db
 from app.models.user import User, UserRole  # noqa: F401
 from app.models.activity import Activity  # noqa: F401
 from app.models.signup import ActivitySignup  # noqa: F401
-from app.models.boat import Boat, BoatStatus, BoatRental  # noqa: F401
+from app.models.boat import Boat, BoatStatus, BoatRental, BoatReservation  # noqa: F401
 from app.models.finance import Finance, FinanceType  # noqa: F401
 from app.models.notice import Notice  # noqa: F401
+from app.models.notification import Notification  # noqa: F401
 from app.models.forum import Post, Comment, Tag  # noqa: F401
 from app.utils.security import create_access_token
+from app.utils.identity_cache import identity_cache
+from app.utils.fleet_board import fleet_board
+from app.utils.request_metrics import track_queries
 from app.config import settings
 
 # 使用自定义的 hash_password
@@ -89,9 +99,24 @@ def client(db_session) -> Generator:
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    # 每个测试都会重建数据库，用户 ID 会重复，必须清空身份缓存和船只状态表
+    identity_cache.clear()
+    fleet_board.clear()
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
+    identity_cache.clear()
+    fleet_board.clear()
+
+
+@pytest.fixture
+def query_counter(test_engine_fixture):
+    """统计 with 块内测试数据库执行的 SQL 语句，用于断言端点的查询预算
+
+    用法: with query_counter() as metrics: client.get(...)
+          assert metrics.query_count <= 3
+    """
+    return lambda: track_queries(test_engine_fixture)
 
 
 # ===== 用户 Fixtures =====
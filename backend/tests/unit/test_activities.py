@@ -6,6 +6,8 @@ import pytest
 from fastapi import status
 from datetime import datetime, timedelta
 
+from app.models.activity import Activity
+
 
 class TestActivitiesList:
     """测试获取活动列表端点 /api/activities"""
@@ -141,6 +143,56 @@ class TestActivitySignup:
         assert response.status_code == status.HTTP_400_BAD_REQUEST
         assert "已报名此活动" in response.json()["detail"]
 
+    def test_signup_updates_count(self, client, auth_headers, test_activity, db_session):
+        """测试报名后报名人数加一"""
+        client.post("/api/activities/signup", headers=auth_headers, json={"activity_id": test_activity.id})
+        db_session.refresh(test_activity)
+        assert test_activity.signup_count == 1
+
+        response = client.get(f"/api/activities/{test_activity.id}", headers=auth_headers)
+        assert response.json()["signup_count"] == 1
+
+    def test_signup_full_joins_waitlist(self, client, auth_headers, test_activity, db_session):
+        """测试名额已满时排入候补队列，报名人数不变"""
+        test_activity.max_participants = 1
+        test_activity.signup_count = 1
+        db_session.commit()
+
+        response = client.post(
+            "/api/activities/signup",
+            headers=auth_headers,
+            json={"activity_id": test_activity.id}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["status"] == "waitlisted"
+        assert response.json()["waitlist_position"] == 1
+        db_session.refresh(test_activity)
+        assert test_activity.signup_count == 1
+        assert test_activity.waitlist_tail == 1
+
+
+class TestCancelSignup:
+    """测试取消报名端点 DELETE /api/activities/signup/{id}"""
+
+    def test_cancel_signup(self, client, auth_headers, test_activity, db_session):
+        """测试取消报名后报名人数减一"""
+        client.post("/api/activities/signup", headers=auth_headers, json={"activity_id": test_activity.id})
+
+        response = client.delete(f"/api/activities/signup/{test_activity.id}", headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        db_session.refresh(test_activity)
+        assert test_activity.signup_count == 0
+
+    def test_cancel_signup_twice(self, client, auth_headers, test_activity, db_session):
+        """测试重复取消返回 404 且人数不会减成负数"""
+        client.post("/api/activities/signup", headers=auth_headers, json={"activity_id": test_activity.id})
+        client.delete(f"/api/activities/signup/{test_activity.id}", headers=auth_headers)
+
+        response = client.delete(f"/api/activities/signup/{test_activity.id}", headers=auth_headers)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        db_session.refresh(test_activity)
+        assert test_activity.signup_count == 0
+
 
 class TestActivityCheckin:
     """测试签到端点 POST /api/activities/{id}/checkin"""
@@ -220,3 +272,540 @@ class TestMySignups:
         assert response.status_code == status.HTTP_200_OK
         data = response.json()
         assert isinstance(data, list)
+
+
+class TestActivitySignupsInclude:
+    """测试活动列表的报名列表加载方式"""
+
+    def _create_activities(self, db_session, test_user, count):
+        from app.models.signup import ActivitySignup
+        for i in range(count):
+            activity = Activity(
+                title=f"活动{i}",
+                start_time=datetime.utcnow() + timedelta(days=i + 1),
+                end_time=datetime.utcnow() + timedelta(days=i + 1, hours=2),
+                max_participants=10,
+                signup_count=1,
+                creator_id=test_user.id
+            )
+            db_session.add(activity)
+            db_session.flush()
+            db_session.add(ActivitySignup(activity_id=activity.id, user_id=test_user.id))
+        db_session.commit()
+
+    def _query_count(self, client, auth_headers, query_counter, url):
+        client.get(url, headers=auth_headers)  # 预热身份缓存
+        with query_counter() as metrics:
+            response = client.get(url, headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        return metrics.query_count, response.json()
+
+    def test_default_returns_count_only(self, client, auth_headers, test_user, db_session):
+        """测试默认只返回 signup_count"""
+        self._create_activities(db_session, test_user, 1)
+        data = client.get("/api/activities", headers=auth_headers).json()
+        assert data[0]["signup_count"] == 1
+        assert data[0]["signups"] is None
+
+    def test_include_signups(self, client, auth_headers, test_user, db_session):
+        """测试 include=signups 返回报名列表"""
+        self._create_activities(db_session, test_user, 2)
+        data = client.get("/api/activities?include=signups", headers=auth_headers).json()
+        assert [len(a["signups"]) for a in data] == [1, 1]
+        assert data[0]["signups"][0]["user_id"] == test_user.id
+
+        detail = client.get(f"/api/activities/{data[0]['id']}?include=signups", headers=auth_headers).json()
+        assert len(detail["signups"]) == 1
+
+    @pytest.mark.parametrize("include", ["", "?include=signups"])
+    def test_query_count_independent_of_page_size(
+        self, client, auth_headers, test_user, db_session, query_counter, include
+    ):
+        """测试列表查询次数不随活动数量增长"""
+        self._create_activities(db_session, test_user, 2)
+        small, _ = self._query_count(client, auth_headers, query_counter, f"/api/activities{include}")
+        self._create_activities(db_session, test_user, 20)
+        large, data = self._query_count(client, auth_headers, query_counter, f"/api/activities{include}")
+        assert len(data) == 22
+        assert large == small
+        assert large <= 2
+
+
+class TestActivityCalendar:
+    """测试日历端点 GET /api/activities/calendar 和 /api/activities/my/calendar"""
+
+    WINDOW = "from=2026-03-02T00:00:00&to=2026-03-09T00:00:00"
+
+    def _create(self, db_session, test_user):
+        from app.models.signup import ActivitySignup
+        spans = {
+            "before": ("2026-03-01T08:00", "2026-03-01T12:00"),
+            "straddle_start": ("2026-03-01T22:00", "2026-03-02T02:00"),
+            "inside": ("2026-03-04T09:00", "2026-03-04T17:00"),
+            "enclosing": ("2026-02-20T00:00", "2026-03-20T00:00"),
+            "straddle_end": ("2026-03-08T20:00", "2026-03-09T04:00"),
+            "touching_end": ("2026-03-09T00:00", "2026-03-09T03:00"),
+            "after": ("2026-03-10T09:00", "2026-03-10T12:00"),
+        }
+        activities = {}
+        for title, (start, end) in spans.items():
+            activity = Activity(title=title, start_time=datetime.fromisoformat(start),
+                                end_time=datetime.fromisoformat(end), creator_id=test_user.id)
+            db_session.add(activity)
+            activities[title] = activity
+        db_session.flush()
+        for title in ("inside", "after"):
+            db_session.add(ActivitySignup(activity_id=activities[title].id, user_id=test_user.id))
+        db_session.commit()
+
+    def test_calendar_overlap(self, client, auth_headers, test_user, db_session):
+        """测试返回与时间窗口重叠的活动，按开始时间排序"""
+        self._create(db_session, test_user)
+        response = client.get(f"/api/activities/calendar?{self.WINDOW}", headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert [a["title"] for a in response.json()] == [
+            "enclosing", "straddle_start", "inside", "straddle_end"
+        ]
+
+    def test_my_calendar(self, client, auth_headers, test_user, db_session, query_counter):
+        """测试我的日程只包含自己报名的重叠活动，并带报名信息"""
+        self._create(db_session, test_user)
+        client.get("/api/users/me", headers=auth_headers)  # 预热身份缓存
+        with query_counter() as metrics:
+            response = client.get(f"/api/activities/my/calendar?{self.WINDOW}", headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert [item["activity"]["title"] for item in data] == ["inside"]
+        assert data[0]["signup"]["user_id"] == test_user.id
+        assert data[0]["signup"]["check_in"] is False
+        assert metrics.query_count == 1
+
+    def test_calendar_timezone_offset(self, client, auth_headers, test_user, db_session):
+        """测试带时区偏移的时间窗口换算为 UTC 后再比较"""
+        self._create(db_session, test_user)
+        # +08:00 的 17:30-18:00 即 UTC 09:30-10:00
+        window = "from=2026-03-04T17:30:00%2B08:00&to=2026-03-04T18:00:00%2B08:00"
+        response = client.get(f"/api/activities/calendar?{window}", headers=auth_headers)
+        assert [a["title"] for a in response.json()] == ["enclosing", "inside"]
+        response = client.get(f"/api/activities/my/calendar?{window}", headers=auth_headers)
+        assert [item["activity"]["title"] for item in response.json()] == ["inside"]
+
+    @pytest.mark.parametrize("window", [
+        "from=2026-03-09T00:00:00&to=2026-03-02T00:00:00",
+        "from=2026-01-01T00:00:00&to=2027-06-01T00:00:00",
+    ])
+    def test_calendar_invalid_window(self, client, auth_headers, window):
+        """测试时间窗口倒置或过长时返回 400"""
+        response = client.get(f"/api/activities/calendar?{window}", headers=auth_headers)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_calendar_requires_window(self, client, auth_headers):
+        """测试缺少 from/to 参数"""
+        response = client.get("/api/activities/calendar", headers=auth_headers)
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+class TestBatchCheckIn:
+    """测试批量签到端点 POST /api/activities/{id}/checkin/batch"""
+
+    def _sailors(self, db_session, test_activity, count=3, checked_in=()):
+        from app.models.signup import ActivitySignup
+        from app.models.user import User, UserRole
+        ids = []
+        for i in range(count):
+            user = User(username=f"sailor{i}", email=f"sailor{i}@example.com", password_hash="x",
+                        role=UserRole.USER, balance=0)
+            db_session.add(user)
+            db_session.flush()
+            db_session.add(ActivitySignup(activity_id=test_activity.id, user_id=user.id,
+                                          check_in=i in checked_in))
+            ids.append(user.id)
+        db_session.commit()
+        return ids
+
+    def test_checkin_token_roundtrip(self, client, auth_headers, admin_headers, test_activity, admin_user):
+        """测试报名用户领取签到码，管理员扫码签到"""
+        client.post("/api/activities/signup", headers=admin_headers, json={"activity_id": test_activity.id})
+        token = client.get(f"/api/activities/{test_activity.id}/checkin-token", headers=admin_headers).json()["token"]
+
+        response = client.post(
+            f"/api/activities/{test_activity.id}/checkin/batch",
+            headers=auth_headers,
+            json={"tokens": [token]}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            "checked_in": 1,
+            "results": [{"user_id": admin_user.id, "token": token, "status": "checked_in"}],
+        }
+
+    def test_checkin_token_requires_signup(self, client, auth_headers, test_activity):
+        """测试未报名不能领取签到码"""
+        response = client.get(f"/api/activities/{test_activity.id}/checkin-token", headers=auth_headers)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_checkin_token_is_not_access_token(self, client, test_activity, test_user):
+        """测试签到码不能当作访问令牌使用"""
+        from app.utils.security import create_signed_token
+        token = create_signed_token("checkin", {"activity_id": test_activity.id, "user_id": test_user.id,
+                                                "sub": test_user.username}, timedelta(hours=1))
+        response = client.get("/api/users/me", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_batch_results(self, client, auth_headers, test_activity, test_user, db_session, query_counter):
+        """测试混合输入的逐项结果，且只执行一次更新"""
+        from app.models.signup import ActivitySignup
+        from app.utils.security import create_signed_token
+        ids = self._sailors(db_session, test_activity, count=3, checked_in=(1,))
+        other_activity_token = create_signed_token(
+            "checkin", {"activity_id": test_activity.id + 1, "user_id": ids[2]}, timedelta(hours=1)
+        )
+        valid_token = create_signed_token("checkin", {"activity_id": test_activity.id, "user_id": ids[2]},
+                                          timedelta(hours=1))
+
+        client.get("/api/users/me", headers=auth_headers)  # 预热身份缓存
+        with query_counter() as metrics:
+            response = client.post(
+                f"/api/activities/{test_activity.id}/checkin/batch",
+                headers=auth_headers,
+                json={
+                    "user_ids": [ids[0], ids[1], test_user.id, ids[0]],
+                    "tokens": [valid_token, other_activity_token, "garbage"],
+                }
+            )
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["checked_in"] == 2
+        assert [r["status"] for r in data["results"]] == [
+            "checked_in", "already_checked_in", "not_signed_up", "duplicate",
+            "checked_in", "invalid_token", "invalid_token",
+        ]
+        # 活动、报名状态、UPDATE 各一条
+        assert metrics.query_count == 3
+        rows = db_session.query(ActivitySignup.user_id, ActivitySignup.check_in).filter(
+            ActivitySignup.activity_id == test_activity.id
+        ).all()
+        assert dict(rows) == {ids[0]: True, ids[1]: True, ids[2]: True}
+
+    def test_batch_no_permission(self, client, auth_headers, test_activity, db_session):
+        """测试非创建者且非管理员不能批量签到"""
+        other = Activity(title="别人的活动", start_time=datetime.utcnow(), end_time=datetime.utcnow(),
+                              creator_id=test_activity.creator_id + 100)
+        db_session.add(other)
+        db_session.commit()
+        response = client.post(f"/api/activities/{other.id}/checkin/batch", headers=auth_headers,
+                               json={"user_ids": [1]})
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+class TestBallotAllocation:
+    """测试抽签报名：POST /api/activities/signup 与 POST /api/activities/{id}/ballot/draw"""
+
+    def _ballot(self, db_session, test_activity, capacity=2):
+        test_activity.allocation_mode = "ballot"
+        test_activity.max_participants = capacity
+        db_session.commit()
+        return test_activity
+
+    def _enter(self, client, db_session, activity, count):
+        """count 个新用户各报名一次，返回 (用户 id, 认证头) 列表"""
+        from app.models.user import User, UserRole
+        from app.utils.security import create_access_token
+        entrants = []
+        for i in range(count):
+            user = User(username=f"entrant{i}", email=f"entrant{i}@example.com", password_hash="x",
+                        role=UserRole.USER, balance=0)
+            db_session.add(user)
+            db_session.commit()
+            headers = {"Authorization": "Bearer " + create_access_token(
+                {"sub": user.username, "user_id": user.id, "role": user.role.value})}
+            response = client.post("/api/activities/signup", headers=headers, json={"activity_id": activity.id})
+            assert response.status_code == status.HTTP_200_OK
+            assert response.json()["status"] == "pending"
+            entrants.append((user.id, headers))
+        return entrants
+
+    def test_create_ballot_activity(self, client, auth_headers):
+        """测试创建抽签活动"""
+        start = datetime.utcnow() + timedelta(days=3)
+        response = client.post("/api/activities", headers=auth_headers, json={
+            "title": "抽签赛", "start_time": start.isoformat(),
+            "end_time": (start + timedelta(hours=2)).isoformat(),
+            "max_participants": 5, "allocation_mode": "ballot",
+        })
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["allocation_mode"] == "ballot"
+        assert response.json()["ballot_drawn_at"] is None
+
+    def test_entries_ignore_capacity(self, client, db_session, test_activity):
+        """测试报名期内超过名额也能登记，且不占用名额"""
+        activity = self._ballot(db_session, test_activity, capacity=1)
+        self._enter(client, db_session, activity, 3)
+        db_session.refresh(activity)
+        assert activity.signup_count == 0
+
+    def test_draw_allocates_capacity_and_ranks_waitlist(self, client, auth_headers, db_session, test_activity):
+        """测试抽签录取 max_participants 人，其余按抽中顺序候补，结果可由种子复现"""
+        from app.models.signup import ActivitySignup
+        from app.utils import ballot
+        activity = self._ballot(db_session, test_activity, capacity=2)
+        self._enter(client, db_session, activity, 5)
+
+        response = client.post(f"/api/activities/{activity.id}/ballot/draw", headers=auth_headers,
+                               json={"seed": 42})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"activity_id": activity.id, "seed": 42, "confirmed": 2, "waitlisted": 3}
+
+        db_session.expire_all()
+        signups = db_session.query(ActivitySignup).filter(ActivitySignup.activity_id == activity.id).all()
+        confirmed, waitlist = ballot.draw([s.id for s in signups], 2, 42)
+        by_id = {s.id: s for s in signups}
+        assert all(by_id[i].status == "confirmed" for i in confirmed)
+        assert [by_id[i].waitlist_position for i in waitlist] == [1, 2, 3]
+        assert all(by_id[i].status == "waitlisted" for i in waitlist)
+        assert db_session.get(Activity, activity.id).signup_count == 2
+
+    def test_draw_closes_signups(self, client, auth_headers, db_session, test_activity):
+        """测试抽签后不再接受报名，也不能重复抽签"""
+        activity = self._ballot(db_session, test_activity)
+        client.post(f"/api/activities/{activity.id}/ballot/draw", headers=auth_headers)
+
+        response = client.post("/api/activities/signup", headers=auth_headers, json={"activity_id": activity.id})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()["detail"] == "抽签已结束"
+        response = client.post(f"/api/activities/{activity.id}/ballot/draw", headers=auth_headers)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_entry_committed_before_claim_is_drawn(self, client, auth_headers, db_session, test_activity,
+                                                   test_engine_fixture):
+        """测试另一连接在抽签认领前提交的报名也参与抽签，不会停在待抽签"""
+        from sqlalchemy import event
+        from app.models.signup import ActivitySignup
+        activity = self._ballot(db_session, test_activity, capacity=5)
+        (late_id, _), = self._enter(client, db_session, activity, 1)
+        db_session.query(ActivitySignup).filter(ActivitySignup.user_id == late_id).delete()
+        db_session.commit()
+        activity_id = activity.id
+
+        injected = []
+        earlier = []
+
+        def concurrent_entry(conn, cursor, statement, parameters, context, executemany):
+            if not injected:
+                earlier.append(statement)
+            if statement.startswith("UPDATE activities SET ballot_drawn_at") and not injected:
+                injected.append(statement)
+                cursor.execute("INSERT INTO activity_signups (activity_id, user_id, status) "
+                               "VALUES (?, ?, 'pending')", (activity_id, late_id))
+
+        event.listen(test_engine_fixture, "before_cursor_execute", concurrent_entry)
+        try:
+            response = client.post(f"/api/activities/{activity_id}/ballot/draw", headers=auth_headers)
+        finally:
+            event.remove(test_engine_fixture, "before_cursor_execute", concurrent_entry)
+        assert injected
+        # 认领之前不读活动表，REPEATABLE READ 的快照建立在认领之后
+        assert not any("FROM activities" in statement for statement in earlier)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["confirmed"] == 1
+        db_session.expire_all()
+        assert db_session.query(ActivitySignup).filter(ActivitySignup.status == "pending").count() == 0
+
+    def test_draw_missing_activity(self, client, auth_headers):
+        """测试活动不存在时抽签返回 404"""
+        response = client.post("/api/activities/99999/ballot/draw", headers=auth_headers)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_draw_requires_ballot_mode(self, client, auth_headers, test_activity):
+        """测试先到先得的活动不能抽签"""
+        response = client.post(f"/api/activities/{test_activity.id}/ballot/draw", headers=auth_headers)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_draw_no_permission(self, client, admin_headers, db_session, test_activity):
+        """测试非创建者（且非管理员）不能抽签"""
+        from app.models.user import User, UserRole
+        from app.utils.security import create_access_token
+        activity = self._ballot(db_session, test_activity)
+        other = User(username="other", email="other@example.com", password_hash="x",
+                     role=UserRole.USER, balance=0)
+        db_session.add(other)
+        db_session.commit()
+        headers = {"Authorization": "Bearer " + create_access_token(
+            {"sub": other.username, "user_id": other.id, "role": other.role.value})}
+        response = client.post(f"/api/activities/{activity.id}/ballot/draw", headers=headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_waitlisted_cannot_check_in(self, client, auth_headers, db_session, test_activity):
+        """测试候补用户不能领取签到码，取消候补不影响已录取人数"""
+        activity = self._ballot(db_session, test_activity, capacity=1)
+        entrants = self._enter(client, db_session, activity, 2)
+        client.post(f"/api/activities/{activity.id}/ballot/draw", headers=auth_headers, json={"seed": 7})
+
+        codes = [client.get(f"/api/activities/{activity.id}/checkin-token", headers=headers).status_code
+                 for _, headers in entrants]
+        assert sorted(codes) == [status.HTTP_200_OK, status.HTTP_400_BAD_REQUEST]
+
+        waitlisted = entrants[codes.index(status.HTTP_400_BAD_REQUEST)][1]
+        client.delete(f"/api/activities/signup/{activity.id}", headers=waitlisted)
+        db_session.refresh(activity)
+        assert activity.signup_count == 1
+
+
+class TestBallotDraw:
+    """测试 app.utils.ballot.draw"""
+
+    def test_same_seed_same_result(self):
+        """测试同样的报名和种子得到同样的结果，与输入顺序无关"""
+        from app.utils import ballot
+        assert ballot.draw([3, 1, 2, 5, 4], 2, 99) == ballot.draw([5, 4, 3, 2, 1], 2, 99)
+
+    def test_unlimited_capacity(self):
+        """测试不限人数时全部录取"""
+        from app.utils import ballot
+        confirmed, waitlist = ballot.draw([1, 2, 3], 0, 1)
+        assert sorted(confirmed) == [1, 2, 3] and waitlist == []
+
+
+class TestWaitlist:
+    """测试候补队列：取消报名时队首自动转正并收到通知"""
+
+    def _member(self, db_session, name):
+        from app.models.user import User, UserRole
+        from app.utils.security import create_access_token
+        user = User(username=name, email=f"{name}@example.com", password_hash="x", role=UserRole.USER, balance=0)
+        db_session.add(user)
+        db_session.commit()
+        return user, {"Authorization": "Bearer " + create_access_token(
+            {"sub": user.username, "user_id": user.id, "role": user.role.value})}
+
+    def _full_activity(self, client, db_session, test_activity, waiting=2):
+        """名额 1 人的活动：一人录取，waiting 人候补"""
+        test_activity.max_participants = 1
+        db_session.commit()
+        members = [self._member(db_session, f"member{i}") for i in range(waiting + 1)]
+        for _, headers in members:
+            client.post("/api/activities/signup", headers=headers, json={"activity_id": test_activity.id})
+        return members
+
+    def test_positions_are_ordered(self, client, db_session, test_activity):
+        """测试候补序号按排队顺序递增"""
+        from app.models.signup import ActivitySignup
+        members = self._full_activity(client, db_session, test_activity, waiting=3)
+        positions = {s.user_id: s.waitlist_position for s in db_session.query(ActivitySignup).all()}
+        assert [positions[user.id] for user, _ in members] == [None, 1, 2, 3]
+
+    def test_cancel_promotes_head(self, client, db_session, test_activity):
+        """测试录取者取消后候补队首转正，报名人数不变，被转正者收到通知"""
+        from app.models.signup import ActivitySignup
+        members = self._full_activity(client, db_session, test_activity)
+        (_, first), (head, head_headers), (tail, _) = members
+
+        response = client.delete(f"/api/activities/signup/{test_activity.id}", headers=first)
+        assert response.status_code == status.HTTP_200_OK
+
+        db_session.expire_all()
+        statuses = {s.user_id: s.status for s in db_session.query(ActivitySignup).all()}
+        assert statuses == {head.id: "confirmed", tail.id: "waitlisted"}
+        assert db_session.get(Activity, test_activity.id).signup_count == 1
+
+        notifications = client.get("/api/notifications", headers=head_headers).json()
+        assert len(notifications) == 1
+        assert test_activity.title in notifications[0]["content"]
+
+    def test_cancel_waitlisted_keeps_seat(self, client, db_session, test_activity):
+        """测试候补者取消不影响录取者和报名人数"""
+        from app.models.signup import ActivitySignup
+        members = self._full_activity(client, db_session, test_activity)
+        (first, _), (_, head_headers), (tail, _) = members
+
+        client.delete(f"/api/activities/signup/{test_activity.id}", headers=head_headers)
+        db_session.expire_all()
+        statuses = {s.user_id: s.status for s in db_session.query(ActivitySignup).all()}
+        assert statuses == {first.id: "confirmed", tail.id: "waitlisted"}
+        assert db_session.get(Activity, test_activity.id).signup_count == 1
+
+    def test_promoted_between_read_and_delete(self, client, db_session, test_activity, test_engine_fixture):
+        """测试候补者读取报名状态后、删除前被并发转正：按转正后的状态删除并释放名额"""
+        from sqlalchemy import event
+        from app.models.signup import ActivitySignup
+        members = self._full_activity(client, db_session, test_activity, waiting=1)
+        (first, _), (head, head_headers) = members
+
+        injected = []
+
+        def concurrent_promotion(conn, cursor, statement, parameters, context, executemany):
+            # 录取者取消，队首转正，报名人数不变
+            if statement.startswith("DELETE FROM activity_signups") and not injected:
+                injected.append(statement)
+                cursor.execute("DELETE FROM activity_signups WHERE user_id = ?", (first.id,))
+                cursor.execute("UPDATE activity_signups SET status = 'confirmed', waitlist_position = NULL "
+                               "WHERE user_id = ?", (head.id,))
+
+        event.listen(test_engine_fixture, "before_cursor_execute", concurrent_promotion)
+        try:
+            response = client.delete(f"/api/activities/signup/{test_activity.id}", headers=head_headers)
+        finally:
+            event.remove(test_engine_fixture, "before_cursor_execute", concurrent_promotion)
+        assert injected
+        assert response.status_code == status.HTTP_200_OK
+        db_session.expire_all()
+        assert db_session.query(ActivitySignup).count() == 0
+        assert db_session.get(Activity, test_activity.id).signup_count == 0
+
+    def test_cancel_gives_up_when_status_keeps_changing(self, client, db_session, test_activity,
+                                                        test_engine_fixture):
+        """测试报名状态在每次读取后都被并发改变：有限次重试后返回 409，报名保留"""
+        from sqlalchemy import event
+        from app.models.signup import ActivitySignup
+        members = self._full_activity(client, db_session, test_activity, waiting=1)
+        _, (head, head_headers) = members
+
+        flips = []
+
+        def concurrent_flip(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("DELETE FROM activity_signups"):
+                flips.append(statement)
+                cursor.execute("UPDATE activity_signups SET status = CASE status "
+                               "WHEN 'confirmed' THEN 'waitlisted' ELSE 'confirmed' END WHERE user_id = ?",
+                               (head.id,))
+
+        event.listen(test_engine_fixture, "before_cursor_execute", concurrent_flip)
+        try:
+            response = client.delete(f"/api/activities/signup/{test_activity.id}", headers=head_headers)
+        finally:
+            event.remove(test_engine_fixture, "before_cursor_execute", concurrent_flip)
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert len(flips) == 3
+        db_session.expire_all()
+        assert db_session.query(ActivitySignup).filter(ActivitySignup.user_id == head.id).count() == 1
+
+    def test_cancel_without_waitlist_frees_seat(self, client, auth_headers, test_activity, db_session):
+        """测试没有候补时取消报名释放名额"""
+        test_activity.max_participants = 1
+        db_session.commit()
+        client.post("/api/activities/signup", headers=auth_headers, json={"activity_id": test_activity.id})
+        client.delete(f"/api/activities/signup/{test_activity.id}", headers=auth_headers)
+        db_session.refresh(test_activity)
+        assert test_activity.signup_count == 0
+
+    def test_ballot_waitlist_promotion(self, client, auth_headers, db_session, test_activity):
+        """测试抽签后的候补同样按序转正，之后的排队序号接在抽签候补之后"""
+        from app.models.signup import ActivitySignup
+        test_activity.allocation_mode = "ballot"
+        test_activity.max_participants = 1
+        db_session.commit()
+        members = [self._member(db_session, f"entrant{i}") for i in range(3)]
+        for _, headers in members:
+            client.post("/api/activities/signup", headers=headers, json={"activity_id": test_activity.id})
+        client.post(f"/api/activities/{test_activity.id}/ballot/draw", headers=auth_headers, json={"seed": 3})
+
+        db_session.expire_all()
+        assert db_session.get(Activity, test_activity.id).waitlist_tail == 2
+        signups = {s.user_id: s for s in db_session.query(ActivitySignup).all()}
+        winner = next(uid for uid, s in signups.items() if s.status == "confirmed")
+        head = next(uid for uid, s in signups.items() if s.waitlist_position == 1)
+
+        winner_headers = next(h for user, h in members if user.id == winner)
+        client.delete(f"/api/activities/signup/{test_activity.id}", headers=winner_headers)
+        db_session.expire_all()
+        assert db_session.query(ActivitySignup).filter(ActivitySignup.user_id == head).one().status == "confirmed"
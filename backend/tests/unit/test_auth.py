@@ -84,6 +84,42 @@ class TestAuthLogin:
         assert "用户名或密码错误" in response.json()["detail"]
 
 
+    def test_login_hash_queue_full(self, client, test_user, monkeypatch):
+        """测试哈希队列已满时返回 503"""
+        from app.routers import auth
+        from app.utils.password_hasher import PasswordHasher
+        monkeypatch.setattr(auth, "password_hasher", PasswordHasher(workers=0, queue_depth=0))
+        response = client.post("/api/auth/login", json={
+            "username": test_user.username,
+            "password": "password123"
+        })
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+    def test_no_transaction_held_while_hashing(self, client, db_session, test_user, monkeypatch):
+        """测试注册和登录在计算哈希期间不占用数据库事务"""
+        from app.routers import auth
+        held = []
+        real = auth.password_hasher
+
+        class Recording:
+            async def hash(self, password):
+                held.append(db_session.in_transaction())
+                return await real.hash(password)
+
+            async def verify(self, password, hashed):
+                held.append(db_session.in_transaction())
+                return await real.verify(password, hashed)
+
+        monkeypatch.setattr(auth, "password_hasher", Recording())
+        login = client.post("/api/auth/login", json={"username": "testuser", "password": "password123"})
+        register = client.post("/api/auth/register", json={
+            "username": "newuser", "email": "newuser@example.com", "password": "password123"
+        })
+        assert login.status_code == register.status_code == status.HTTP_200_OK
+        assert register.json()["user"]["username"] == "newuser"
+        assert held == [False, False]
+
+
 class TestAuthMe:
     """测试获取当前用户信息端点 /api/auth/me"""
 
@@ -120,3 +156,15 @@ class TestAuthRefresh:
         """测试无 token"""
         response = client.post("/api/auth/refresh")
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class TestAuthDeps:
+    """测试认证依赖"""
+
+    def test_deps_run_in_threadpool(self):
+        """测试认证依赖为同步函数，数据库查询不会在事件循环中执行"""
+        import inspect
+        from app.routers.deps import get_current_user, get_current_admin, require_role
+        assert not inspect.iscoroutinefunction(get_current_user)
+        assert not inspect.iscoroutinefunction(get_current_admin)
+        assert not inspect.iscoroutinefunction(require_role(["ADMIN"]))
@@ -0,0 +1,159 @@
+"""
+租船/还船乐观并发测试
+测试船只版本号的比较并更新、版本冲突后的有限重试、余额条件扣减和重复还船
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from fastapi import status
+from sqlalchemy import event, text
+
+from app.config import settings
+from app.models.boat import Boat, BoatRental, BoatReservation, BoatStatus
+from app.models.user import User
+from app.routers import boats
+from app.utils.fleet_board import fleet_board
+
+
+def _boat(db_session, boat_id):
+    db_session.expire_all()
+    return db_session.get(Boat, boat_id)
+
+
+@pytest.fixture
+def read_calls(monkeypatch):
+    """记录每次租船尝试读取船只时是否读数据库"""
+    calls = []
+    original = boats._read_boat
+
+    def recording(db, boat_id, fresh):
+        calls.append(fresh)
+        return original(db, boat_id, fresh)
+
+    monkeypatch.setattr(boats, "_read_boat", recording)
+    return calls
+
+
+class TestRentCompareAndSwap:
+    """测试租船按版本号比较并更新"""
+
+    def test_rent_and_return_bump_version(self, client, auth_headers, db_session, test_boat):
+        """测试租船和还船各递增一次版本号，状态表同步新版本"""
+        rental = client.post(f"/api/boats/{test_boat.id}/rent", headers=auth_headers).json()
+        boat = _boat(db_session, test_boat.id)
+        assert (boat.status, boat.version) == (BoatStatus.RENTED, 1)
+
+        response = client.post("/api/boats/return", headers=auth_headers, json={"rental_id": rental["id"]})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["status"] == "returned"
+        boat = _boat(db_session, test_boat.id)
+        assert (boat.status, boat.version) == (BoatStatus.AVAILABLE, 2)
+        assert fleet_board.get(db_session, test_boat.id)["version"] == 2
+        assert fleet_board.check(db_session)["consistent"]
+
+    def test_stale_version_retried(self, client, auth_headers, db_session, test_boat, read_calls):
+        """测试状态表中的版本号过期时比较失败，重新读取数据库后成功"""
+        client.get(f"/api/boats/{test_boat.id}", headers=auth_headers)  # 加载状态表
+        db_session.execute(text("UPDATE boats SET version = version + 5 WHERE id = :id"), {"id": test_boat.id})
+        db_session.commit()
+
+        response = client.post(f"/api/boats/{test_boat.id}/rent", headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert read_calls == [False, True]
+        assert _boat(db_session, test_boat.id).version == 6
+
+    def test_retries_bounded(self, client, auth_headers, db_session, test_boat, monkeypatch):
+        """测试每次都读到过期版本号时重试有限次数后返回 409，且没有扣费"""
+        calls = []
+
+        def stale(db, boat_id, fresh):
+            calls.append(fresh)
+            return {"id": boat_id, "status": BoatStatus.AVAILABLE, "rental_price": Decimal("50.00"), "version": -1}
+
+        monkeypatch.setattr(boats, "_read_boat", stale)
+        response = client.post(f"/api/boats/{test_boat.id}/rent", headers=auth_headers)
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert len(calls) == settings.BOAT_RENT_MAX_RETRIES + 1
+        assert _boat(db_session, test_boat.id).status == BoatStatus.AVAILABLE
+        assert db_session.query(BoatRental).count() == 0
+        assert db_session.query(User.balance).filter(User.username == "testuser").scalar() == Decimal("100.00")
+
+    def test_rented_concurrently(self, client, auth_headers, db_session, test_boat, read_calls):
+        """测试读取后船只被他人租走：比较失败，重新读取后返回不可租借"""
+        client.get(f"/api/boats/{test_boat.id}", headers=auth_headers)
+        db_session.execute(text("UPDATE boats SET status = 'rented', version = version + 1 WHERE id = :id"),
+                           {"id": test_boat.id})
+        db_session.commit()
+
+        response = client.post(f"/api/boats/{test_boat.id}/rent", headers=auth_headers)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()["detail"] == "船只不可租借"
+        assert read_calls == [False, True]
+
+    def test_insufficient_balance_rolls_back_boat(self, client, auth_headers, db_session, test_user, test_boat):
+        """测试余额不足时船只状态和版本号一并回滚"""
+        test_user.balance = Decimal("49.99")
+        db_session.commit()
+        response = client.post(f"/api/boats/{test_boat.id}/rent", headers=auth_headers)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        boat = _boat(db_session, test_boat.id)
+        assert (boat.status, boat.version) == (BoatStatus.AVAILABLE, 0)
+        assert db_session.query(BoatRental).count() == 0
+
+    def test_exact_balance_charged(self, client, auth_headers, db_session, test_user, test_boat):
+        """测试余额恰好等于租金时可以租借，余额扣为 0"""
+        test_user.balance = Decimal("50.00")
+        db_session.commit()
+        assert client.post(f"/api/boats/{test_boat.id}/rent", headers=auth_headers).status_code == 200
+        db_session.expire_all()
+        assert db_session.get(User, test_user.id).balance == Decimal("0.00")
+
+    def test_reservation_bumps_version(self, client, auth_headers, db_session, test_boat):
+        """测试新增预约递增版本号，使并发租船重新检查预约"""
+        start = (datetime.utcnow() + timedelta(days=1)).replace(hour=10, minute=0, second=0, microsecond=0)
+        response = client.post(f"/api/boats/{test_boat.id}/reservations", headers=auth_headers, json={
+            "start_time": start.isoformat(), "end_time": (start + timedelta(hours=1)).isoformat()
+        })
+        assert response.status_code == status.HTTP_200_OK
+        assert db_session.query(BoatReservation).count() == 1
+        assert _boat(db_session, test_boat.id).version == 1
+
+    def test_admin_update_bumps_version(self, client, admin_headers, db_session, test_boat):
+        """测试管理员修改船只递增版本号"""
+        client.put(f"/api/boats/{test_boat.id}", headers=admin_headers, json={"status": "maintenance"})
+        assert _boat(db_session, test_boat.id).version == 1
+
+
+class TestReturnCompareAndSwap:
+    """测试还船按租借状态条件更新"""
+
+    def test_double_return(self, client, auth_headers, db_session, test_boat):
+        """测试重复还船第二次返回 404，船只版本号只递增一次"""
+        rental = client.post(f"/api/boats/{test_boat.id}/rent", headers=auth_headers).json()
+        first = client.post("/api/boats/return", headers=auth_headers, json={"rental_id": rental["id"]})
+        second = client.post("/api/boats/return", headers=auth_headers, json={"rental_id": rental["id"]})
+        assert first.status_code == status.HTTP_200_OK
+        assert second.status_code == status.HTTP_404_NOT_FOUND
+        assert _boat(db_session, test_boat.id).version == 2
+
+    def test_returned_between_read_and_update(self, client, auth_headers, db_session, test_boat, test_engine_fixture):
+        """测试读取租借记录后、条件更新前被并发归还：条件更新失败，返回 404 且不改船只"""
+        rental = client.post(f"/api/boats/{test_boat.id}/rent", headers=auth_headers).json()
+
+        injected = []
+
+        def concurrent_return(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("UPDATE boats_rentals") and not injected:
+                injected.append(statement)
+                cursor.execute("UPDATE boats_rentals SET status = 'returned' WHERE id = ?", (rental["id"],))
+
+        event.listen(test_engine_fixture, "before_cursor_execute", concurrent_return)
+        try:
+            response = client.post("/api/boats/return", headers=auth_headers, json={"rental_id": rental["id"]})
+        finally:
+            event.remove(test_engine_fixture, "before_cursor_execute", concurrent_return)
+        assert injected
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        boat = _boat(db_session, test_boat.id)
+        assert (boat.status, boat.version) == (BoatStatus.RENTED, 1)
@@ -0,0 +1,226 @@
+"""
+船只预约测试
+测试 /api/boats 下的预约、取消、冲突检查和可用时段端点
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from fastapi import status
+
+from app.models.boat import Boat, BoatReservation, BoatStatus
+from app.utils import timeslots
+
+# 后天 10:00（UTC），与时段粒度对齐
+DAY = (datetime.utcnow() + timedelta(days=2)).replace(hour=10, minute=0, second=0, microsecond=0)
+
+
+def _iso(value: datetime) -> str:
+    return value.isoformat()
+
+
+def _reserve(client, headers, boat_id, start, end):
+    return client.post(f"/api/boats/{boat_id}/reservations", headers=headers,
+                       json={"start_time": _iso(start), "end_time": _iso(end)})
+
+
+class TestCreateReservation:
+    """测试预约端点 POST /api/boats/{boat_id}/reservations"""
+
+    def test_reserve_success(self, client, auth_headers, test_boat, test_user):
+        """测试预约成功"""
+        response = _reserve(client, auth_headers, test_boat.id, DAY, DAY + timedelta(hours=2))
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["boat_id"] == test_boat.id
+        assert data["user_id"] == test_user.id
+        assert data["status"] == "active"
+
+    @pytest.mark.parametrize("offset_start, offset_end, conflict", [
+        (0, 2, True),        # 完全相同
+        (1, 3, True),        # 与后半段重叠
+        (-1, 1, True),       # 与前半段重叠
+        (0.5, 1.5, True),    # 被包含
+        (-1, 4, True),       # 包含已有预约
+        (2, 4, False),       # 首尾相接
+        (-2, 0, False),      # 首尾相接
+    ])
+    def test_overlap_detection(self, client, auth_headers, admin_headers, test_boat,
+                               offset_start, offset_end, conflict):
+        """测试与已有预约 [10:00, 12:00) 重叠的时段被拒绝，首尾相接的时段允许"""
+        _reserve(client, auth_headers, test_boat.id, DAY, DAY + timedelta(hours=2))
+        response = _reserve(client, admin_headers, test_boat.id,
+                            DAY + timedelta(hours=offset_start), DAY + timedelta(hours=offset_end))
+        if conflict:
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+            assert response.json()["detail"] == "该时段已被预约"
+        else:
+            assert response.status_code == status.HTTP_200_OK
+
+    def test_overlap_with_earlier_of_many(self, client, auth_headers, test_boat):
+        """测试存在多条预约时，与较早预约的冲突和预约之间的空档都能正确判断"""
+        for hour in (0, 2, 4):
+            assert _reserve(client, auth_headers, test_boat.id, DAY + timedelta(hours=hour),
+                            DAY + timedelta(hours=hour + 1)).status_code == status.HTTP_200_OK
+        response = _reserve(client, auth_headers, test_boat.id, DAY + timedelta(hours=0.5),
+                            DAY + timedelta(hours=1.5))
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        # [11:00, 12:00) 位于 10:00 和 12:00 的预约之间
+        response = _reserve(client, auth_headers, test_boat.id, DAY + timedelta(hours=1), DAY + timedelta(hours=2))
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_other_boat_not_conflicting(self, client, auth_headers, test_boat, db_session):
+        """测试不同船只的同一时段互不影响"""
+        other = Boat(name="另一艘", rental_price=Decimal("10.00"))
+        db_session.add(other)
+        db_session.commit()
+        _reserve(client, auth_headers, test_boat.id, DAY, DAY + timedelta(hours=2))
+        response = _reserve(client, auth_headers, other.id, DAY, DAY + timedelta(hours=2))
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_cancelled_slot_can_be_rebooked(self, client, auth_headers, test_boat):
+        """测试取消后的时段可以再次预约"""
+        reservation = _reserve(client, auth_headers, test_boat.id, DAY, DAY + timedelta(hours=2)).json()
+        client.delete(f"/api/boats/reservations/{reservation['id']}", headers=auth_headers)
+        response = _reserve(client, auth_headers, test_boat.id, DAY, DAY + timedelta(hours=2))
+        assert response.status_code == status.HTTP_200_OK
+
+    @pytest.mark.parametrize("start, end, detail", [
+        (DAY, DAY, "结束时间必须晚于开始时间"),
+        (DAY + timedelta(minutes=10), DAY + timedelta(hours=1), "预约时段须以 30 分钟为单位"),
+        (DAY, DAY + timedelta(hours=13), "单次预约不能超过 12 小时"),
+        (DAY - timedelta(days=5), DAY - timedelta(days=5, hours=-1), "不能预约已经开始的时段"),
+        (DAY + timedelta(days=90), DAY + timedelta(days=90, hours=1), "最多提前 60 天预约"),
+    ])
+    def test_invalid_slot(self, client, auth_headers, test_boat, start, end, detail):
+        """测试不合法的预约时段"""
+        response = _reserve(client, auth_headers, test_boat.id, start, end)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()["detail"] == detail
+
+    def test_timezone_aware_input(self, client, auth_headers, test_boat):
+        """测试带时区的时间按 UTC 保存"""
+        start = (DAY + timedelta(hours=8)).isoformat() + "+08:00"
+        end = (DAY + timedelta(hours=9)).isoformat() + "+08:00"
+        response = client.post(f"/api/boats/{test_boat.id}/reservations", headers=auth_headers,
+                               json={"start_time": start, "end_time": end})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["start_time"].startswith(DAY.isoformat())
+
+    def test_maintenance_boat(self, client, auth_headers, test_boat, db_session):
+        """测试维护中的船只不可预约"""
+        test_boat.status = BoatStatus.MAINTENANCE
+        db_session.commit()
+        response = _reserve(client, auth_headers, test_boat.id, DAY, DAY + timedelta(hours=1))
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_boat_not_found(self, client, auth_headers):
+        """测试船只不存在"""
+        response = _reserve(client, auth_headers, 99999, DAY, DAY + timedelta(hours=1))
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestManageReservations:
+    """测试我的预约和取消预约"""
+
+    def test_my_reservations(self, client, auth_headers, admin_headers, test_boat):
+        """测试只返回本人的有效预约，按开始时间排序"""
+        _reserve(client, auth_headers, test_boat.id, DAY + timedelta(hours=3), DAY + timedelta(hours=4))
+        _reserve(client, auth_headers, test_boat.id, DAY, DAY + timedelta(hours=1))
+        _reserve(client, admin_headers, test_boat.id, DAY + timedelta(hours=5), DAY + timedelta(hours=6))
+        data = client.get("/api/boats/reservations", headers=auth_headers).json()
+        assert [item["start_time"][:16] for item in data] == [
+            DAY.isoformat()[:16], (DAY + timedelta(hours=3)).isoformat()[:16]
+        ]
+
+    def test_cancel_others_forbidden(self, client, auth_headers, admin_headers, test_boat):
+        """测试普通用户不能取消他人的预约，管理员可以"""
+        reservation = _reserve(client, admin_headers, test_boat.id, DAY, DAY + timedelta(hours=1)).json()
+        response = client.delete(f"/api/boats/reservations/{reservation['id']}", headers=auth_headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        reservation = _reserve(client, auth_headers, test_boat.id, DAY + timedelta(hours=2),
+                               DAY + timedelta(hours=3)).json()
+        response = client.delete(f"/api/boats/reservations/{reservation['id']}", headers=admin_headers)
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_cancel_twice(self, client, auth_headers, test_boat):
+        """测试重复取消返回 404"""
+        reservation = _reserve(client, auth_headers, test_boat.id, DAY, DAY + timedelta(hours=1)).json()
+        client.delete(f"/api/boats/reservations/{reservation['id']}", headers=auth_headers)
+        response = client.delete(f"/api/boats/reservations/{reservation['id']}", headers=auth_headers)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_rent_blocked_by_current_reservation(self, client, auth_headers, admin_headers,
+                                                 test_boat, db_session, test_user, admin_user):
+        """测试当前时段被他人预约的船只不能直接租用，预约人本人可以"""
+        now = datetime.utcnow()
+        db_session.add(BoatReservation(boat_id=test_boat.id, user_id=admin_user.id,
+                                       start_time=now - timedelta(minutes=30), end_time=now + timedelta(hours=1)))
+        test_user.balance = Decimal("100.00")
+        admin_user.balance = Decimal("100.00")
+        db_session.commit()
+        response = client.post(f"/api/boats/{test_boat.id}/rent", headers=auth_headers)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()["detail"] == "船只当前时段已被预约"
+        response = client.post(f"/api/boats/{test_boat.id}/rent", headers=admin_headers)
+        assert response.status_code == status.HTTP_200_OK
+
+
+class TestAvailability:
+    """测试可用时段端点 GET /api/boats/availability"""
+
+    def _get(self, client, headers, start, end):
+        return client.get("/api/boats/availability", headers=headers,
+                          params={"from": _iso(start), "to": _iso(end)})
+
+    def test_free_slots_for_all_boats(self, client, auth_headers, test_boat, db_session):
+        """测试一次返回所有船只的空闲时段，维护中的船只没有空闲时段"""
+        broken = Boat(name="维修中", rental_price=Decimal("10.00"), status=BoatStatus.MAINTENANCE)
+        db_session.add(broken)
+        db_session.commit()
+        _reserve(client, auth_headers, test_boat.id, DAY + timedelta(hours=1), DAY + timedelta(hours=2))
+        _reserve(client, auth_headers, test_boat.id, DAY + timedelta(hours=2), DAY + timedelta(hours=3))
+        _reserve(client, auth_headers, test_boat.id, DAY + timedelta(hours=5), DAY + timedelta(hours=6))
+
+        response = self._get(client, auth_headers, DAY, DAY + timedelta(hours=8))
+        assert response.status_code == status.HTTP_200_OK
+        by_id = {item["boat_id"]: item for item in response.json()}
+        free = [(slot["start_time"][11:16], slot["end_time"][11:16]) for slot in by_id[test_boat.id]["free"]]
+        assert free == [("10:00", "11:00"), ("13:00", "15:00"), ("16:00", "18:00")]
+        assert by_id[broken.id]["free"] == []
+
+    def test_reservation_crossing_window_start(self, client, auth_headers, test_boat):
+        """测试窗口开始前已开始的预约也会占用窗口内的时段"""
+        _reserve(client, auth_headers, test_boat.id, DAY - timedelta(hours=1), DAY + timedelta(hours=1))
+        data = self._get(client, auth_headers, DAY, DAY + timedelta(hours=4)).json()
+        assert [slot["start_time"][11:16] for slot in data[0]["free"]] == ["11:00"]
+
+    def test_past_not_available(self, client, auth_headers, test_boat):
+        """测试已经开始的时段不返回"""
+        now = datetime.utcnow()
+        data = self._get(client, auth_headers, now - timedelta(days=1), now + timedelta(hours=1)).json()
+        for slot in data[0]["free"]:
+            assert datetime.fromisoformat(slot["start_time"]) >= now
+
+    def test_window_too_long(self, client, auth_headers):
+        """测试时间范围过长返回 400"""
+        response = self._get(client, auth_headers, DAY, DAY + timedelta(days=40))
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestTimeslots:
+    """测试时段计算"""
+
+    def test_free_slots_merges_adjacent(self):
+        """测试相接和重叠的占用区间合并计算"""
+        busy = [(DAY, DAY + timedelta(hours=1)), (DAY + timedelta(hours=1), DAY + timedelta(hours=2)),
+                (DAY + timedelta(hours=1.5), DAY + timedelta(hours=3))]
+        assert timeslots.free_slots(DAY, DAY + timedelta(hours=4), busy) == [
+            (DAY + timedelta(hours=3), DAY + timedelta(hours=4))
+        ]
+
+    def test_ceil_to_slot(self):
+        """测试向后取整到时段边界"""
+        assert timeslots.ceil_to_slot(DAY + timedelta(minutes=1), 30) == DAY + timedelta(minutes=30)
+        assert timeslots.ceil_to_slot(DAY, 30) == DAY
@@ -189,3 +189,72 @@ class TestBoatsRentals:
         """测试普通用户无权限"""
         response = client.get("/api/boats/all/rentals", headers=auth_headers)
         assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+class TestRentalHistoryLoading:
+    """测试租借记录批量加载船只和精简格式"""
+
+    def _create_rentals(self, db_session, user, boats, count):
+        from datetime import datetime, timedelta
+        from app.models.boat import BoatRental
+        start = datetime(2025, 1, 1)
+        db_session.add_all([
+            BoatRental(boat_id=boats[i % len(boats)].id, user_id=user.id,
+                       rental_time=start + timedelta(hours=i), status="returned")
+            for i in range(count)
+        ])
+        db_session.commit()
+
+    def _boats(self, db_session, count):
+        from app.models.boat import Boat
+        boats = [Boat(name=f"boat{i}", type="laser", rental_price=Decimal("10.00")) for i in range(count)]
+        db_session.add_all(boats)
+        db_session.commit()
+        return boats
+
+    def _query_count(self, client, auth_headers, query_counter, url):
+        client.get(url, headers=auth_headers)  # 预热身份缓存
+        with query_counter() as metrics:
+            response = client.get(url, headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        return metrics.query_count, response.json()
+
+    @pytest.mark.parametrize("url", ["/api/boats/rentals", "/api/boats/rentals/compact"])
+    def test_query_count_independent_of_rentals(
+        self, client, auth_headers, test_user, db_session, query_counter, url
+    ):
+        """测试查询次数不随租借记录和船只数量增长"""
+        boats = self._boats(db_session, 5)
+        self._create_rentals(db_session, test_user, boats[:2], 2)
+        small, _ = self._query_count(client, auth_headers, query_counter, url)
+        self._create_rentals(db_session, test_user, boats, 40)
+        large, _ = self._query_count(client, auth_headers, query_counter, url)
+        assert large == small
+        assert large <= 2
+
+    def test_my_rentals_embed_boat(self, client, auth_headers, test_user, db_session):
+        """测试默认格式每条记录都嵌入船只"""
+        boats = self._boats(db_session, 2)
+        self._create_rentals(db_session, test_user, boats, 4)
+        data = client.get("/api/boats/rentals", headers=auth_headers).json()
+        assert len(data) == 4
+        assert all(rental["boat"]["id"] == rental["boat_id"] for rental in data)
+
+    def test_compact_deduplicates_boats(self, client, auth_headers, test_user, admin_user, db_session):
+        """测试精简格式：船只去重单独列出，租借记录不嵌入船只，只含本人记录"""
+        boats = self._boats(db_session, 3)
+        self._create_rentals(db_session, test_user, boats[:2], 10)
+        self._create_rentals(db_session, admin_user, boats[2:], 3)
+
+        data = client.get("/api/boats/rentals/compact", headers=auth_headers).json()
+        assert len(data["rentals"]) == 10
+        assert [rental["id"] for rental in data["rentals"]] == sorted(rental["id"] for rental in data["rentals"])
+        assert all("boat" not in rental for rental in data["rentals"])
+        assert [boat["id"] for boat in data["boats"]] == [boats[0].id, boats[1].id]
+        assert {rental["boat_id"] for rental in data["rentals"]} == {boat["id"] for boat in data["boats"]}
+
+    def test_compact_empty(self, client, auth_headers):
+        """测试没有租借记录时返回空列表"""
+        response = client.get("/api/boats/rentals/compact", headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"rentals": [], "boats": []}
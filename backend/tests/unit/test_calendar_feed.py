@@ -0,0 +1,158 @@
+"""
+日历订阅源测试
+测试 .ics 订阅源内容、签名订阅令牌和 ETag / Last-Modified 条件请求
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+
+from app.models.signup import ActivitySignup, SignupStatus
+from app.utils import ical
+
+
+@pytest.fixture
+def feed_token(client, auth_headers) -> str:
+    response = client.get("/api/activities/feed-token", headers=auth_headers)
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()["token"]
+
+
+class TestFeedToken:
+    """测试订阅令牌"""
+
+    def test_get_feed_token(self, client, auth_headers):
+        """测试获取订阅令牌和订阅地址"""
+        response = client.get("/api/activities/feed-token", headers=auth_headers)
+        data = response.json()
+        assert response.status_code == status.HTTP_200_OK
+        assert data["expires_in"] > 0
+        assert data["my_feed_url"].endswith(f"/api/activities/my/feed.ics?token={data['token']}")
+        assert "/api/activities/feed.ics?token=" in data["club_feed_url"]
+
+    def test_feed_token_not_access_token(self, client, feed_token):
+        """测试订阅令牌不能用作访问令牌"""
+        response = client.get("/api/activities", headers={"Authorization": f"Bearer {feed_token}"})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    @pytest.mark.parametrize("url", ["/api/activities/feed.ics", "/api/activities/my/feed.ics"])
+    def test_access_token_not_feed_token(self, client, user_token, url):
+        """测试访问令牌不能用作订阅令牌"""
+        response = client.get(f"{url}?token={user_token}")
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.json()["detail"] == "无效的订阅链接"
+
+
+class TestClubFeed:
+    """测试全协会订阅源"""
+
+    def test_feed_contains_activity(self, client, feed_token, test_activity):
+        """测试订阅源为 text/calendar 并包含活动"""
+        response = client.get(f"/api/activities/feed.ics?token={feed_token}")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/calendar")
+        body = response.text
+        assert body.startswith("BEGIN:VCALENDAR\r\n")
+        assert body.endswith("END:VCALENDAR\r\n")
+        assert f"UID:activity-{test_activity.id}@" in body
+        assert "SUMMARY:测试帆船活动" in body
+        assert response.headers["ETag"]
+        assert response.headers["Last-Modified"].endswith("GMT")
+
+    def test_old_activities_excluded(self, client, feed_token, db_session, test_activity):
+        """测试超出回溯天数的活动不在订阅源中"""
+        test_activity.start_time = datetime.utcnow() - timedelta(days=400)
+        test_activity.end_time = test_activity.start_time + timedelta(hours=2)
+        db_session.commit()
+        body = client.get(f"/api/activities/feed.ics?token={feed_token}").text
+        assert "BEGIN:VEVENT" not in body
+
+    def test_if_none_match_returns_304(self, client, feed_token, test_activity, query_counter):
+        """测试 ETag 未变时返回 304，只执行聚合查询"""
+        first = client.get(f"/api/activities/feed.ics?token={feed_token}")
+        with query_counter() as metrics:
+            response = client.get(f"/api/activities/feed.ics?token={feed_token}",
+                                  headers={"If-None-Match": first.headers["ETag"]})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+        assert response.headers["ETag"] == first.headers["ETag"]
+        assert metrics.query_count == 1
+
+    def test_if_modified_since_returns_304(self, client, feed_token, test_activity):
+        """测试没有 If-None-Match 时按 If-Modified-Since 判断"""
+        first = client.get(f"/api/activities/feed.ics?token={feed_token}")
+        response = client.get(f"/api/activities/feed.ics?token={feed_token}",
+                              headers={"If-Modified-Since": first.headers["Last-Modified"]})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_etag_changes_after_update(self, client, feed_token, db_session, test_activity):
+        """测试活动修改或新增后 ETag 变化，旧 ETag 返回完整内容"""
+        first = client.get(f"/api/activities/feed.ics?token={feed_token}")
+        test_activity.title = "改期的活动"
+        test_activity.updated_at = datetime.utcnow() + timedelta(minutes=5)
+        db_session.commit()
+        response = client.get(f"/api/activities/feed.ics?token={feed_token}",
+                              headers={"If-None-Match": first.headers["ETag"]})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["ETag"] != first.headers["ETag"]
+        assert "SUMMARY:改期的活动" in response.text
+
+
+class TestMyFeed:
+    """测试个人订阅源"""
+
+    def test_only_own_signups(self, client, auth_headers, feed_token, test_activity):
+        """测试个人订阅源只包含本人报名的活动"""
+        body = client.get(f"/api/activities/my/feed.ics?token={feed_token}").text
+        assert "BEGIN:VEVENT" not in body
+
+        client.post("/api/activities/signup", json={"activity_id": test_activity.id}, headers=auth_headers)
+        body = client.get(f"/api/activities/my/feed.ics?token={feed_token}").text
+        assert f"UID:activity-{test_activity.id}@" in body
+        assert "STATUS:CONFIRMED" in body
+
+    def test_waitlisted_is_tentative(self, client, feed_token, db_session, test_user, test_activity):
+        """测试候补中的报名标记为 TENTATIVE"""
+        db_session.add(ActivitySignup(activity_id=test_activity.id, user_id=test_user.id,
+                                      status=SignupStatus.WAITLISTED.value, waitlist_position=1))
+        db_session.commit()
+        body = client.get(f"/api/activities/my/feed.ics?token={feed_token}").text
+        assert "STATUS:TENTATIVE" in body
+
+    def test_etag_changes_on_signup_cancel_and_promotion(self, client, auth_headers, feed_token,
+                                                         db_session, test_user, test_activity):
+        """测试报名、取消和候补转正都会改变 ETag（回到相同状态时 ETag 也相同）"""
+        def etag():
+            return client.get(f"/api/activities/my/feed.ics?token={feed_token}").headers["ETag"]
+
+        seen = [etag()]
+        client.post("/api/activities/signup", json={"activity_id": test_activity.id}, headers=auth_headers)
+        seen.append(etag())
+        client.delete(f"/api/activities/signup/{test_activity.id}", headers=auth_headers)
+        seen.append(etag())
+
+        signup = ActivitySignup(activity_id=test_activity.id, user_id=test_user.id,
+                                status=SignupStatus.WAITLISTED.value, waitlist_position=1)
+        db_session.add(signup)
+        db_session.commit()
+        seen.append(etag())
+        signup.status = SignupStatus.CONFIRMED.value
+        db_session.commit()
+        seen.append(etag())
+        assert all(before != after for before, after in zip(seen, seen[1:]))
+
+
+class TestIcalRendering:
+    """测试 iCalendar 文本格式"""
+
+    def test_long_lines_folded(self):
+        """测试长行按 75 字节折行且不拆开多字节字符"""
+        folded = ical._fold("DESCRIPTION:" + "帆船" * 40)
+        lines = folded.split("\r\n")[:-1]
+        assert all(len(line.encode("utf-8")) <= 75 for line in lines)
+        assert all(line.startswith(" ") for line in lines[1:])
+        assert "".join(line[1:] if i else line for i, line in enumerate(lines)) == "DESCRIPTION:" + "帆船" * 40
+
+    def test_text_escaped(self):
+        """测试逗号、分号和换行被转义"""
+        assert ical._escape("a,b;c\nd") == "a\\,b\\;c\\nd"
@@ -0,0 +1,62 @@
+"""
+连接池指标测试
+测试 app.database 中的 InstrumentedQueuePool 和 /api/stats/db-pool
+"""
+import pytest
+from fastapi import status
+from sqlalchemy import create_engine, exc
+
+from app.database import InstrumentedQueuePool, get_pool_status, pool_metrics
+
+
+@pytest.fixture
+def pooled_engine(tmp_path):
+    """创建只有一个连接、不允许溢出的文件 SQLite 引擎"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    pool_metrics.reset()
+    yield engine
+    engine.dispose()
+    pool_metrics.reset()
+
+
+class TestInstrumentedQueuePool:
+    """测试连接池指标"""
+
+    def test_checkout_counts(self, pooled_engine):
+        """测试借出与空闲连接数"""
+        conn = pooled_engine.connect()
+        status_ = get_pool_status(pooled_engine)
+        assert status_["checked_out"] == 1
+        assert status_["idle"] == 0
+        assert status_["checkouts"] == 1
+        conn.close()
+        assert get_pool_status(pooled_engine)["idle"] == 1
+
+    def test_timeout_recorded(self, pooled_engine):
+        """测试连接池耗尽时记录超时"""
+        conn = pooled_engine.connect()
+        with pytest.raises(exc.TimeoutError):
+            pooled_engine.connect()
+        conn.close()
+        assert get_pool_status(pooled_engine)["timeouts"] == 1
+
+
+class TestDbPoolEndpoint:
+    """测试连接池状态端点 GET /api/stats/db-pool"""
+
+    def test_get_pool_status_admin(self, client, admin_headers):
+        """测试管理员查看连接池状态"""
+        response = client.get("/api/stats/db-pool", headers=admin_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert "pool_class" in response.json()
+
+    def test_get_pool_status_no_permission(self, client, auth_headers):
+        """测试普通用户无权限"""
+        response = client.get("/api/stats/db-pool", headers=auth_headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,206 @@
+"""
+船只利用率分析测试
+测试 app.utils.fleet_analytics 的单次遍历统计和 GET /api/stats/fleet-utilization
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from fastapi import status
+
+from app.models.boat import Boat, BoatRental
+from app.utils.fleet_analytics import HOURS_PER_WEEK, add_to_heatmap, analyze
+
+# 2025-03-03 是周一
+MONDAY = datetime(2025, 3, 3)
+
+
+def _at(hours: float) -> datetime:
+    return MONDAY + timedelta(hours=hours)
+
+
+class TestAnalyze:
+    """测试统计计算"""
+
+    def test_utilization_and_mean_duration(self):
+        """测试占用时长、利用率和平均租借时长"""
+        rows = [(1, _at(2), _at(4)), (1, _at(10), _at(11)), (2, _at(5), _at(8))]
+        result = analyze(rows, [1, 2, 3], _at(0), _at(24))
+        boats = {boat["boat_id"]: boat for boat in result["boats"]}
+        assert boats[1]["utilization_hours"] == 3
+        assert boats[1]["utilization_rate"] == 0.125
+        assert boats[1]["mean_duration_hours"] == 1.5
+        assert boats[3]["rental_count"] == 0
+        assert boats[3]["mean_duration_hours"] is None
+        assert result["rental_count"] == 3
+        assert result["utilization_hours"] == 6
+        assert result["utilization_rate"] == round(6 / 72, 4)
+        assert result["mean_duration_hours"] == 2
+
+    def test_clipped_to_window(self):
+        """测试跨越窗口边界的租借只计窗口内部分，未归还的租借占用到截止时间"""
+        rows = [(1, _at(-5), _at(2)), (2, _at(20), None)]
+        result = analyze(rows, [1, 2], _at(0), _at(24))
+        boats = {boat["boat_id"]: boat for boat in result["boats"]}
+        assert boats[1]["utilization_hours"] == 2
+        # 平均时长按完整租借计算
+        assert boats[1]["mean_duration_hours"] == 7
+        assert boats[2]["utilization_hours"] == 4
+        assert boats[2]["mean_duration_hours"] is None
+
+    def test_overlapping_rentals_counted_once(self):
+        """测试同一船只重叠的租借记录只计一次占用"""
+        rows = [(1, _at(1), _at(5)), (1, _at(2), _at(3)), (1, _at(4), _at(6))]
+        boat = analyze(rows, [1], _at(0), _at(24))["boats"][0]
+        assert boat["rental_count"] == 3
+        assert boat["utilization_hours"] == 5
+        assert sum(map(sum, analyze(rows, [1], _at(0), _at(24))["heatmap"])) == 5
+
+    def test_longest_idle(self):
+        """测试最长空闲间隔包含窗口开头和结尾"""
+        rows = [(1, _at(3), _at(4)), (1, _at(6), _at(7)), (2, _at(1), _at(2))]
+        boats = {boat["boat_id"]: boat for boat in analyze(rows, [1, 2, 3], _at(0), _at(11))["boats"]}
+        assert boats[1]["longest_idle_hours"] == 4
+        assert (boats[1]["longest_idle_start"], boats[1]["longest_idle_end"]) == (_at(7), _at(11))
+        assert (boats[2]["longest_idle_start"], boats[2]["longest_idle_end"]) == (_at(2), _at(11))
+        # 没有租借的船只整个窗口都空闲
+        assert boats[3]["longest_idle_hours"] == 11
+
+    def test_unknown_boats_ignored(self):
+        """测试不在船只列表中的记录被忽略"""
+        result = analyze([(9, _at(1), _at(2))], [1], _at(0), _at(24))
+        assert result["rental_count"] == 0
+
+    def test_empty_window(self):
+        """测试窗口为空时不除零"""
+        result = analyze([], [1], _at(0), _at(0))
+        assert result["utilization_rate"] == 0
+        assert result["boats"][0]["utilization_rate"] == 0
+
+
+class TestHeatmap:
+    """测试周内小时热力图"""
+
+    def test_split_across_hours(self):
+        """测试租借按小时拆分到对应槽"""
+        heatmap = [0.0] * HOURS_PER_WEEK
+        add_to_heatmap(heatmap, _at(9.5), _at(11.25))
+        assert heatmap[9] == 0.5
+        assert heatmap[10] == 1
+        assert heatmap[11] == 0.25
+        assert sum(heatmap) == 1.75
+
+    def test_wraps_to_monday(self):
+        """测试周日深夜跨到周一凌晨"""
+        heatmap = [0.0] * HOURS_PER_WEEK
+        add_to_heatmap(heatmap, _at(-1), _at(1))
+        assert heatmap[HOURS_PER_WEEK - 1] == 1
+        assert heatmap[0] == 1
+
+    def test_whole_weeks(self):
+        """测试超过一周的租借整周批量累加"""
+        heatmap = [0.0] * HOURS_PER_WEEK
+        add_to_heatmap(heatmap, _at(0), _at(HOURS_PER_WEEK * 2 + 3))
+        assert heatmap[:3] == [3, 3, 3]
+        assert heatmap[3:] == [2] * (HOURS_PER_WEEK - 3)
+
+    def test_result_layout(self):
+        """测试结果为 7 行 24 列，周一为第 0 行"""
+        heatmap = analyze([(1, _at(24 * 2 + 14), _at(24 * 2 + 15))], [1], _at(0), _at(24 * 7))["heatmap"]
+        assert len(heatmap) == 7 and all(len(day) == 24 for day in heatmap)
+        assert heatmap[2][14] == 1
+
+
+class TestFleetUtilizationEndpoint:
+    """测试 GET /api/stats/fleet-utilization"""
+
+    URL = "/api/stats/fleet-utilization"
+    WINDOW = "from=2025-03-03T00:00:00&to=2025-03-10T00:00:00"
+
+    @pytest.fixture
+    def fleet(self, db_session, test_user):
+        boats = [
+            Boat(name="laser1", type="laser", rental_price=Decimal("10.00")),
+            Boat(name="laser2", type="laser", rental_price=Decimal("10.00")),
+            Boat(name="keel", type="keelboat", rental_price=Decimal("50.00")),
+        ]
+        db_session.add_all(boats)
+        db_session.flush()
+        db_session.add_all([
+            BoatRental(boat_id=boats[0].id, user_id=test_user.id, rental_time=_at(9), return_time=_at(12),
+                       status="returned"),
+            BoatRental(boat_id=boats[2].id, user_id=test_user.id, rental_time=_at(30), return_time=_at(34),
+                       status="returned"),
+            # 窗口之前结束的记录不参与统计
+            BoatRental(boat_id=boats[0].id, user_id=test_user.id, rental_time=_at(-30), return_time=_at(-28),
+                       status="returned"),
+        ])
+        db_session.commit()
+        return boats
+
+    def test_window_and_type_filter(self, client, admin_headers, fleet):
+        """测试按时间范围和船型统计"""
+        data = client.get(f"{self.URL}?{self.WINDOW}", headers=admin_headers).json()
+        assert data["window_hours"] == 168
+        assert data["rental_count"] == 2
+        boats = {boat["boat_name"]: boat for boat in data["boats"]}
+        assert boats["laser1"]["utilization_hours"] == 3
+        assert boats["keel"]["type"] == "keelboat"
+        assert data["heatmap"][0][9] == 1
+        assert data["heatmap"][1][6] == 1
+
+        data = client.get(f"{self.URL}?{self.WINDOW}&type=laser", headers=admin_headers).json()
+        assert [boat["boat_name"] for boat in data["boats"]] == ["laser1", "laser2"]
+        assert data["utilization_hours"] == 3
+
+    def test_query_count(self, client, admin_headers, db_session, fleet, test_user, query_counter):
+        """测试查询次数不随船只和租借数量增长"""
+        client.get(f"{self.URL}?{self.WINDOW}", headers=admin_headers)  # 预热身份缓存和船只状态表
+        with query_counter() as metrics:
+            client.get(f"{self.URL}?{self.WINDOW}", headers=admin_headers)
+        small = metrics.query_count
+
+        db_session.add_all([
+            BoatRental(boat_id=fleet[i % 3].id, user_id=test_user.id, rental_time=_at(i), return_time=_at(i + 0.5),
+                       status="returned")
+            for i in range(100)
+        ])
+        db_session.commit()
+        with query_counter() as metrics:
+            data = client.get(f"{self.URL}?{self.WINDOW}&type=laser", headers=admin_headers).json()
+        # 窗口开始时仍在租的记录和窗口内租出的记录各一条查询
+        assert metrics.query_count == small <= 2
+        assert data["rental_count"] > 60
+
+    def test_long_rental_before_window(self, client, admin_headers, db_session, fleet, test_user):
+        """测试窗口开始前租出、窗口内才归还或仍未归还的租借也计入"""
+        db_session.add_all([
+            BoatRental(boat_id=fleet[1].id, user_id=test_user.id, rental_time=_at(-100), return_time=_at(5),
+                       status="returned"),
+            BoatRental(boat_id=fleet[2].id, user_id=test_user.id, rental_time=_at(-50), status="active"),
+        ])
+        db_session.commit()
+        data = client.get(f"{self.URL}?{self.WINDOW}", headers=admin_headers).json()
+        boats = {boat["boat_name"]: boat for boat in data["boats"]}
+        assert boats["laser2"]["utilization_hours"] == 5
+        assert boats["keel"]["utilization_hours"] == 168
+        assert data["rental_count"] == 4
+
+    def test_default_window(self, client, admin_headers, fleet):
+        """测试默认统计最近 90 天"""
+        data = client.get(self.URL, headers=admin_headers).json()
+        assert data["window_hours"] == pytest.approx(90 * 24, abs=0.01)
+
+    @pytest.mark.parametrize("query", [
+        "from=2025-03-10T00:00:00&to=2025-03-03T00:00:00",
+        "from=2010-01-01T00:00:00&to=2025-03-03T00:00:00",
+    ])
+    def test_invalid_window(self, client, admin_headers, query):
+        """测试时间范围非法或过长时返回 400"""
+        response = client.get(f"{self.URL}?{query}", headers=admin_headers)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_admin_only(self, client, auth_headers):
+        """测试普通用户无权限"""
+        response = client.get(self.URL, headers=auth_headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
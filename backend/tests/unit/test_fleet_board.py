@@ -0,0 +1,162 @@
+"""
+船只状态表测试
+测试 app.utils.fleet_board 的加载、过期重新加载、事务内登记、提交后生效、一致性核对和回退开关
+"""
+import time
+from decimal import Decimal
+
+import pytest
+from fastapi import status
+from sqlalchemy import text
+
+from app.config import Settings
+
+from app.models.boat import Boat, BoatStatus, CaseInsensitiveEnum
+from app.utils.fleet_board import fleet_board
+
+
+@pytest.fixture(autouse=True)
+def clear_board():
+    # 不使用 client 的测试也从空状态表开始
+    fleet_board.clear()
+    yield
+    fleet_board.clear()
+
+
+def _available_ids(client, headers):
+    response = client.get("/api/boats?status=available", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    return [boat["id"] for boat in response.json()]
+
+
+class TestFleetBoardReads:
+    """测试读取走状态表"""
+
+    def test_reads_without_queries_after_load(self, client, auth_headers, test_boat, query_counter):
+        """测试首次读取加载后，列表和详情读取不再查询数据库"""
+        assert _available_ids(client, auth_headers) == [test_boat.id]
+        with query_counter() as metrics:
+            assert _available_ids(client, auth_headers) == [test_boat.id]
+            response = client.get(f"/api/boats/{test_boat.id}", headers=auth_headers)
+        assert response.json()["name"] == "测试帆船"
+        assert metrics.query_count == 0
+        assert fleet_board.stats()["loads"] == 1
+
+    def test_disabled_falls_back_to_db(self, client, auth_headers, test_boat, db_session, monkeypatch):
+        """测试关闭状态表后读取直接查询数据库"""
+        _available_ids(client, auth_headers)
+        test_boat.status = BoatStatus.MAINTENANCE
+        db_session.commit()
+        monkeypatch.setattr(fleet_board, "enabled", False)
+        assert _available_ids(client, auth_headers) == []
+
+
+    def test_external_write_visible_after_ttl(self, client, auth_headers, test_boat, db_session, monkeypatch):
+        """测试其他进程直接修改 boats 表后，快照过期时重新加载"""
+        _available_ids(client, auth_headers)
+        db_session.execute(text("UPDATE boats SET status = 'maintenance' WHERE id = :id"), {"id": test_boat.id})
+        db_session.commit()
+        assert _available_ids(client, auth_headers) == [test_boat.id]
+
+        monkeypatch.setattr(fleet_board, "ttl", 60)
+        monkeypatch.setattr(fleet_board, "_loaded_at", time.monotonic() - 61)
+        assert _available_ids(client, auth_headers) == []
+        assert fleet_board.stats()["loads"] == 2
+
+    @pytest.mark.parametrize("backend, configured, expected", [
+        ("sqlite", None, True), ("mysql", None, False), ("mysql", True, True), ("sqlite", False, False),
+    ])
+    def test_enabled_default_by_backend(self, backend, configured, expected):
+        """测试未配置时仅 SQLite 模式默认开启"""
+        assert Settings(DB_BACKEND=backend, FLEET_BOARD_ENABLED=configured).FLEET_BOARD_ENABLED is expected
+
+
+class TestFleetBoardWrites:
+    """测试写入端点提交后更新状态表"""
+
+    def test_rent_and_return(self, client, auth_headers, admin_headers, test_boat, db_session, test_user):
+        """测试租船后船只不再可租，还船后恢复，且与表内容一致"""
+        test_user.balance = Decimal("100.00")
+        db_session.commit()
+        assert _available_ids(client, auth_headers) == [test_boat.id]
+
+        rental = client.post(f"/api/boats/{test_boat.id}/rent", headers=auth_headers).json()
+        assert _available_ids(client, auth_headers) == []
+        rented = client.get("/api/boats?status=rented", headers=auth_headers).json()
+        assert [boat["id"] for boat in rented] == [test_boat.id]
+
+        client.post("/api/boats/return", headers=auth_headers, json={"rental_id": rental["id"]})
+        assert _available_ids(client, auth_headers) == [test_boat.id]
+        assert client.get("/api/stats/fleet-board", headers=admin_headers).json()["consistent"] is True
+
+    def test_create_update_delete(self, client, auth_headers, admin_headers, test_boat):
+        """测试创建、修改和删除船只都反映到状态表"""
+        _available_ids(client, auth_headers)
+        created = client.post("/api/boats", headers=admin_headers,
+                              json={"name": "新船", "rental_price": 12.5}).json()
+        assert _available_ids(client, auth_headers) == [test_boat.id, created["id"]]
+
+        client.put(f"/api/boats/{test_boat.id}", headers=admin_headers, json={"status": "maintenance"})
+        assert _available_ids(client, auth_headers) == [created["id"]]
+
+        client.delete(f"/api/boats/{created['id']}", headers=admin_headers)
+        assert _available_ids(client, auth_headers) == []
+        response = client.get(f"/api/boats/{created['id']}", headers=auth_headers)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert client.get("/api/stats/fleet-board", headers=admin_headers).json()["consistent"] is True
+
+    def test_rollback_discards_staged(self, db_session, test_boat):
+        """测试事务回滚时丢弃已登记的快照"""
+        fleet_board.list(db_session)
+        test_boat.status = BoatStatus.MAINTENANCE
+        fleet_board.stage(db_session, test_boat)
+        db_session.rollback()
+        assert fleet_board.get(db_session, test_boat.id)["status"] == BoatStatus.AVAILABLE
+
+    def test_older_snapshot_not_applied(self, db_session, test_boat):
+        """测试提交后应用顺序颠倒时，旧快照不会覆盖新快照"""
+        fleet_board.list(db_session)
+        old = dict(fleet_board.get(db_session, test_boat.id), status=BoatStatus.RENTED)
+        new = dict(old, status=BoatStatus.AVAILABLE)
+        fleet_board.apply([(1000002, test_boat.id, new)])
+        fleet_board.apply([(1000001, test_boat.id, old)])
+        assert fleet_board.get(db_session, test_boat.id)["status"] == BoatStatus.AVAILABLE
+
+
+class TestFleetBoardCheck:
+    """测试一致性核对 GET /api/stats/fleet-board"""
+
+    def test_detects_and_reloads_external_change(self, client, auth_headers, admin_headers,
+                                                 test_boat, db_session):
+        """测试绕过端点直接改表后核对出不一致，reload 后重新加载"""
+        _available_ids(client, auth_headers)
+        test_boat.status = BoatStatus.MAINTENANCE
+        db_session.add(Boat(name="外部新增", rental_price=Decimal("1.00")))
+        db_session.commit()
+
+        result = client.get("/api/stats/fleet-board?reload=true", headers=admin_headers).json()
+        assert result["consistent"] is False
+        assert result["mismatched"] == [test_boat.id]
+        assert len(result["missing"]) == 1
+        assert result["reloaded"] is True
+        assert client.get("/api/stats/fleet-board", headers=admin_headers).json()["loaded"] is False
+        assert test_boat.id not in _available_ids(client, auth_headers)
+
+    def test_no_permission(self, client, auth_headers):
+        """测试普通用户无权限"""
+        response = client.get("/api/stats/fleet-board", headers=auth_headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+class TestCaseInsensitiveEnum:
+    """测试枚举列读取"""
+
+    @pytest.mark.parametrize("raw, expected", [
+        ("available", BoatStatus.AVAILABLE),
+        ("RENTED", BoatStatus.RENTED),
+        ("Maintenance", BoatStatus.MAINTENANCE),
+        ("unknown", BoatStatus.AVAILABLE),
+    ])
+    def test_process_result_value(self, raw, expected):
+        """测试大小写不敏感匹配，未知值回退为默认值"""
+        assert CaseInsensitiveEnum(BoatStatus).process_result_value(raw, None) is expected
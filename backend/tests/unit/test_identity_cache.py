@@ -0,0 +1,112 @@
+"""
+身份缓存测试
+测试 app.utils.identity_cache 以及认证依赖中的缓存命中/失效
+"""
+import time
+
+from fastapi import status
+from sqlalchemy import text
+
+from app.utils.identity_cache import IdentityCache, identity_cache
+
+
+class TestIdentityCacheUnit:
+    """测试 IdentityCache 本身的容量、TTL 和计数"""
+
+    def test_hit_and_miss_counters(self):
+        """测试命中/未命中计数"""
+        cache = IdentityCache(max_size=10, ttl_seconds=60)
+        assert cache.get(1) is None
+        cache.set(1, {"id": 1})
+        assert cache.get(1) == {"id": 1}
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_lru_eviction(self):
+        """测试超出容量时淘汰最久未使用的条目"""
+        cache = IdentityCache(max_size=2, ttl_seconds=60)
+        cache.set(1, {"id": 1})
+        cache.set(2, {"id": 2})
+        cache.get(1)
+        cache.set(3, {"id": 3})
+        assert cache.get(2) is None
+        assert cache.get(1) is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_ttl_expiry(self):
+        """测试条目过期"""
+        cache = IdentityCache(max_size=10, ttl_seconds=0.01)
+        cache.set(1, {"id": 1})
+        time.sleep(0.02)
+        assert cache.get(1) is None
+
+    def test_disabled_cache(self):
+        """测试容量为 0 时不缓存"""
+        cache = IdentityCache(max_size=0, ttl_seconds=60)
+        cache.set(1, {"id": 1})
+        assert cache.get(1) is None
+
+
+class TestIdentityCacheAuth:
+    """测试认证依赖使用身份缓存"""
+
+    def test_second_request_hits_cache(self, client, auth_headers):
+        """测试第二次认证请求命中缓存"""
+        client.get("/api/users/me", headers=auth_headers)
+        client.get("/api/users/me", headers=auth_headers)
+        stats = identity_cache.stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 1
+
+    def test_balance_update_invalidates(self, client, auth_headers, admin_headers, test_user):
+        """测试修改余额后缓存失效"""
+        client.get("/api/users/me", headers=auth_headers)
+        response = client.post(
+            f"/api/users/{test_user.id}/balance?amount=25.0",
+            headers=admin_headers
+        )
+        assert response.status_code == status.HTTP_200_OK
+        response = client.get("/api/users/me", headers=auth_headers)
+        assert response.json()["balance"] == 125.0
+
+    def test_renamed_user_token_rejected(self, client, auth_headers, test_user):
+        """测试修改用户名后旧 token 失效"""
+        client.get("/api/users/me", headers=auth_headers)
+        response = client.put(
+            f"/api/users/{test_user.id}",
+            headers=auth_headers,
+            json={"username": "renamed"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        response = client.get("/api/users/me", headers=auth_headers)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_self_balance_change_uses_db_value(self, client, admin_headers, admin_user, db_session):
+        """测试缓存中的余额过期时，给本人充值和改余额都以数据库中的余额为准"""
+        client.get("/api/users/me", headers=admin_headers)  # 缓存余额 500
+        db_session.execute(text("UPDATE users SET balance = 1000 WHERE id = :id"), {"id": admin_user.id})
+        db_session.commit()
+        client.get("/api/users/me", headers=admin_headers)  # 仍命中旧快照
+        assert client.get("/api/finances/balance", headers=admin_headers).json()["total_balance"] == 1000
+
+        response = client.post("/api/finances/deposit?amount=10", headers=admin_headers)
+        assert response.json()["new_balance"] == 1010
+        response = client.post(f"/api/users/{admin_user.id}/balance?amount=5", headers=admin_headers)
+        assert response.json()["new_balance"] == 1015
+
+        db_session.execute(text("UPDATE users SET balance = 2000 WHERE id = :id"), {"id": admin_user.id})
+        db_session.commit()
+        client.get("/api/users/me", headers=admin_headers)
+        response = client.post("/api/finances", headers=admin_headers, json={
+            "type": "income", "amount": 1, "user_id": admin_user.id, "description": "x"
+        })
+        assert response.status_code == status.HTTP_200_OK
+        assert client.get(f"/api/users/{admin_user.id}", headers=admin_headers).json()["balance"] == 2001
+
+    def test_cache_stats_admin(self, client, admin_headers):
+        """测试管理员查看缓存统计"""
+        response = client.get("/api/stats/identity-cache", headers=admin_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert "hit_rate" in response.json()
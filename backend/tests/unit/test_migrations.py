@@ -0,0 +1,244 @@
+"""
+数据库结构版本测试
+使用临时 SQLite 文件测试 app.migrations 的启动检查和迁移
+"""
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError
+
+from app import migrations
+from app.database import Base
+from app.migrations import SchemaVersionError, check_schema_version, get_schema_version, migrate
+from app.models.schema_version import SchemaVersion
+from app.utils.request_metrics import track_queries
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    yield engine
+    engine.dispose()
+
+
+class TestSchemaVersion:
+    """测试结构版本检查和迁移"""
+
+    def test_check_fails_on_empty_database(self, engine):
+        """测试未初始化的数据库启动检查失败"""
+        assert get_schema_version(engine) is None
+        with pytest.raises(SchemaVersionError):
+            check_schema_version(engine)
+
+    def test_migrate_new_database(self, engine):
+        """测试全新数据库建表并记为当前版本"""
+        assert migrate(engine) == migrations.SCHEMA_VERSION
+        assert check_schema_version(engine) == migrations.SCHEMA_VERSION
+        # 重复执行不会重复记录
+        migrate(engine)
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM schema_version")).scalar() == 1
+
+    def test_check_is_single_query(self, engine):
+        """测试启动检查只执行一条查询"""
+        migrate(engine)
+        with track_queries(engine) as metrics:
+            check_schema_version(engine)
+        assert metrics.query_count == 1
+
+    def test_legacy_database_gets_pending_migrations(self, engine, monkeypatch):
+        """测试没有版本记录的旧库从版本 1 开始执行增量迁移"""
+        tables = [t for t in Base.metadata.sorted_tables if t.name != SchemaVersion.__tablename__]
+        Base.metadata.create_all(bind=engine, tables=tables)
+        applied = []
+        monkeypatch.setattr(migrations, "SCHEMA_VERSION", 2)
+        monkeypatch.setattr(migrations, "MIGRATIONS", {2: lambda conn: applied.append(2)})
+
+        assert migrate(engine) == 2
+        assert applied == [2]
+        assert check_schema_version(engine) == 2
+        assert migrate(engine) == 2
+        assert applied == [2]
+
+    def test_signup_count_backfilled(self, engine):
+        """测试版本 2 迁移为旧库补上 activities.signup_count 并按报名记录回填"""
+        tables = [t for t in Base.metadata.sorted_tables if t.name != SchemaVersion.__tablename__]
+        Base.metadata.create_all(bind=engine, tables=tables)
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE activities DROP COLUMN signup_count"))
+            conn.execute(text(
+                "INSERT INTO activities (id, title, start_time, end_time, max_participants) "
+                "VALUES (1, 'a', '2026-01-01', '2026-01-02', 10)"
+            ))
+            conn.execute(text("INSERT INTO activity_signups (activity_id, user_id) VALUES (1, 1), (1, 2)"))
+
+        assert migrate(engine) == migrations.SCHEMA_VERSION
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT signup_count FROM activities WHERE id = 1")).scalar() == 2
+
+    def test_ballot_columns_added(self, engine):
+        """测试版本 5 迁移为版本 4 的库补上抽签相关列，已有报名视为已录取"""
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO schema_version (version) VALUES (4)"))
+            conn.execute(text("DROP INDEX ix_activity_signups_waitlist"))
+            for table, column in (("activities", "allocation_mode"), ("activities", "ballot_drawn_at"),
+                                  ("activities", "ballot_seed"), ("activity_signups", "status"),
+                                  ("activity_signups", "waitlist_position")):
+                conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+            conn.execute(text(
+                "INSERT INTO activities (id, title, start_time, end_time, max_participants) "
+                "VALUES (1, 'a', '2026-01-01', '2026-01-02', 10)"
+            ))
+            conn.execute(text("INSERT INTO activity_signups (activity_id, user_id) VALUES (1, 1)"))
+
+        assert migrate(engine) == migrations.SCHEMA_VERSION
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT allocation_mode FROM activities")).scalar() == "fcfs"
+            assert conn.execute(text("SELECT status FROM activity_signups")).scalar() == "confirmed"
+
+    def test_waitlist_tail_backfilled(self, engine):
+        """测试版本 6 迁移补上 activities.waitlist_tail 并按已有候补序号回填"""
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO schema_version (version) VALUES (5)"))
+            conn.execute(text("DROP INDEX ix_activity_signups_waitlist"))
+            conn.execute(text("ALTER TABLE activities DROP COLUMN waitlist_tail"))
+            conn.execute(text(
+                "INSERT INTO activities (id, title, start_time, end_time, max_participants) "
+                "VALUES (1, 'a', '2026-01-01', '2026-01-02', 1)"
+            ))
+            conn.execute(text(
+                "INSERT INTO activity_signups (activity_id, user_id, status, waitlist_position) "
+                "VALUES (1, 1, 'confirmed', NULL), (1, 2, 'waitlisted', 1), (1, 3, 'waitlisted', 2)"
+            ))
+
+        assert migrate(engine) == migrations.SCHEMA_VERSION
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT waitlist_tail FROM activities WHERE id = 1")).scalar() == 2
+
+    @pytest.mark.parametrize("existing_user_index", [None, "idx_user_id"])
+    def test_feed_indexes_added(self, engine, existing_user_index):
+        """测试版本 7 迁移补上订阅源索引，已有同列的 user_id 索引时不重复创建"""
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO schema_version (version) VALUES (6)"))
+            conn.execute(text("DROP INDEX ix_activities_updated_at"))
+            conn.execute(text("DROP INDEX ix_activity_signups_user_id"))
+            if existing_user_index:
+                conn.execute(text(f"CREATE INDEX {existing_user_index} ON activity_signups (user_id)"))
+
+        assert migrate(engine) == migrations.SCHEMA_VERSION
+        with engine.connect() as conn:
+            names = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+        assert "ix_activities_updated_at" in names
+        assert ("ix_activity_signups_user_id" in names) == (existing_user_index is None)
+
+    def test_boat_reservations_table_added(self, engine):
+        """测试版本 8 迁移创建 boat_reservations 表及索引"""
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO schema_version (version) VALUES (7)"))
+            conn.execute(text("DROP TABLE boat_reservations"))
+
+        assert migrate(engine) == migrations.SCHEMA_VERSION
+        with engine.connect() as conn:
+            names = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+        assert "ix_boat_reservations_boat_id_status_start_time" in names
+
+    def test_rental_time_index_added(self, engine):
+        """测试版本 9 迁移补上利用率分析用的 rental_time 覆盖索引"""
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO schema_version (version) VALUES (8)"))
+            conn.execute(text("DROP INDEX ix_boats_rentals_rental_time"))
+
+        assert migrate(engine) == migrations.SCHEMA_VERSION
+        with engine.connect() as conn:
+            names = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+        assert "ix_boats_rentals_rental_time" in names
+
+    def test_boat_version_added(self, engine):
+        """测试版本 10 迁移为 boats 表补上 version 列，已有船只从 0 开始"""
+        tables = [t for t in Base.metadata.sorted_tables if t.name != "boats"]
+        Base.metadata.create_all(bind=engine, tables=tables)
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE boats (id INTEGER PRIMARY KEY, name VARCHAR(50) NOT NULL, type VARCHAR(50), "
+                "status VARCHAR(11), rental_price NUMERIC(10, 2), image_url VARCHAR(255), description TEXT, "
+                "created_at DATETIME, updated_at DATETIME)"
+            ))
+            conn.execute(text("INSERT INTO boats (id, name, status) VALUES (1, 'laser', 'available')"))
+            conn.execute(text("INSERT INTO schema_version (version) VALUES (9)"))
+
+        assert migrate(engine) == migrations.SCHEMA_VERSION
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT version FROM boats WHERE id = 1")).scalar() == 0
+
+    def test_job_leases_added(self, engine):
+        """测试版本 11 迁移创建 job_leases 表和逾期清理用的索引"""
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO schema_version (version) VALUES (10)"))
+            conn.execute(text("DROP TABLE job_leases"))
+            conn.execute(text("DROP INDEX ix_boats_rentals_status_rental_time"))
+
+        assert migrate(engine) == migrations.SCHEMA_VERSION
+        with engine.connect() as conn:
+            names = set(conn.execute(text("SELECT name FROM sqlite_master")).scalars())
+        assert {"job_leases", "ix_boats_rentals_status_rental_time"} <= names
+
+    def test_legacy_database_gets_hot_query_indexes(self, engine):
+        """测试没有版本记录的旧库迁移后补上热点查询索引和报名唯一约束，重复报名被去重"""
+        tables = [t for t in Base.metadata.sorted_tables
+                  if t.name not in (SchemaVersion.__tablename__, "activity_signups")]
+        Base.metadata.create_all(bind=engine, tables=tables)
+        legacy_indexes = ["ix_finances_type_created_at", "ix_boats_rentals_user_id_status",
+                          "ix_posts_tag_id_created_at", "ix_comments_post_id_created_at", "ix_notices_created_at"]
+        with engine.begin() as conn:
+            for name in legacy_indexes:
+                conn.execute(text(f"DROP INDEX {name}"))
+            # 引入版本管理前的报名表：没有唯一约束
+            conn.execute(text(
+                "CREATE TABLE activity_signups (id INTEGER PRIMARY KEY, activity_id INTEGER, user_id INTEGER, "
+                "signup_time DATETIME, check_in BOOLEAN)"
+            ))
+            conn.execute(text(
+                "INSERT INTO activities (id, title, start_time, end_time, max_participants, signup_count) "
+                "VALUES (1, 'a', '2026-01-01', '2026-01-02', 10, 0)"
+            ))
+            conn.execute(text("INSERT INTO activity_signups (activity_id, user_id) VALUES (1, 1), (1, 1), (1, 2)"))
+        # 去掉 signup_count 以模拟版本 1 的结构
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE activities DROP COLUMN signup_count"))
+
+        assert migrate(engine) == migrations.SCHEMA_VERSION
+        with engine.connect() as conn:
+            names = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+            assert set(legacy_indexes) | {"unique_signup"} <= names
+            assert conn.execute(text("SELECT COUNT(*) FROM activity_signups")).scalar() == 2
+            assert conn.execute(text("SELECT signup_count FROM activities WHERE id = 1")).scalar() == 2
+            with pytest.raises(IntegrityError):
+                conn.execute(text("INSERT INTO activity_signups (activity_id, user_id) VALUES (1, 2)"))
+
+    def test_hot_query_indexes_not_duplicated(self, engine):
+        """测试版本 12 迁移在已有唯一约束的库上不重复创建"""
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO schema_version (version) VALUES (11)"))
+
+        assert migrate(engine) == migrations.SCHEMA_VERSION
+        with engine.connect() as conn:
+            names = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+        assert "unique_signup" not in names
+
+    def test_return_time_index_added(self, engine):
+        """测试版本 13 迁移补上利用率分析用的 return_time 索引"""
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO schema_version (version) VALUES (12)"))
+            conn.execute(text("DROP INDEX ix_boats_rentals_return_time"))
+
+        assert migrate(engine) == migrations.SCHEMA_VERSION
+        with engine.connect() as conn:
+            names = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+        assert "ix_boats_rentals_return_time" in names
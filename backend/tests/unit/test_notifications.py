@@ -0,0 +1,55 @@
+"""
+Notifications 模块测试
+测试 /api/notifications 下的端点
+"""
+import pytest
+from fastapi import status
+
+from app.models.notification import Notification
+
+
+@pytest.fixture
+def notifications(db_session, test_user, admin_user):
+    rows = [
+        Notification(user_id=test_user.id, title="候补转正", content="a"),
+        Notification(user_id=test_user.id, title="候补转正", content="b", is_read=True),
+        Notification(user_id=admin_user.id, title="候补转正", content="c"),
+    ]
+    db_session.add_all(rows)
+    db_session.commit()
+    return rows
+
+
+class TestNotificationsList:
+    """测试获取我的通知端点 GET /api/notifications"""
+
+    def test_only_own_notifications(self, client, auth_headers, notifications):
+        """测试只返回当前用户的通知"""
+        response = client.get("/api/notifications", headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert sorted(n["content"] for n in response.json()) == ["a", "b"]
+
+    def test_unread_filter(self, client, auth_headers, notifications):
+        """测试只看未读"""
+        response = client.get("/api/notifications?unread=true", headers=auth_headers)
+        assert [n["content"] for n in response.json()] == ["a"]
+
+    def test_no_token(self, client):
+        """测试无 token"""
+        response = client.get("/api/notifications")
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class TestNotificationsRead:
+    """测试标记已读端点 PUT /api/notifications/{id}/read"""
+
+    def test_mark_read(self, client, auth_headers, notifications):
+        """测试标记自己的通知为已读"""
+        response = client.put(f"/api/notifications/{notifications[0].id}/read", headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["is_read"] is True
+
+    def test_cannot_mark_others(self, client, auth_headers, notifications):
+        """测试不能标记别人的通知"""
+        response = client.put(f"/api/notifications/{notifications[2].id}/read", headers=auth_headers)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,135 @@
+"""
+游标分页测试
+测试各列表端点的 cursor 参数和 X-Next-Cursor 响应头
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from fastapi import status
+
+from app.models.activity import Activity
+from app.models.boat import Boat
+from app.models.finance import Finance, FinanceType
+from app.models.forum import Post, Comment
+from app.models.notice import Notice
+from app.models.user import User, UserRole
+from app.utils.pagination import NEXT_CURSOR_HEADER
+
+# 同一时间戳的多行，检验按 id 作为并列排序键
+SAME_TIME = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def _walk(client, headers, url, limit=2):
+    """沿 X-Next-Cursor 翻完所有页，返回按顺序出现的 id"""
+    ids = []
+    cursor = None
+    separator = "&" if "?" in url else "?"
+    for _ in range(50):
+        page_url = f"{url}{separator}limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(page_url, headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        ids.extend(item["id"] for item in response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return ids
+    raise AssertionError("分页没有结束")
+
+
+def _seed(db_session, test_user, admin_user, test_post, kind):
+    rows = []
+    for i in range(5):
+        created_at = SAME_TIME if i < 3 else SAME_TIME + timedelta(hours=i)
+        if kind == "notices":
+            rows.append(Notice(title=f"n{i}", content="c", author_id=admin_user.id, created_at=created_at))
+        elif kind == "posts":
+            rows.append(Post(title=f"p{i}", content="c", user_id=test_user.id, created_at=created_at))
+        elif kind == "comments":
+            rows.append(Comment(post_id=test_post.id, user_id=test_user.id, content="c", created_at=created_at))
+        elif kind == "finances":
+            rows.append(Finance(type=FinanceType.INCOME, amount=Decimal("1"), user_id=test_user.id,
+                                created_at=created_at))
+        elif kind == "activities":
+            rows.append(Activity(title=f"a{i}", start_time=created_at, end_time=created_at + timedelta(hours=1),
+                                 creator_id=test_user.id))
+        elif kind == "boats":
+            rows.append(Boat(name=f"b{i}", type="laser", rental_price=Decimal("10")))
+        elif kind == "users":
+            rows.append(User(username=f"u{i}", email=f"u{i}@example.com", password_hash="x",
+                             role=UserRole.USER, balance=0))
+    db_session.add_all(rows)
+    db_session.commit()
+
+
+ENDPOINTS = {
+    # 端点: (URL, 期望顺序的查询)
+    "notices": ("/api/notices", lambda db: db.query(Notice.id).order_by(Notice.created_at.desc(), Notice.id.desc())),
+    "posts": ("/api/forum/posts", lambda db: db.query(Post.id).order_by(Post.created_at.desc(), Post.id.desc())),
+    "comments": ("/api/forum/posts/{post_id}/comments",
+                 lambda db: db.query(Comment.id).order_by(Comment.created_at, Comment.id)),
+    "finances": ("/api/finances", lambda db: db.query(Finance.id).order_by(Finance.created_at.desc(), Finance.id.desc())),
+    "activities": ("/api/activities",
+                   lambda db: db.query(Activity.id).order_by(Activity.start_time.desc(), Activity.id.desc())),
+    "boats": ("/api/boats", lambda db: db.query(Boat.id).order_by(Boat.id)),
+    "users": ("/api/users", lambda db: db.query(User.id).order_by(User.id)),
+}
+
+
+class TestCursorPagination:
+    """测试游标分页"""
+
+    @pytest.mark.parametrize("kind", sorted(ENDPOINTS))
+    def test_walk_all_pages(self, client, auth_headers, admin_headers, db_session,
+                            test_user, admin_user, test_post, kind):
+        """测试沿游标翻页不重复、不遗漏，顺序与原排序一致"""
+        _seed(db_session, test_user, admin_user, test_post, kind)
+        url, expected_query = ENDPOINTS[kind]
+        headers = admin_headers if kind == "users" else auth_headers
+        ids = _walk(client, headers, url.format(post_id=test_post.id))
+        expected = [row.id for row in expected_query(db_session).all()]
+        assert ids == expected
+
+    @pytest.mark.parametrize("kind", ["notices", "posts", "comments", "finances"])
+    def test_walk_server_default_timestamps(self, client, auth_headers, db_session,
+                                            test_user, admin_user, test_post, kind):
+        """测试 created_at 由服务端默认值写入（SQLite 下不带微秒），并混有同一秒显式写入的行"""
+        for _ in range(4):
+            db_session.add({
+                "notices": lambda: Notice(title="n", content="c", author_id=admin_user.id),
+                "posts": lambda: Post(title="p", content="c", user_id=test_user.id),
+                "comments": lambda: Comment(post_id=test_post.id, user_id=test_user.id, content="c"),
+                "finances": lambda: Finance(type=FinanceType.INCOME, amount=Decimal("1"), user_id=test_user.id),
+            }[kind]())
+        db_session.commit()
+        model = {"notices": Notice, "posts": Post, "comments": Comment, "finances": Finance}[kind]
+        same_second = db_session.query(model.created_at).order_by(model.id).first()[0]
+        _seed(db_session, test_user, admin_user, test_post, kind)
+        db_session.query(model).filter(model.id > 5).update({"created_at": same_second})
+        db_session.commit()
+
+        url, expected_query = ENDPOINTS[kind]
+        ids = _walk(client, auth_headers, url.format(post_id=test_post.id))
+        expected = [row.id for row in expected_query(db_session).all()]
+        assert sorted(ids) == sorted(set(ids))
+        assert ids == expected
+
+    def test_skip_still_supported(self, client, auth_headers, db_session, test_user, admin_user, test_post):
+        """测试未传 cursor 时 skip/limit 行为不变"""
+        _seed(db_session, test_user, admin_user, test_post, "notices")
+        first = client.get("/api/notices?skip=0&limit=2", headers=auth_headers).json()
+        second = client.get("/api/notices?skip=2&limit=2", headers=auth_headers).json()
+        cursor = client.get("/api/notices?limit=2", headers=auth_headers).headers[NEXT_CURSOR_HEADER]
+        by_cursor = client.get(f"/api/notices?limit=2&cursor={cursor}", headers=auth_headers).json()
+        assert len(first) == 2
+        assert [n["id"] for n in second] == [n["id"] for n in by_cursor]
+
+    def test_last_page_has_no_cursor(self, client, auth_headers, test_notice):
+        """测试不满一页时不返回下一页游标"""
+        response = client.get("/api/notices?limit=10", headers=auth_headers)
+        assert NEXT_CURSOR_HEADER not in response.headers
+
+    def test_invalid_cursor(self, client, auth_headers):
+        """测试无效游标返回 400"""
+        response = client.get("/api/notices?cursor=not-a-cursor", headers=auth_headers)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()["detail"] == "无效的分页游标"
@@ -0,0 +1,191 @@
+"""
+查询计划回归测试
+对热点查询在 SQLite 上执行 EXPLAIN QUERY PLAN，出现全表扫描或额外排序即失败
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import Response
+from sqlalchemy import event, func, or_
+
+from app.models.activity import Activity
+from app.models.boat import BoatRental, BoatReservation
+from app.models.finance import Finance, FinanceType
+from app.models.forum import Post, Comment
+from app.models.notice import Notice
+from app.models.notification import Notification
+from app.models.signup import ActivitySignup
+from app.utils.pagination import encode_cursor, paginate
+
+
+def query_plan(db_session, run):
+    """执行 run(db_session)，返回其最后一条 SQL 的查询计划描述"""
+    engine = db_session.get_bind()
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        run(db_session)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    statement, parameters = captured[-1]
+    rows = db_session.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+def assert_indexed(plan, index_name):
+    for detail in plan:
+        assert not (detail.startswith("SCAN") and "INDEX" not in detail), f"全表扫描: {plan}"
+        assert "TEMP B-TREE" not in detail, f"额外排序: {plan}"
+    assert any(index_name in detail for detail in plan), f"未使用 {index_name}: {plan}"
+
+
+MONTH_START = datetime(2026, 1, 1)
+
+HOT_QUERIES = {
+    "signup_lookup": (
+        lambda db: db.query(ActivitySignup).filter(
+            ActivitySignup.activity_id == 1,
+            ActivitySignup.user_id == 1
+        ).first(),
+        "sqlite_autoindex_activity_signups",
+    ),
+    "monthly_revenue": (
+        lambda db: db.query(func.sum(Finance.amount)).filter(
+            Finance.type == FinanceType.INCOME,
+            Finance.created_at >= MONTH_START
+        ).scalar(),
+        "ix_finances_type_created_at",
+    ),
+    "finance_report_sum": (
+        lambda db: db.query(func.sum(Finance.amount)).filter(
+            Finance.type == FinanceType.EXPENSE
+        ).scalar(),
+        "ix_finances_type_created_at",
+    ),
+    "active_rentals_for_user": (
+        lambda db: db.query(BoatRental).filter(
+            BoatRental.user_id == 1,
+            BoatRental.status == "active"
+        ).all(),
+        "ix_boats_rentals_user_id_status",
+    ),
+    "posts_by_tag": (
+        lambda db: db.query(Post).filter(Post.tag_id == 1).order_by(
+            Post.created_at.desc()
+        ).offset(0).limit(100).all(),
+        "ix_posts_tag_id_created_at",
+    ),
+    "comments_for_post": (
+        lambda db: db.query(Comment).filter(Comment.post_id == 1).order_by(
+            Comment.created_at
+        ).offset(0).limit(100).all(),
+        "ix_comments_post_id_created_at",
+    ),
+    "notices_keyset_page": (
+        lambda db: paginate(db.query(Notice), Response(), [Notice.created_at, Notice.id],
+                            encode_cursor([MONTH_START, 500]), limit=100),
+        "ix_notices_created_at",
+    ),
+    "posts_keyset_page": (
+        lambda db: paginate(db.query(Post), Response(), [Post.created_at, Post.id],
+                            encode_cursor([MONTH_START, 500]), limit=100),
+        "ix_posts_created_at",
+    ),
+    "user_finances_keyset_page": (
+        lambda db: paginate(db.query(Finance).filter(Finance.user_id == 1), Response(),
+                            [Finance.created_at, Finance.id], encode_cursor([MONTH_START, 500]), limit=100),
+        "ix_finances_user_id_created_at",
+    ),
+    "activities_keyset_page": (
+        lambda db: paginate(db.query(Activity), Response(), [Activity.start_time, Activity.id],
+                            encode_cursor([MONTH_START, 500]), limit=100),
+        "ix_activities_start_time",
+    ),
+    "calendar_window": (
+        lambda db: db.query(Activity).filter(
+            Activity.start_time < datetime(2026, 3, 9),
+            Activity.end_time > datetime(2026, 3, 2)
+        ).order_by(Activity.start_time, Activity.end_time, Activity.id).all(),
+        "ix_activities_start_time_end_time",
+    ),
+    "waitlist_head": (
+        lambda db: db.query(ActivitySignup.id, ActivitySignup.user_id).filter(
+            ActivitySignup.activity_id == 1,
+            ActivitySignup.status == "waitlisted",
+            ActivitySignup.id.notin_([3])
+        ).order_by(ActivitySignup.waitlist_position, ActivitySignup.id).first(),
+        "ix_activity_signups_waitlist",
+    ),
+    "user_notifications_keyset_page": (
+        lambda db: paginate(db.query(Notification).filter(Notification.user_id == 1), Response(),
+                            [Notification.created_at, Notification.id], encode_cursor([MONTH_START, 500]), limit=100),
+        "ix_notifications_user_id_created_at",
+    ),
+    "club_feed_validators": (
+        lambda db: db.query(func.max(Activity.updated_at), func.count(Activity.id), func.max(Activity.id)).one(),
+        "ix_activities_updated_at",
+    ),
+    "my_feed_validators": (
+        lambda db: db.query(func.max(Activity.updated_at), func.count(ActivitySignup.id)).join(
+            Activity, Activity.id == ActivitySignup.activity_id
+        ).filter(ActivitySignup.user_id == 1).one(),
+        "ix_activity_signups_user_id",
+    ),
+    "reservation_conflict": (
+        lambda db: db.query(BoatReservation).filter(
+            BoatReservation.boat_id == 1,
+            BoatReservation.status == "active",
+            BoatReservation.start_time < MONTH_START
+        ).order_by(BoatReservation.start_time.desc()).first(),
+        "ix_boat_reservations_boat_id_status_start_time",
+    ),
+    "availability_window": (
+        lambda db: db.query(BoatReservation.boat_id, BoatReservation.start_time, BoatReservation.end_time).filter(
+            BoatReservation.status == "active",
+            BoatReservation.start_time > MONTH_START - timedelta(hours=12),
+            BoatReservation.start_time < MONTH_START + timedelta(days=7),
+            BoatReservation.end_time > MONTH_START
+        ).order_by(BoatReservation.start_time).all(),
+        "ix_boat_reservations_status_start_time",
+    ),
+    "fleet_utilization_scan": (
+        lambda db: db.query(BoatRental.boat_id, BoatRental.rental_time, BoatRental.return_time).filter(
+            BoatRental.rental_time >= MONTH_START - timedelta(days=90),
+            BoatRental.rental_time < MONTH_START
+        ).order_by(BoatRental.rental_time).all(),
+        "ix_boats_rentals_rental_time",
+    ),
+    "fleet_utilization_spanning": (
+        lambda db: db.query(BoatRental.boat_id, BoatRental.rental_time, BoatRental.return_time).filter(
+            or_(BoatRental.return_time > MONTH_START - timedelta(days=90), BoatRental.return_time.is_(None)),
+            func.coalesce(BoatRental.rental_time, MONTH_START) < MONTH_START - timedelta(days=90)
+        ).all(),
+        "ix_boats_rentals_return_time",
+    ),
+    "overdue_rentals_batch": (
+        lambda db: db.query(BoatRental.id, BoatRental.boat_id).filter(
+            BoatRental.status == "active",
+            BoatRental.rental_time < MONTH_START
+        ).order_by(BoatRental.rental_time).limit(200).all(),
+        "ix_boats_rentals_status_rental_time",
+    ),
+    "latest_notices": (
+        lambda db: db.query(Notice).order_by(Notice.created_at.desc()).offset(0).limit(100).all(),
+        "ix_notices_created_at",
+    ),
+}
+
+
+class TestHotQueryPlans:
+    """测试热点查询都走索引"""
+
+    @pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+    def test_query_uses_index(self, db_session, name):
+        """测试查询计划不包含全表扫描"""
+        run, index_name = HOT_QUERIES[name]
+        assert_indexed(query_plan(db_session, run), index_name)
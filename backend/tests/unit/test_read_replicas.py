@@ -0,0 +1,241 @@
+"""
+读写分离测试
+使用两个 SQLite 文件分别充当主库和只读副本，测试 app.database.RoutingSession
+"""
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, RoutingSession, ReplicaSet, PrimaryStickiness
+from app.models.notice import Notice
+
+
+def _make_engine(path):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture
+def engines(tmp_path):
+    """主库和副本各写入一条内容不同的公告，用于区分查询落在哪个库"""
+    primary = _make_engine(tmp_path / "primary.db")
+    replica = _make_engine(tmp_path / "replica.db")
+    for engine, title in ((primary, "primary"), (replica, "replica")):
+        with sessionmaker(bind=engine)() as session:
+            session.add(Notice(id=1, title=title, content=title))
+            session.commit()
+    yield primary, replica
+    primary.dispose()
+    replica.dispose()
+
+
+@pytest.fixture
+def make_session(engines):
+    primary, replica = engines
+    stickiness = PrimaryStickiness(window_seconds=60)
+
+    def _make(read_only=True, replicas=None):
+        factory = sessionmaker(
+            class_=RoutingSession,
+            bind=primary,
+            replicas=replicas or ReplicaSet([replica], check_interval=60),
+            stickiness=stickiness,
+        )
+        session = factory()
+        session.info["read_only"] = read_only
+        session.info["user_id"] = 1
+        return session
+
+    return _make
+
+
+def _title(session, for_update=False):
+    query = session.query(Notice).filter(Notice.id == 1)
+    if for_update:
+        query = query.with_for_update()
+    return query.populate_existing().one().title
+
+
+class TestRoutingSession:
+    """测试查询路由"""
+
+    def test_read_only_session_uses_replica(self, make_session):
+        """测试只读会话查询走副本"""
+        with make_session() as session:
+            assert _title(session) == "replica"
+
+    def test_default_session_uses_primary(self, make_session):
+        """测试普通会话查询走主库"""
+        with make_session(read_only=False) as session:
+            assert _title(session) == "primary"
+
+    def test_prefer_replica_query_in_default_session(self, make_session):
+        """测试普通会话中带 prefer_replica 的查询走副本，其余查询仍走主库"""
+        with make_session(read_only=False) as session:
+            query = session.query(Notice).filter(Notice.id == 1).populate_existing()
+            assert query.execution_options(prefer_replica=True).one().title == "replica"
+            assert _title(session) == "primary"
+
+    @pytest.mark.parametrize("synchronous, expected", [(True, "replica"), (False, "primary")])
+    def test_reads_after_commit(self, make_session, engines, synchronous, expected):
+        """测试提交后的读取仅在副本无复制延迟时走副本，再次写入后回到主库"""
+        _, replica = engines
+        replicas = ReplicaSet([replica], check_interval=60, synchronous=synchronous)
+        with make_session(read_only=False, replicas=replicas) as session:
+            session.info["user_id"] = None  # 不受写后粘滞影响
+            session.add(Notice(title="new", content="new"))
+            session.commit()
+            assert _title(session) == expected
+            session.add(Notice(title="again", content="again"))
+            session.flush()
+            assert _title(session) == "primary"
+
+    @pytest.mark.parametrize("synchronous, found", [(True, False), (False, True)])
+    def test_auth_lookup_uses_replica_only_when_synchronous(self, make_session, engines, synchronous, found):
+        """测试认证查询仅在副本无复制延迟时走副本：副本尚未复制到的新用户仍能通过认证"""
+        from app.models.user import User, UserRole
+        from app.routers.deps import _load_user
+        from app.utils.identity_cache import identity_cache
+        primary, replica = engines
+        with sessionmaker(bind=primary)() as session:
+            session.add(User(id=7, username="newcomer", email="newcomer@example.com",
+                             password_hash="x", role=UserRole.USER, balance=0))
+            session.commit()
+        identity_cache.invalidate(7)
+        replicas = ReplicaSet([replica], check_interval=60, synchronous=synchronous)
+        try:
+            with make_session(read_only=False, replicas=replicas) as session:
+                assert (_load_user(session, 7, "newcomer") is not None) == found
+        finally:
+            identity_cache.invalidate(7)
+
+    def test_for_update_uses_primary(self, make_session):
+        """测试加锁查询走主库"""
+        with make_session() as session:
+            assert _title(session, for_update=True) == "primary"
+
+    def test_writes_go_to_primary_and_stick(self, make_session, engines):
+        """测试写入落在主库，且之后该用户的读请求固定走主库"""
+        primary, replica = engines
+        with make_session() as session:
+            session.add(Notice(title="new", content="new"))
+            session.commit()
+        with sessionmaker(bind=primary)() as check:
+            assert check.query(Notice).count() == 2
+        with sessionmaker(bind=replica)() as check:
+            assert check.query(Notice).count() == 1
+
+        with make_session() as session:
+            assert _title(session) == "primary"
+
+    def test_sticky_token_across_processes(self, engines):
+        """测试写入后签发的粘滞令牌在其他进程（另一个 PrimaryStickiness）中同样让该用户读主库"""
+        from starlette.datastructures import State
+        _, replica = engines
+        writer = PrimaryStickiness(window_seconds=60)
+        other_process = PrimaryStickiness(window_seconds=60)
+
+        def make(stickiness, token=None, user_id=1):
+            session = sessionmaker(class_=RoutingSession, bind=engines[0],
+                                   replicas=ReplicaSet([replica], check_interval=60),
+                                   stickiness=stickiness)()
+            session.info.update(read_only=True, user_id=user_id, sticky_token=token)
+            return session
+
+        with make(writer) as session:
+            session.info["request_state"] = state = State()
+            session.add(Notice(title="new", content="new"))
+            session.commit()
+        token = state.primary_sticky_token
+
+        with make(other_process, token) as session:
+            assert _title(session) == "primary"
+        with make(other_process) as session:
+            assert _title(session) == "replica"
+        with make(other_process, token, user_id=2) as session:
+            assert _title(session) == "replica"
+        with make(other_process, token[:-2] + "xx") as session:
+            assert _title(session) == "replica"
+
+    def test_sticky_cookie_round_trip(self, engines, monkeypatch):
+        """测试写请求的响应带回粘滞 cookie，之后由另一进程处理的读请求走主库"""
+        from fastapi import Depends, FastAPI
+        from fastapi.testclient import TestClient
+        from app import database
+        from app.main import primary_sticky_cookie
+        from app.routers.deps import get_read_db
+        primary, replica = engines
+
+        def use_process():
+            monkeypatch.setattr(database, "SessionLocal", sessionmaker(
+                class_=RoutingSession, bind=primary,
+                replicas=ReplicaSet([replica], check_interval=60),
+                stickiness=PrimaryStickiness(window_seconds=60),
+            ))
+
+        api = FastAPI()
+        api.middleware("http")(primary_sticky_cookie)
+
+        @api.post("/notices")
+        def write(db=Depends(database.get_db)):
+            db.info["user_id"] = 1
+            db.add(Notice(title="new", content="new"))
+            db.commit()
+            return {}
+
+        @api.get("/notice")
+        def read(db=Depends(get_read_db)):
+            db.info["user_id"] = 1
+            return {"title": _title(db)}
+
+        use_process()
+        with TestClient(api) as client:
+            response = client.post("/notices")
+            assert database.PRIMARY_STICKY_COOKIE in response.cookies
+            use_process()
+            assert client.get("/notice").json() == {"title": "primary"}
+        with TestClient(api) as client:
+            assert client.get("/notice").json() == {"title": "replica"}
+
+    def test_unhealthy_replica_falls_back(self, make_session, tmp_path):
+        """测试健康检查判定副本不可用后回退到主库"""
+        broken = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+        replicas = ReplicaSet([broken], check_interval=60)
+        replicas.check_health()
+        with make_session(replicas=replicas) as session:
+            assert _title(session) == "primary"
+
+
+class TestReplicaSet:
+    """测试副本轮询"""
+
+    def test_round_robin(self, tmp_path):
+        """测试多个副本轮询选择"""
+        first = _make_engine(tmp_path / "a.db")
+        second = _make_engine(tmp_path / "b.db")
+        replicas = ReplicaSet([first, second], check_interval=60)
+        chosen = [replicas.choose() for _ in range(4)]
+        assert chosen == [first, second, first, second]
+
+    def test_choose_does_not_probe(self, tmp_path, monkeypatch):
+        """测试选择副本只读取缓存的健康状态，不在请求线程上连接副本"""
+        replicas = ReplicaSet([_make_engine(tmp_path / "a.db")], check_interval=0)
+        monkeypatch.setattr(replicas, "check_health", lambda: pytest.fail("请求线程上执行了健康检查"))
+        assert replicas.choose() is replicas.engines[0]
+
+    def test_background_health_check(self, tmp_path):
+        """测试后台线程启动后立即检查，停止后线程退出"""
+        broken = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+        replicas = ReplicaSet([broken], check_interval=60)
+        replicas.start()
+        try:
+            deadline = time.monotonic() + 5
+            while replicas.choose() is not None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert replicas.choose() is None
+        finally:
+            replicas.stop()
+        assert replicas._thread is None
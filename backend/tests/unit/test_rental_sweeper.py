@@ -0,0 +1,218 @@
+"""
+逾期租借清理和后台任务调度测试
+测试 app.utils.rental_sweeper 的分批标记/自动归还、app.utils.scheduler 的租约和执行统计
+"""
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from fastapi import status
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.models.boat import Boat, BoatRental, BoatStatus
+from app.models.job_lease import JobLease
+from app.utils.fleet_board import fleet_board
+from app.utils.rental_sweeper import sweep_overdue_rentals
+from app.utils.scheduler import Scheduler, acquire_lease, scheduler as app_scheduler
+
+NOW = datetime(2026, 6, 1, 12, 0, 0)
+
+
+@pytest.fixture(autouse=True)
+def clear_board():
+    fleet_board.clear()
+    yield
+    fleet_board.clear()
+
+
+@pytest.fixture
+def boats(db_session):
+    fleet = [Boat(name=f"boat{i}", type="laser", status=BoatStatus.RENTED, rental_price=Decimal("10.00"))
+             for i in range(3)]
+    db_session.add_all(fleet)
+    db_session.commit()
+    return fleet
+
+
+def _rent(db_session, boat, user, hours_ago, rental_status="active"):
+    rental = BoatRental(boat_id=boat.id, user_id=user.id, status=rental_status,
+                        rental_time=NOW - timedelta(hours=hours_ago))
+    db_session.add(rental)
+    db_session.commit()
+    return rental
+
+
+def _statuses(db_session):
+    db_session.expire_all()
+    return {rental.id: rental.status for rental in db_session.query(BoatRental)}
+
+
+class TestFlagOverdue:
+    """测试默认的标记模式"""
+
+    def test_flags_only_overdue_active(self, db_session, boats, test_user):
+        """测试只标记超时未还的租借，船只保持租出"""
+        overdue = _rent(db_session, boats[0], test_user, settings.RENTAL_OVERDUE_HOURS + 1)
+        recent = _rent(db_session, boats[1], test_user, settings.RENTAL_OVERDUE_HOURS - 1)
+        returned = _rent(db_session, boats[2], test_user, 100, rental_status="returned")
+
+        result = sweep_overdue_rentals(db_session, now=NOW)
+        assert result == {"flagged": 1, "returned": 0, "boats_released": 0, "batches": 1}
+        assert _statuses(db_session) == {overdue.id: "overdue", recent.id: "active", returned.id: "returned"}
+        assert db_session.get(Boat, boats[0].id).status == BoatStatus.RENTED
+        # 再次执行没有可处理的记录
+        assert sweep_overdue_rentals(db_session, now=NOW)["flagged"] == 0
+
+    def test_batches(self, db_session, boats, test_user):
+        """测试按批处理，每批一个事务"""
+        for i in range(5):
+            _rent(db_session, boats[i % 3], test_user, 24 + i)
+        result = sweep_overdue_rentals(db_session, now=NOW, batch_size=2)
+        assert result["flagged"] == 5
+        assert result["batches"] == 3
+        assert set(_statuses(db_session).values()) == {"overdue"}
+
+    def test_flagged_rental_can_be_returned(self, client, auth_headers, db_session, test_user, test_boat):
+        """测试被标记为逾期的租借仍可由用户归还"""
+        test_boat.status = BoatStatus.RENTED
+        rental = _rent(db_session, test_boat, test_user, 48)
+        sweep_overdue_rentals(db_session, now=datetime.utcnow())
+        assert _statuses(db_session)[rental.id] == "overdue"
+
+        response = client.post("/api/boats/return", headers=auth_headers, json={"rental_id": rental.id})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["status"] == "returned"
+        assert db_session.get(Boat, test_boat.id).status == BoatStatus.AVAILABLE
+
+
+class TestAutoReturn:
+    """测试自动归还模式"""
+
+    @pytest.fixture(autouse=True)
+    def auto_return(self, monkeypatch):
+        monkeypatch.setattr(settings, "RENTAL_OVERDUE_ACTION", "return")
+
+    def test_returns_and_releases_boats(self, db_session, boats, test_user):
+        """测试自动归还逾期租借（含已标记的），释放船只并同步状态表"""
+        fleet_board.list(db_session)
+        first = _rent(db_session, boats[0], test_user, 30)
+        flagged = _rent(db_session, boats[1], test_user, 40, rental_status="overdue")
+
+        result = sweep_overdue_rentals(db_session, now=NOW)
+        assert result["returned"] == 2
+        assert result["boats_released"] == 2
+        assert _statuses(db_session) == {first.id: "returned", flagged.id: "returned"}
+        assert db_session.get(BoatRental, first.id).return_time == NOW
+        boat = db_session.get(Boat, boats[0].id)
+        assert (boat.status, boat.version) == (BoatStatus.AVAILABLE, 1)
+        assert fleet_board.get(db_session, boats[0].id)["status"] == BoatStatus.AVAILABLE
+        assert fleet_board.check(db_session)["consistent"]
+
+    def test_boat_with_other_outstanding_rental_kept(self, db_session, boats, test_user, admin_user):
+        """测试船只还有其他未归还租借时不释放"""
+        stale = _rent(db_session, boats[0], test_user, 30)
+        current = _rent(db_session, boats[0], admin_user, 1)
+        result = sweep_overdue_rentals(db_session, now=NOW)
+        assert result["returned"] == 1
+        assert result["boats_released"] == 0
+        assert _statuses(db_session) == {stale.id: "returned", current.id: "active"}
+        assert db_session.get(Boat, boats[0].id).status == BoatStatus.RENTED
+
+    def test_maintenance_boat_untouched(self, db_session, boats, test_user):
+        """测试管理员已改为维护中的船只不会被改回可租借"""
+        boats[0].status = BoatStatus.MAINTENANCE
+        db_session.commit()
+        _rent(db_session, boats[0], test_user, 30)
+        assert sweep_overdue_rentals(db_session, now=NOW)["boats_released"] == 0
+        assert db_session.get(Boat, boats[0].id).status == BoatStatus.MAINTENANCE
+
+
+class TestJobLease:
+    """测试任务租约"""
+
+    def test_lease_exclusive_until_expiry(self, db_session):
+        """测试租约未过期时其他进程抢占失败，持有者可续约，过期后可被抢占"""
+        assert acquire_lease(db_session, "job", "a", 60, now=NOW)
+        assert not acquire_lease(db_session, "job", "b", 60, now=NOW + timedelta(seconds=30))
+        assert acquire_lease(db_session, "job", "a", 60, now=NOW + timedelta(seconds=30))
+        assert not acquire_lease(db_session, "job", "b", 60, now=NOW + timedelta(seconds=60))
+        assert acquire_lease(db_session, "job", "b", 60, now=NOW + timedelta(seconds=90))
+        lease = db_session.get(JobLease, "job")
+        db_session.refresh(lease)
+        assert (lease.owner, lease.last_run_at) == ("b", NOW + timedelta(seconds=90))
+
+    def test_leases_per_job(self, db_session):
+        """测试不同任务的租约互不影响"""
+        assert acquire_lease(db_session, "one", "a", 60, now=NOW)
+        assert acquire_lease(db_session, "two", "b", 60, now=NOW)
+
+
+class TestScheduler:
+    """测试调度器"""
+
+    @pytest.fixture
+    def session_factory(self, test_engine_fixture):
+        return sessionmaker(autocommit=False, autoflush=False, bind=test_engine_fixture)
+
+    def test_only_one_owner_runs(self, session_factory):
+        """测试两个进程的调度器在同一间隔内只有一个执行任务"""
+        calls = []
+        first, second = Scheduler(session_factory, owner="a"), Scheduler(session_factory, owner="b")
+        for worker in (first, second):
+            worker.add_job("job", 60, lambda db, worker=worker: calls.append(worker.owner) or {"processed": 2})
+        assert first.run_job("job")
+        assert not second.run_job("job")
+        assert first.run_job("job")
+        assert calls == ["a", "a"]
+
+        job = first.stats()["jobs"][0]
+        assert (job["runs"], job["skipped"], job["failures"]) == (2, 0, 0)
+        assert job["totals"] == {"processed": 4}
+        assert second.stats()["jobs"][0]["skipped"] == 1
+
+    def test_failure_recorded(self, session_factory):
+        """测试任务异常被记录，不向外抛出"""
+        worker = Scheduler(session_factory, owner="a")
+
+        def broken(db):
+            raise RuntimeError("boom")
+
+        worker.add_job("broken", 60, broken)
+        worker.run_job("broken")
+        job = worker.stats()["jobs"][0]
+        assert (job["runs"], job["failures"], job["last_error"]) == (0, 1, "boom")
+
+    def test_run_pending_respects_interval(self, session_factory):
+        """测试到期才执行"""
+        calls = []
+        worker = Scheduler(session_factory, owner="a")
+        worker.add_job("job", 3600, lambda db: calls.append(1) or {})
+        worker.run_pending()
+        worker.run_pending()
+        assert calls == [1]
+
+    def test_background_thread(self, session_factory):
+        """测试后台线程启动后执行任务，停止后线程退出"""
+        worker = Scheduler(session_factory, owner="a")
+        worker.add_job("job", 3600, lambda db: {"processed": 1})
+        worker.start()
+        try:
+            deadline = time.monotonic() + 5
+            while worker.stats()["jobs"][0]["runs"] == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert worker.running
+        finally:
+            worker.stop()
+        assert not worker.running
+        assert worker.stats()["jobs"][0]["runs"] == 1
+
+    def test_sweeper_registered(self, client, admin_headers, auth_headers):
+        """测试逾期清理已注册，测试环境下调度器不启动；统计端点仅管理员可用"""
+        data = client.get("/api/stats/scheduler", headers=admin_headers).json()
+        assert data["running"] is False
+        assert [job["name"] for job in data["jobs"]] == ["overdue_rentals"]
+        assert app_scheduler.stats()["jobs"][0]["interval_seconds"] == settings.OVERDUE_SWEEP_INTERVAL_SECONDS
+        response = client.get("/api/stats/scheduler", headers=auth_headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,55 @@
+"""
+请求指标测试
+测试 Server-Timing 响应头、慢请求日志和查询预算 fixture
+"""
+import json
+import logging
+
+from fastapi import status
+
+from app.config import settings
+
+
+def _timing_entries(response):
+    entries = {}
+    for part in response.headers["Server-Timing"].split(","):
+        name, *params = [p.strip() for p in part.split(";")]
+        entries[name] = dict(p.split("=", 1) for p in params)
+    return entries
+
+
+class TestServerTiming:
+    """测试 Server-Timing 响应头"""
+
+    def test_header_reports_db_auth_and_serialization(self, client, auth_headers, test_boat):
+        """测试响应头包含数据库、写锁等待、认证、序列化和总耗时"""
+        response = client.get("/api/boats", headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        entries = _timing_entries(response)
+        assert set(entries) == {"db", "lock", "auth", "serialize", "total"}
+        assert entries["db"]["desc"] == '"2 queries"'
+
+    def test_header_on_unauthenticated_request(self, client):
+        """测试无需数据库的请求也有响应头"""
+        response = client.get("/health")
+        assert _timing_entries(response)["db"]["desc"] == '"0 queries"'
+
+    def test_slow_request_log(self, client, auth_headers, monkeypatch, caplog):
+        """测试超过阈值时输出结构化慢请求日志"""
+        monkeypatch.setattr(settings, "SLOW_REQUEST_THRESHOLD_MS", 0)
+        with caplog.at_level(logging.WARNING, logger="app.main"):
+            client.get("/api/users/me", headers=auth_headers)
+        records = [json.loads(r.getMessage()) for r in caplog.records if "slow_request" in r.getMessage()]
+        assert records[-1]["path"] == "/api/users/me"
+        assert records[-1]["db_queries"] == 1
+
+
+class TestQueryBudget:
+    """测试查询预算 fixture"""
+
+    def test_get_notices_query_budget(self, client, auth_headers, test_notice, query_counter):
+        """测试公告列表的查询次数"""
+        with query_counter() as metrics:
+            response = client.get("/api/notices", headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert metrics.query_count <= 2
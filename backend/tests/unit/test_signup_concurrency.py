@@ -0,0 +1,110 @@
+"""
+并发报名测试
+使用临时 SQLite 文件（生产模式引擎）从多个线程直接调用报名/取消处理函数，检查不会超员、候补不会重复转正
+"""
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, create_sqlite_engine
+from app.models.activity import Activity
+from app.models.signup import ActivitySignup
+from app.models.user import User, UserRole
+from app.routers.activities import cancel_signup, signup_activity
+from app.schemas.activity import ActivitySignupCreate
+
+
+@pytest.fixture
+def Session(tmp_path):
+    reader = create_sqlite_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    Base.metadata.create_all(bind=reader)
+    yield sessionmaker(bind=reader.execution_options(sqlite_begin="IMMEDIATE"))
+    reader.dispose()
+
+
+class TestConcurrentSignup:
+    """测试并发报名的名额控制"""
+
+    def test_no_oversubscription(self, Session):
+        """测试 40 个用户同时抢 5 个名额，恰好 5 人录取，其余候补且序号不重复"""
+        with Session() as db:
+            users = [User(username=f"u{i}", email=f"u{i}@example.com", password_hash="x",
+                          role=UserRole.USER, balance=0) for i in range(40)]
+            db.add_all(users)
+            activity = Activity(title="热门赛事", start_time=datetime.utcnow() + timedelta(days=1),
+                                end_time=datetime.utcnow() + timedelta(days=1, hours=2),
+                                max_participants=5, creator_id=1)
+            db.add(activity)
+            db.commit()
+            activity_id = activity.id
+            for user in users:
+                db.refresh(user)
+            db.expunge_all()
+
+        results = []
+        barrier = threading.Barrier(len(users))
+
+        def attempt(user):
+            barrier.wait()
+            with Session() as db:
+                try:
+                    signup = signup_activity(ActivitySignupCreate(activity_id=activity_id), db=db, current_user=user)
+                    results.append((signup.status, signup.waitlist_position))
+                except HTTPException as e:
+                    results.append((e.status_code, e.detail))
+
+        threads = [threading.Thread(target=attempt, args=(user,)) for user in users]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert results.count(("confirmed", None)) == 5
+        assert sorted(position for status, position in results if status == "waitlisted") == list(range(1, 36))
+        with Session() as db:
+            assert db.get(Activity, activity_id).signup_count == 5
+            assert db.query(ActivitySignup).filter(
+                ActivitySignup.activity_id == activity_id,
+                ActivitySignup.status == "confirmed"
+            ).count() == 5
+
+    def test_concurrent_cancels_promote_distinct_members(self, Session):
+        """测试 5 个录取者同时取消，候补前 5 位各转正一次"""
+        with Session() as db:
+            users = [User(username=f"u{i}", email=f"u{i}@example.com", password_hash="x",
+                          role=UserRole.USER, balance=0) for i in range(15)]
+            db.add_all(users)
+            activity = Activity(title="热门赛事", start_time=datetime.utcnow() + timedelta(days=1),
+                                end_time=datetime.utcnow() + timedelta(days=1, hours=2),
+                                max_participants=5, creator_id=1)
+            db.add(activity)
+            db.commit()
+            activity_id = activity.id
+            for user in users:
+                db.refresh(user)
+            db.expunge_all()
+        for user in users:
+            with Session() as db:
+                signup_activity(ActivitySignupCreate(activity_id=activity_id), db=db, current_user=user)
+
+        barrier = threading.Barrier(5)
+
+        def cancel(user):
+            barrier.wait()
+            with Session() as db:
+                cancel_signup(activity_id, db=db, current_user=user)
+
+        threads = [threading.Thread(target=cancel, args=(user,)) for user in users[:5]]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        with Session() as db:
+            assert db.get(Activity, activity_id).signup_count == 5
+            confirmed = {s.user_id for s in db.query(ActivitySignup).filter(
+                ActivitySignup.activity_id == activity_id, ActivitySignup.status == "confirmed")}
+            assert confirmed == {user.id for user in users[5:10]}
@@ -0,0 +1,91 @@
+"""
+NDJSON 流式列表测试
+测试 Accept: application/x-ndjson 时不分页列表端点逐行输出，内容与 JSON 列表一致
+"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+from sqlalchemy import insert
+
+from app.models.boat import BoatRental
+from app.models.signup import ActivitySignup
+from app.models.user import User, UserRole
+from app.schemas.activity import ActivitySignupResponse
+from app.utils import streaming
+
+NDJSON = {"Accept": streaming.NDJSON_MEDIA_TYPE}
+
+
+def _ndjson(response):
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith(streaming.NDJSON_MEDIA_TYPE)
+    # 每行一个对象，以换行结尾；没有记录时响应体为空
+    assert response.text == "" or response.text.endswith("\n")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.fixture
+def many_rentals(db_session, test_user, admin_user, test_boat):
+    """两个用户共 1200 条租借记录，超过一批的大小"""
+    start = datetime(2025, 1, 1)
+    db_session.execute(insert(BoatRental), [
+        {"boat_id": test_boat.id, "user_id": test_user.id if i % 2 else admin_user.id,
+         "rental_time": start + timedelta(hours=i), "status": "returned"}
+        for i in range(1200)
+    ])
+    db_session.commit()
+
+
+class TestNdjsonStreaming:
+    """测试流式输出模式"""
+
+    def test_all_rentals(self, client, admin_headers, test_boat, many_rentals):
+        """测试全部租借记录逐行输出，带船只信息，与 JSON 列表内容一致"""
+        rows = _ndjson(client.get("/api/boats/all/rentals", headers={**admin_headers, **NDJSON}))
+        listed = client.get("/api/boats/all/rentals", headers=admin_headers).json()
+        assert len(rows) == 1200
+        assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+        assert rows[0]["boat"]["id"] == test_boat.id
+        assert sorted(rows, key=lambda row: row["id"]) == sorted(listed, key=lambda row: row["id"])
+
+    def test_my_rentals(self, client, auth_headers, test_user, many_rentals):
+        """测试我的租借记录只包含本人记录"""
+        rows = _ndjson(client.get("/api/boats/rentals", headers={**auth_headers, **NDJSON}))
+        assert len(rows) == 600
+        assert {row["user_id"] for row in rows} == {test_user.id}
+
+    def test_activity_signups(self, client, auth_headers, db_session, test_activity):
+        """测试活动报名列表和我的报名列表的流式输出"""
+        users = [User(username=f"s{i}", email=f"s{i}@example.com", password_hash="x",
+                      role=UserRole.USER, balance=0) for i in range(3)]
+        db_session.add_all(users)
+        db_session.flush()
+        db_session.add_all([ActivitySignup(activity_id=test_activity.id, user_id=user.id) for user in users])
+        db_session.commit()
+
+        url = f"/api/activities/{test_activity.id}/signups"
+        rows = _ndjson(client.get(url, headers={**auth_headers, **NDJSON}))
+        assert rows == client.get(url, headers=auth_headers).json()
+        assert _ndjson(client.get("/api/activities/my/signups", headers={**auth_headers, **NDJSON})) == []
+
+    def test_permission_still_checked(self, client, auth_headers):
+        """测试流式模式仍然校验权限"""
+        response = client.get("/api/boats/all/rentals", headers={**auth_headers, **NDJSON})
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_json_by_default(self, client, admin_headers, many_rentals):
+        """测试未声明 Accept 时仍返回 JSON 数组"""
+        response = client.get("/api/boats/all/rentals", headers=admin_headers)
+        assert response.headers["content-type"].startswith("application/json")
+        assert len(response.json()) == 1200
+
+    def test_written_in_batches(self, db_session, test_activity, test_user):
+        """测试按批写出，每块最多 batch_size 行"""
+        for i in range(5):
+            db_session.add(ActivitySignup(activity_id=test_activity.id, user_id=test_user.id + 100 + i))
+        db_session.commit()
+        query = db_session.query(ActivitySignup).order_by(ActivitySignup.id)
+        chunks = list(streaming._ndjson_batches(query, ActivitySignupResponse, batch_size=2))
+        assert [chunk.count(b"\n") for chunk in chunks] == [2, 2, 1]